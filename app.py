@@ -2,8 +2,13 @@
 StreamNotify+ Discord Bot
 This module contains the Discord bot functionality for notifications, XP, economy, and moderation.
 """
+import io
 import os
+import re
 import json
+import time
+import hashlib
+import contextlib
 import random
 import asyncio
 import logging
@@ -12,6 +17,24 @@ import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 import aiohttp
+import telemetry
+import metrics
+import command_stats
+import loop_monitor
+import storage
+import economy
+import member_cache
+from render_cache import renders
+import message_templates
+import eventsub
+import websub
+import breaker
+import profiler
+import tenants
+import seen
+import delivery
+import config_edits
+import modlog
 
 # Set up logging
 logging.basicConfig(
@@ -65,64 +88,120 @@ DEFAULT_USERS = {}
 
 CONFIG_PATH = "data/config.json"
 USERS_PATH = "data/users.json"
+USERS_SNAPSHOT_PATH = "data/users.bin"
+
+# "json" keeps data/users.json as the source of truth, "binary" switches to the mmap snapshot
+USERS_FORMAT = os.getenv("USERS_FORMAT", "json")
+LEDGER_PATH = "data/ledger.jsonl"
+
+# Append-only journal of moderation cases
+CASES_PATH = "data/cases.jsonl"
+
+# Fingerprint of the last synced command tree per application; the global sync is skipped while it matches
+COMMAND_SYNC_PATH = "data/command_sync.json"
+
+# Set to 1 to sync the command tree on startup even if its fingerprint did not change
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC") == "1"
+
+# Twitch polling interval once EventSub delivers live events
+TWITCH_RECONCILE_MINUTES = int(os.getenv("TWITCH_RECONCILE_MINUTES", "30"))
+
+# YouTube polling interval once WebSub pushes uploads (leases are renewed on each pass)
+YOUTUBE_RECONCILE_MINUTES = int(os.getenv("YOUTUBE_RECONCILE_MINUTES", "120"))
+
+# Platform base URLs, overridable to point the pollers at a local fake (see benchmarks/fake_platforms.py)
+TWITCH_AUTH_BASE = os.getenv("TWITCH_AUTH_BASE", "https://id.twitch.tv")
+TWITCH_API_BASE = os.getenv("TWITCH_API_BASE", "https://api.twitch.tv")
+YOUTUBE_API_BASE = os.getenv("YOUTUBE_API_BASE", "https://www.googleapis.com")
+TIKTOK_BASE = os.getenv("TIKTOK_BASE", "https://www.tiktok.com")
+
+# Configured YouTube names that already are channel IDs need no search
+YOUTUBE_CHANNEL_ID = re.compile(r"^UC[\w-]{22}$")
+
+# State embedded in a TikTok profile page; the rest of the page also holds user, music and challenge IDs
+TIKTOK_STATE = re.compile(r'<script id="(?:SIGI_STATE|__UNIVERSAL_DATA_FOR_REHYDRATION__)"[^>]*>(.*?)</script>', re.S)
 
 # Initialize Discord bot
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+class StreamNotifyTree(app_commands.CommandTree):
+    """Command tree tracing the latency and errors of every slash command"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        command_stats.mark_started(interaction)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        command_stats.record(interaction, error)
+        await super().on_error(interaction, error)
+
+# Wait at most this long for every tenant's cache before the first poll
+TENANT_READY_TIMEOUT = 60
 
-# API trackers
-tiktok_cache = {}
-youtube_cache = {}
+def create_bot():
+    """Create a Discord client with the bot's intents, command tree and member cache options"""
+    return commands.Bot(command_prefix="!", intents=intents, tree_cls=StreamNotifyTree, **member_cache.client_options())
+
+bot = create_bot()
+command_stats.install_response_hooks()
+telemetry.set_latency_provider(lambda: bot.latency)
+
+# API trackers: live state per streamer, recent video IDs per creator
+tiktok_cache = seen.SeenCache()
+youtube_cache = seen.SeenCache()
 twitch_cache = {}
 
-# Helper functions
-def load_config():
-    """Load the configuration from config.json"""
-    try:
-        if os.path.exists(CONFIG_PATH):
-            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-                json.dump(DEFAULT_CONFIG, f, indent=2)
-            return DEFAULT_CONFIG
-    except Exception as e:
-        logger.error(f"Error loading config: {str(e)}")
-        return DEFAULT_CONFIG
+# Twitch app access token and login -> Helix user, reused across checks
+twitch_auth = {"token": None, "expires_at": 0}
+twitch_users = {}
 
-def save_config(config):
-    """Save the configuration to config.json"""
-    try:
-        with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving config: {str(e)}")
+# Configured YouTube name -> channel ID, resolved once (each search costs quota)
+youtube_channel_ids = {}
 
-def load_users():
-    """Load the users data from users.json"""
-    try:
-        if os.path.exists(USERS_PATH):
-            with open(USERS_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            with open(USERS_PATH, 'w', encoding='utf-8') as f:
-                json.dump(DEFAULT_USERS, f, indent=2)
-            return DEFAULT_USERS
-    except Exception as e:
-        logger.error(f"Error loading users: {str(e)}")
-        return DEFAULT_USERS
+# Cache sizes compared by /debug snapshot and /debug diff
+for name, cache in (("tiktok_cache", tiktok_cache), ("youtube_cache", youtube_cache), ("twitch_cache", twitch_cache),
+                    ("twitch_users", twitch_users), ("youtube_channel_ids", youtube_channel_ids),
+                    ("member_cache", member_cache.members), ("member_ids", member_cache.member_ids),
+                    ("render_cache", renders)):
+    profiler.watch(name, cache.__len__)
+profiler.watch("discord.users", lambda: sum(len(tenant.bot.users) for tenant in tenants.registry))
+profiler.watch("discord.members", lambda: sum(len(guild.members) for tenant in tenants.registry for guild in tenant.bot.guilds))
+profiler.watch("discord.messages", lambda: sum(len(tenant.bot.cached_messages) for tenant in tenants.registry))
 
-def save_users(users):
-    """Save the users data to users.json"""
-    try:
-        with open(USERS_PATH, 'w', encoding='utf-8') as f:
-            json.dump(users, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving users: {str(e)}")
+# Persistence: the primary tenant keeps its data in data/, others in data/tenants/<name>/
+def create_tenant(name, client, config_path, users_path, users_snapshot_path, ledger_path, cases_path):
+    """Register a tenant with its own config, user store, ledger and moderation cases"""
+    tenant_user_store = storage.UserStore(
+        users_path,
+        DEFAULT_USERS,
+        snapshot_path=users_snapshot_path if USERS_FORMAT == "binary" else None
+    )
+    return tenants.add(tenants.Tenant(
+        name,
+        client,
+        storage.ConfigStore(config_path, DEFAULT_CONFIG, compile=message_templates.compile_config),
+        tenant_user_store,
+        economy.Economy(tenant_user_store, ledger_path),
+        modlog.CaseLog(cases_path)
+    ))
+
+create_tenant("main", bot, CONFIG_PATH, USERS_PATH, USERS_SNAPSHOT_PATH, LEDGER_PATH, CASES_PATH)
+
+# The stores of the tenant whose event is being handled
+config_store = tenants.TenantBound("config_store")
+user_store = tenants.TenantBound("user_store")
+bank = tenants.TenantBound("bank")
+case_log = tenants.TenantBound("case_log")
+command_sync_store = storage.ConfigStore(COMMAND_SYNC_PATH, {})
+command_sync_lock = asyncio.Lock()
+
+# Shared HTTP connection pool (see http_session) and startup timing
+http = {"session": None}
+startup = {"started_at": None, "ready_in": None}
 
+# Helper functions
 def get_platform_example(platform):
     """Return an example username for each platform"""
     examples = {
@@ -168,27 +247,72 @@ def get_platform_emoji(platform):
     }
     return emojis.get(platform, "🔔")
 
-def get_user_data(user_id):
+def create_http_session():
+    """Create an aiohttp session reporting request latency to the metrics registry"""
+    return aiohttp.ClientSession(trace_configs=[metrics.aiohttp_trace_config()])
+
+@contextlib.asynccontextmanager
+async def http_session():
+    """Yield the shared HTTP session, so pollers reuse warm connections instead of reconnecting each tick"""
+    if http["session"] is None or http["session"].closed:
+        http["session"] = create_http_session()
+    yield http["session"]
+
+async def close_http_session():
+    """Close the shared HTTP session"""
+    if http["session"] is not None and not http["session"].closed:
+        await http["session"].close()
+
+def get_message_template(platform, creator, config_data):
+    """Return the compiled notification message of a creator"""
+    template = (config_store.compiled or {}).get((platform, creator))
+    if template is None or template.source != config_data["message"]:
+        # Config saved since this copy was loaded
+        template = message_templates.MessageTemplate(config_data["message"])
+    return template
+
+def format_breaker_status(status):
+    """Describe a creator's circuit breaker state for the config panel"""
+    if status is None or status["state"] == breaker.CLOSED:
+        return "🟢 Vérifications normales"
+    if status["state"] == breaker.HALF_OPEN:
+        return "🟡 Nouvel essai en cours"
+    minutes = max(1, round(status['retry_in'] / 60))
+    retry = f"nouvel essai dans {minutes} min" if minutes < 120 else f"nouvel essai dans {round(minutes / 60)} h"
+    if status["state"] == "quarantined":
+        return f"⛔ En quarantaine ({status['last_error']}), {retry}. Désactivez puis réactivez le créateur pour réessayer tout de suite."
+    return f"🔴 En pause après des erreurs ({status['last_error']}), {retry}"
+
+def format_breaker_badge(platform, creator):
+    """Return a short suffix flagging a paused or quarantined creator"""
+    status = breaker.peek_creator(platform, creator)
+    if status is None or status["state"] == breaker.CLOSED:
+        return ""
+    return " ⛔ quarantaine" if status["state"] == "quarantined" else " 🔴 en pause"
+
+async def check_message_placeholders(interaction, platform, message):
+    """Reject a notification message using placeholders the platform cannot fill in"""
+    invalid = message_templates.invalid_placeholders(platform, message)
+    if not invalid:
+        return True
+    allowed = ", ".join(f"{{{name}}}" for name in message_templates.PLATFORM_PLACEHOLDERS[platform])
+    await interaction.response.send_message(
+        embed=discord.Embed(
+            title="❌ Message invalide",
+            description=f"Variables inconnues pour {platform} : {', '.join(f'`{{{name}}}`' for name in invalid)}\nVariables disponibles : {allowed}",
+            color=discord.Color.red()
+        ),
+        ephemeral=True
+    )
+    return False
+
+async def get_user_data(user_id):
     """Get user data or create if not exists"""
-    users = load_users()
-    user_id = str(user_id)
-    
-    if user_id not in users:
-        users[user_id] = {
-            "xp": 0,
-            "level": 1,
-            "balance": 0,
-            "daily_last": None
-        }
-        save_users(users)
-    
-    return users[user_id]
+    return await user_store.get_user(user_id)
 
-def update_user_data(user_id, data):
+async def update_user_data(user_id, data):
     """Update a specific user's data"""
-    users = load_users()
-    users[str(user_id)] = data
-    save_users(users)
+    await user_store.set_user(user_id, data)
 
 def calculate_level(xp):
     """Calculate level based on XP"""
@@ -198,35 +322,118 @@ def calculate_xp_for_level(level):
     """Calculate XP required for a specific level"""
     return (level - 1) * 100
 
-def add_xp(user_id, amount):
+async def add_xp(user_id, amount):
     """Add XP to a user and check for level up"""
-    user_data = get_user_data(user_id)
-    old_level = user_data["level"]
-    
-    user_data["xp"] += amount
-    new_level = calculate_level(user_data["xp"])
-    user_data["level"] = new_level
+    async with user_store.edit(user_id) as user_data:
+        old_level = user_data["level"]
+        
+        user_data["xp"] += amount
+        new_level = calculate_level(user_data["xp"])
+        user_data["level"] = new_level
     
-    update_user_data(user_id, user_data)
+    metrics.XP_WRITES.inc()
     
     return new_level > old_level
 
-@bot.event
-async def on_ready():
-    """Run when the bot is ready"""
-    logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
-    
-    # Start background tasks
-    check_twitch_streams.start()
-    check_youtube_videos.start()
-    check_tiktok_videos.start()
+def command_tree_fingerprint(tree):
+    """Hash the names, descriptions, options and permissions of every command in a tree"""
+    payload = [command.to_dict() for command in sorted(tree.get_commands(), key=lambda command: command.name)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_command_tree(client):
+    """Sync the global command tree only when it changed since the last sync of this application"""
+    fingerprint = command_tree_fingerprint(client.tree)
+    application_id = str(client.application_id)
+    synced_fingerprints = await command_sync_store.load()
+    
+    if synced_fingerprints.get(application_id) == fingerprint and not FORCE_COMMAND_SYNC:
+        logger.info("Command tree unchanged, skipping sync")
+        return
     
-    # Sync slash commands
     try:
-        synced = await bot.tree.sync()
+        synced = await client.tree.sync()
         logger.info(f"Synced {len(synced)} command(s)")
     except Exception as e:
         logger.error(f"Failed to sync commands: {e}")
+        return
+    
+    # Tenants sync concurrently: re-read under the lock so their fingerprints are merged, not overwritten
+    async with command_sync_lock:
+        synced_fingerprints = await command_sync_store.load()
+        synced_fingerprints[application_id] = fingerprint
+        await command_sync_store.save(synced_fingerprints)
+
+async def warm_http_pool():
+    """Open the shared session and fetch the Twitch token, so the first poll starts on a warm connection"""
+    try:
+        async with http_session() as session:
+            await get_twitch_headers(session)
+    except Exception as e:
+        logger.warning(f"Could not warm up the HTTP pool: {e}")
+
+@bot.event
+async def setup_hook():
+    """One-time startup of a tenant, run after login and before the gateway connects (not again on reconnects)"""
+    started = time.perf_counter()
+    tenant = tenants.current()
+    
+    # The shared engine (HTTP pool, pollers) is set up once, by the primary tenant
+    if tenant is not tenants.registry[0]:
+        await asyncio.gather(config_store.load(), user_store.load(), case_log.load(), sync_command_tree(tenant.bot))
+        logger.info(f"Startup tasks of tenant {tenant.name} done in {time.perf_counter() - started:.2f} s")
+        return
+    
+    # With EventSub / WebSub pushing events, polling only reconciles missed ones
+    if eventsub.enabled():
+        check_twitch_streams.change_interval(minutes=TWITCH_RECONCILE_MINUTES)
+    if websub.enabled():
+        check_youtube_videos.change_interval(minutes=YOUTUBE_RECONCILE_MINUTES)
+    elif websub.WEBSUB_CALLBACK_URL:
+        logger.error("WEBSUB_CALLBACK_URL is set without WEBSUB_SECRET: WebSub stays off and YouTube is polled")
+    
+    # Independent of each other: load state, sync commands and warm the HTTP pool concurrently
+    await asyncio.gather(
+        config_store.load(),
+        user_store.load(),
+        case_log.load(),
+        sync_command_tree(tenant.bot),
+        warm_http_pool()
+    )
+    
+    # Start background tasks (they wait for the cache to be ready before their first tick)
+    for name, loop in (("twitch", check_twitch_streams), ("youtube", check_youtube_videos), ("tiktok", check_tiktok_videos)):
+        telemetry.register_loop(name, loop.seconds + loop.minutes * 60 + loop.hours * 3600)
+        if not loop.is_running():
+            loop.start()
+    
+    logger.info(f"Startup tasks done in {time.perf_counter() - started:.2f} s")
+
+@bot.event
+async def on_ready():
+    """Run when a tenant's bot is ready (again after every reconnect that needed a new session)"""
+    tenant = tenants.current()
+    logger.info(f"Logged in as {tenant.bot.user} (ID: {tenant.bot.user.id}) for tenant {tenant.name}")
+    
+    # Gateway telemetry follows the primary connection
+    if tenant is not tenants.registry[0]:
+        return
+    telemetry.record_gateway_connected(bot.latency)
+    
+    if startup["ready_in"] is None and startup["started_at"] is not None:
+        startup["ready_in"] = time.perf_counter() - startup["started_at"]
+        logger.info(f"Ready {startup['ready_in']:.2f} s after start")
+
+@bot.event
+async def on_resumed():
+    """Run when the gateway session is resumed after a drop"""
+    if tenants.current() is tenants.registry[0]:
+        telemetry.record_gateway_connected(bot.latency)
+
+@bot.event
+async def on_disconnect():
+    """Run when the gateway connection is lost"""
+    if tenants.current() is tenants.registry[0]:
+        telemetry.record_gateway_disconnected()
 
 @bot.event
 async def on_message(message):
@@ -234,187 +441,434 @@ async def on_message(message):
     if message.author.bot:
         return
 
-    # Process commands first
-    await bot.process_commands(message)
+    with metrics.ON_MESSAGE_SECONDS.time():
+        # Process commands first
+        await tenants.current().bot.process_commands(message)
+        
+        # Then handle XP
+        user_id = str(message.author.id)
+        
+        # Give random XP between 5-15 for each message
+        xp_gain = random.randint(5, 15)
+        level_up = await add_xp(user_id, xp_gain)
+        
+        # Send level up message if applicable (low priority: shed during notification bursts)
+        if level_up:
+            user_data = await get_user_data(user_id)
+            delivery.post(
+                delivery.LOW,
+                message.channel,
+                content=f"🎉 Félicitations {message.author.mention} ! Tu as atteint le niveau {user_data['level']} !"
+            )
+
+@bot.event
+async def on_member_join(member: discord.Member):
+    """Add new members to the guild member ID lists"""
+    member_cache.member_ids.add(member.guild.id, member.id)
+
+@bot.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    """Drop members who left from the on-demand member cache"""
+    member_cache.members.invalidate(payload.guild_id, payload.user.id)
+    member_cache.member_ids.discard(payload.guild_id, payload.user.id)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    """Record the latency of successful slash commands"""
+    command_stats.record(interaction)
+
+# Creators are polled once per process; every tenant following one is notified
+async def load_subscriptions(platform):
+    """Return creator -> [(tenant, config_data)] for the creators a tenant notifies on a platform"""
+    subscriptions = {}
+    for tenant in tenants.registry:
+        config = await tenant.config_store.load()
+        for creator, config_data in config.get(platform, {}).items():
+            if config_data["enabled"] and config_data["channel_id"]:
+                subscriptions.setdefault(creator, []).append((tenant, config_data))
+    return subscriptions
+
+async def notify_subscribers(subscribers, send, creator, *args):
+    """Run a send_*_notification for each subscribed tenant, as that tenant, so one failing does not stop the others"""
+    for tenant, config_data in subscribers:
+        with tenant.active():
+            try:
+                await send(creator, config_data, *args)
+            except Exception as e:
+                logger.error(f"Failed to notify tenant {tenant.name} about {creator}: {str(e)}")
+
+# Twitch helpers shared by polling and EventSub
+async def get_twitch_headers(session):
+    """Return Helix request headers with a cached app access token, or None without credentials"""
+    twitch_api_client_id = os.getenv("TWITCH_CLIENT_ID")
+    twitch_api_client_secret = os.getenv("TWITCH_CLIENT_SECRET")
+    
+    if not twitch_api_client_id or not twitch_api_client_secret:
+        logger.warning("Twitch API credentials not found in environment variables")
+        return None
+    
+    if not twitch_auth["token"] or twitch_auth["expires_at"] < time.time() + 60:
+        async with session.post(
+            f'{TWITCH_AUTH_BASE}/oauth2/token',
+            params={
+                'client_id': twitch_api_client_id,
+                'client_secret': twitch_api_client_secret,
+                'grant_type': 'client_credentials'
+            }
+        ) as resp:
+            if resp.status != 200:
+                raise breaker.HTTPStatusError(f"Failed to get Twitch OAuth token: {resp.status}", resp.status, breaker.retry_after(resp.headers))
+            
+            token_data = await resp.json()
+            twitch_auth["token"] = token_data['access_token']
+            twitch_auth["expires_at"] = time.time() + token_data.get('expires_in', 3600)
+    
+    return {
+        'Client-ID': twitch_api_client_id,
+        'Authorization': f'Bearer {twitch_auth["token"]}'
+    }
+
+async def get_twitch_user(session, headers, streamer_name):
+    """Return a streamer's Helix user object (cached, IDs never change), or None if unknown"""
+    if streamer_name in twitch_users:
+        return twitch_users[streamer_name]
+    
+    async with session.get(
+        f'{TWITCH_API_BASE}/helix/users?login={streamer_name}',
+        headers=headers
+    ) as resp:
+        if resp.status == 401:
+            twitch_auth["token"] = None
+        if resp.status != 200:
+            raise breaker.HTTPStatusError(f"Failed to get Twitch user data for {streamer_name}: {resp.status}", resp.status, breaker.retry_after(resp.headers))
+        
+        user_data = await resp.json()
+    
+    if not user_data['data']:
+        return None
+    twitch_users[streamer_name] = user_data['data'][0]
+    return twitch_users[streamer_name]
+
+async def send_twitch_notification(streamer_name, config_data, stream_info, twitch_user):
+    """Announce that a streamer went live in their configured channel"""
+    game_name = stream_info.get('game_name') or 'Unknown Game'
+    stream_title = stream_info.get('title') or 'No Title'
+    stream_url = f"https://twitch.tv/{streamer_name}"
+    
+    channel = tenants.current().bot.get_channel(int(config_data["channel_id"]))
+    if not channel:
+        return
+    
+    template = get_message_template("twitch", streamer_name, config_data)
+    message, full_message = template.render_notification(
+        config_data.get("ping", ""), user=streamer_name, game=game_name, title=stream_title, link=stream_url
+    )
+    
+    embed = discord.Embed(title=f"{streamer_name} est en live !", description=stream_title, color=0x6441a5)
+    embed.add_field(name="Jeu", value=game_name, inline=True)
+    embed.add_field(name="Lien", value=f"[Regarder sur Twitch]({stream_url})", inline=True)
+    embed.set_thumbnail(url=twitch_user.get('profile_image_url', ''))
+    
+    with metrics.NOTIFICATION_SEND_SECONDS.time(platform="twitch"):
+        await delivery.send(delivery.LIVE, channel, content=full_message, embed=embed)
+    logger.info(f"Sent Twitch notification for {streamer_name}")
+
+async def handle_eventsub_event(subscription_type, event):
+    """Apply a stream.online / stream.offline notification pushed by Twitch"""
+    subscriptions = await load_subscriptions("twitch")
+    login = event.get("broadcaster_user_login", "").lower()
+    streamer_name = next((name for name in subscriptions if name.lower() == login), None)
+    if streamer_name is None:
+        return
     
-    # Then handle XP
-    user_id = str(message.author.id)
+    if subscription_type == "stream.offline":
+        twitch_cache[streamer_name] = False
+        return
     
-    # Give random XP between 5-15 for each message
-    xp_gain = random.randint(5, 15)
-    level_up = add_xp(user_id, xp_gain)
+    if subscription_type != "stream.online" or event.get("type", "live") != "live":
+        return
+    if twitch_cache.get(streamer_name):
+        return
     
-    # Send level up message if applicable
-    if level_up:
-        user_data = get_user_data(user_id)
-        await message.channel.send(f"🎉 Félicitations {message.author.mention} ! Tu as atteint le niveau {user_data['level']} !")
+    # Mark before any await so a concurrent poll does not announce it again; cleared if the
+    # announcement is not made, so the reconciliation poll still sends it
+    twitch_cache[streamer_name] = True
+    announced = False
+    try:
+        async with http_session() as session:
+            headers = await get_twitch_headers(session)
+            if headers is None:
+                return
+            twitch_user = await get_twitch_user(session, headers, streamer_name) or {}
+        
+            # The stream may not be listed yet right after going live; the channel carries title and game
+            async with session.get(
+                f'{TWITCH_API_BASE}/helix/channels?broadcaster_id={event["broadcaster_user_id"]}',
+                headers=headers
+            ) as resp:
+                stream_info = {}
+                if resp.status == 200:
+                    channel_data = await resp.json()
+                    if channel_data['data']:
+                        stream_info = channel_data['data'][0]
+                else:
+                    logger.error(f"Failed to get Twitch channel data for {streamer_name}: {resp.status}")
+    
+        await notify_subscribers(subscriptions[streamer_name], send_twitch_notification, streamer_name, stream_info, twitch_user)
+        announced = True
+    finally:
+        if not announced:
+            twitch_cache[streamer_name] = False
 
 # Notification system tasks
 @tasks.loop(minutes=5)
+@telemetry.tracked_loop("twitch")
 async def check_twitch_streams():
-    """Check for new Twitch streams"""
+    """Check for new Twitch streams (a slow reconciliation pass when EventSub is enabled)"""
     global twitch_cache
-    config = load_config()
+    tick = telemetry.current_tick()
     
-    if "twitch" not in config:
-        return
-    
-    twitch_config = config["twitch"]
+    # Each streamer is checked once, however many tenants follow them
+    subscriptions = await load_subscriptions("twitch")
     
     # Skip if no enabled streamers or no channels configured
-    if not any(streamer["enabled"] and streamer["channel_id"] for streamer in twitch_config.values()):
+    if not subscriptions:
         return
-
-    twitch_api_client_id = os.getenv("TWITCH_CLIENT_ID")
-    twitch_api_client_secret = os.getenv("TWITCH_CLIENT_SECRET")
     
-    if not twitch_api_client_id or not twitch_api_client_secret:
-        logger.warning("Twitch API credentials not found in environment variables")
+    # Nothing is requested while Twitch is failing
+    host = breaker.for_host("api.twitch.tv")
+    if not host.allow():
         return
     
     try:
-        # Get OAuth token
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                'https://id.twitch.tv/oauth2/token',
-                params={
-                    'client_id': twitch_api_client_id,
-                    'client_secret': twitch_api_client_secret,
-                    'grant_type': 'client_credentials'
-                }
-            ) as resp:
-                if resp.status != 200:
-                    logger.error(f"Failed to get Twitch OAuth token: {resp.status}")
-                    return
-                
-                token_data = await resp.json()
-                access_token = token_data['access_token']
+        async with http_session() as session:
+            headers = await get_twitch_headers(session)
+            if headers is None:
+                # Nothing could be checked: not a healthy tick
+                tick.errors += 1
+                return
+            
+            # Streamers confirmed not to exist this pass
+            missing = set()
+            # Cleared when a creator is skipped or fails, or the host breaker stops the pass
+            complete = True
+            host_opened = False
             
             # Check each streamer
-            for streamer_name, config_data in twitch_config.items():
-                if not config_data["enabled"] or not config_data["channel_id"]:
+            for streamer_name, subscribers in subscriptions.items():
+                creator = breaker.for_creator("twitch", streamer_name)
+                if not creator.allow():
+                    if creator.quarantined:
+                        missing.add(streamer_name)
+                    else:
+                        complete = False
                     continue
                 
-                headers = {
-                    'Client-ID': twitch_api_client_id,
-                    'Authorization': f'Bearer {access_token}'
-                }
+                tick.items_checked += 1
                 
                 # Get user info
-                async with session.get(
-                    f'https://api.twitch.tv/helix/users?login={streamer_name}',
-                    headers=headers
-                ) as resp:
-                    if resp.status != 200:
-                        logger.error(f"Failed to get Twitch user data for {streamer_name}: {resp.status}")
-                        continue
-                    
-                    user_data = await resp.json()
-                    if not user_data['data']:
-                        logger.warning(f"No Twitch user found for {streamer_name}")
-                        continue
-                    
-                    user_id = user_data['data'][0]['id']
+                try:
+                    twitch_user = await get_twitch_user(session, headers, streamer_name)
+                except breaker.HTTPStatusError as e:
+                    logger.error(str(e))
+                    tick.errors += 1
+                    complete = False
+                    if breaker.record_status(host, creator, e.status, e.retry_after):
+                        host_opened = True
+                        break
+                    continue
+                
+                if twitch_user is None:
+                    logger.warning(f"No Twitch user found for {streamer_name}")
+                    creator.missing("Utilisateur introuvable")
+                    missing.add(streamer_name)
+                    continue
+                
+                user_id = twitch_user['id']
                 
                 # Check if streaming
                 async with session.get(
-                    f'https://api.twitch.tv/helix/streams?user_id={user_id}',
+                    f'{TWITCH_API_BASE}/helix/streams?user_id={user_id}',
                     headers=headers
                 ) as resp:
                     if resp.status != 200:
                         logger.error(f"Failed to get Twitch stream data for {streamer_name}: {resp.status}")
+                        tick.errors += 1
+                        complete = False
+                        if breaker.record_status(host, creator, resp.status, breaker.retry_after(resp.headers)):
+                            host_opened = True
+                            break
                         continue
                     
                     stream_data = await resp.json()
                     is_live = bool(stream_data['data'])
-                    
-                    # Skip if not live or already notified
-                    if not is_live or (streamer_name in twitch_cache and twitch_cache[streamer_name]):
-                        twitch_cache[streamer_name] = is_live
-                        continue
-                    
-                    # If newly live, send notification
-                    if is_live and (streamer_name not in twitch_cache or not twitch_cache[streamer_name]):
-                        twitch_cache[streamer_name] = True
-                        
-                        stream_info = stream_data['data'][0]
-                        game_name = stream_info.get('game_name', 'Unknown Game')
-                        stream_title = stream_info.get('title', 'No Title')
-                        stream_url = f"https://twitch.tv/{streamer_name}"
-                        
-                        message = config_data["message"].replace("{user}", streamer_name).replace("{game}", game_name).replace("{link}", stream_url)
-                        
-                        channel = bot.get_channel(int(config_data["channel_id"]))
-                        if channel:
-                            ping = config_data.get("ping", "")
-                            full_message = f"{ping} {message}" if ping else message
-                            
-                            embed = discord.Embed(title=f"{streamer_name} est en live !", description=stream_title, color=0x6441a5)
-                            embed.add_field(name="Jeu", value=game_name, inline=True)
-                            embed.add_field(name="Lien", value=f"[Regarder sur Twitch]({stream_url})", inline=True)
-                            embed.set_thumbnail(url=user_data['data'][0].get('profile_image_url', ''))
-                            
-                            await channel.send(content=full_message, embed=embed)
-                            logger.info(f"Sent Twitch notification for {streamer_name}")
-    
+                
+                host.success()
+                creator.success()
+                
+                # Skip if not live or already notified
+                if not is_live or (streamer_name in twitch_cache and twitch_cache[streamer_name]):
+                    twitch_cache[streamer_name] = is_live
+                    continue
+                
+                # If newly live (and missed by EventSub), send notification
+                twitch_cache[streamer_name] = True
+                await notify_subscribers(subscribers, send_twitch_notification, streamer_name, stream_data['data'][0], twitch_user)
+            
+            # Keep the push subscriptions in line with the configuration: every configured streamer whose
+            # ID is known, polled this pass or not. Nothing is synced once the host breaker opened, and
+            # deletions need a complete pass in which every streamer was resolved
+            if eventsub.enabled() and not host_opened:
+                broadcaster_ids = [twitch_users[name]['id'] for name in subscriptions if name in twitch_users]
+                resolved = all(name in twitch_users or name in missing for name in subscriptions)
+                await eventsub.sync_subscriptions(session, headers, broadcaster_ids, prune=complete and resolved)
+    
+    except breaker.HTTPStatusError as e:
+        logger.error(str(e))
+        tick.errors += 1
+        host.failure(str(e), e.retry_after)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error in Twitch stream check: {str(e)}")
+        tick.errors += 1
+        host.failure(str(e) or type(e).__name__)
     except Exception as e:
         logger.error(f"Error in Twitch stream check: {str(e)}")
+        tick.errors += 1
+
+# YouTube helpers shared by polling and WebSub
+async def get_youtube_channel_id(session, channel_name, youtube_api_key):
+    """Resolve a configured channel name to its channel ID (cached; IDs are used as is)"""
+    if YOUTUBE_CHANNEL_ID.match(channel_name):
+        return channel_name
+    if channel_name in youtube_channel_ids:
+        return youtube_channel_ids[channel_name]
+    
+    async with session.get(
+        f'{YOUTUBE_API_BASE}/youtube/v3/search',
+        params={
+            'part': 'snippet',
+            'q': channel_name,
+            'type': 'channel',
+            'key': youtube_api_key
+        }
+    ) as resp:
+        if resp.status != 200:
+            raise breaker.HTTPStatusError(f"Failed to get YouTube channel ID for {channel_name}: {resp.status}", resp.status, breaker.retry_after(resp.headers))
+        
+        search_data = await resp.json()
+    
+    if not search_data.get('items'):
+        return None
+    youtube_channel_ids[channel_name] = search_data['items'][0]['id']['channelId']
+    return youtube_channel_ids[channel_name]
+
+async def send_youtube_notification(channel_name, config_data, video_id, video_title, thumbnail_url):
+    """Announce a new video in the creator's configured channel"""
+    video_url = f"https://www.youtube.com/watch?v={video_id}"
+    
+    discord_channel = tenants.current().bot.get_channel(int(config_data["channel_id"]))
+    if not discord_channel:
+        return
+    
+    template = get_message_template("youtube", channel_name, config_data)
+    message, full_message = template.render_notification(
+        config_data.get("ping", ""), user=channel_name, title=video_title, link=video_url
+    )
+    
+    embed = discord.Embed(title=video_title, description=message, color=0xFF0000)
+    embed.set_image(url=thumbnail_url)
+    
+    with metrics.NOTIFICATION_SEND_SECONDS.time(platform="youtube"):
+        await delivery.send(delivery.UPLOAD, discord_channel, content=full_message, embed=embed)
+    logger.info(f"Sent YouTube notification for {channel_name}")
+
+async def handle_websub_entry(entry):
+    """Announce an upload pushed by the WebSub hub"""
+    subscriptions = await load_subscriptions("youtube")
+    channel_name = next(
+        (name for name in subscriptions
+         if name == entry["channel_id"] or youtube_channel_ids.get(name) == entry["channel_id"]),
+        None
+    )
+    if channel_name is None:
+        return
+    
+    if not youtube_cache.mark(channel_name, entry["video_id"]):
+        return
+    
+    # Push feeds carry no thumbnail; this one exists for every public video, at no quota cost
+    thumbnail_url = f"https://i.ytimg.com/vi/{entry['video_id']}/hqdefault.jpg"
+    await notify_subscribers(subscriptions[channel_name], send_youtube_notification, channel_name, entry["video_id"], entry["title"], thumbnail_url)
 
 @tasks.loop(minutes=15)
+@telemetry.tracked_loop("youtube")
 async def check_youtube_videos():
-    """Check for new YouTube videos"""
+    """Check for new YouTube videos (a slow reconciliation pass when WebSub is enabled)"""
     global youtube_cache
-    config = load_config()
-    
-    if "youtube" not in config:
-        return
+    tick = telemetry.current_tick()
     
-    youtube_config = config["youtube"]
+    # Each channel is checked once (one quota spend), however many tenants follow it
+    subscriptions = await load_subscriptions("youtube")
     
     # Skip if no enabled channels or no Discord channels configured
-    if not any(channel["enabled"] and channel["channel_id"] for channel in youtube_config.values()):
+    if not subscriptions:
         return
 
     youtube_api_key = os.getenv("YOUTUBE_API_KEY")
     
     if not youtube_api_key:
         logger.warning("YouTube API key not found in environment variables")
+        tick.errors += 1
+        return
+    
+    # Nothing is requested (and no quota spent) while the API is failing
+    host = breaker.for_host("www.googleapis.com")
+    if not host.allow():
         return
     
     try:
-        async with aiohttp.ClientSession() as session:
-            for channel_name, config_data in youtube_config.items():
-                if not config_data["enabled"] or not config_data["channel_id"]:
+        async with http_session() as session:
+            # Channels confirmed not to exist this pass
+            missing = set()
+            # Cleared when a creator is skipped or fails, or the host breaker stops the pass
+            complete = True
+            host_opened = False
+            
+            for channel_name, subscribers in subscriptions.items():
+                creator = breaker.for_creator("youtube", channel_name)
+                if not creator.allow():
+                    if creator.quarantined:
+                        missing.add(channel_name)
+                    else:
+                        complete = False
                     continue
                 
+                tick.items_checked += 1
                 # First, get the channel ID from username
-                async with session.get(
-                    f'https://www.googleapis.com/youtube/v3/search',
-                    params={
-                        'part': 'snippet',
-                        'q': channel_name,
-                        'type': 'channel',
-                        'key': youtube_api_key
-                    }
-                ) as resp:
-                    if resp.status != 200:
-                        logger.error(f"Failed to get YouTube channel ID for {channel_name}: {resp.status}")
-                        continue
-                    
-                    search_data = await resp.json()
-                    if not search_data.get('items'):
-                        logger.warning(f"No YouTube channel found for {channel_name}")
-                        continue
-                    
-                    channel_id = search_data['items'][0]['id']['channelId']
+                try:
+                    channel_id = await get_youtube_channel_id(session, channel_name, youtube_api_key)
+                except breaker.HTTPStatusError as e:
+                    logger.error(str(e))
+                    tick.errors += 1
+                    complete = False
+                    if breaker.record_status(host, creator, e.status, e.retry_after):
+                        host_opened = True
+                        break
+                    continue
                 
-                # Now get the latest videos
+                if channel_id is None:
+                    logger.warning(f"No YouTube channel found for {channel_name}")
+                    creator.missing("Chaîne introuvable")
+                    missing.add(channel_name)
+                    continue
+                
+                # Now get the latest videos (several, so none posted between two polls is missed)
                 async with session.get(
-                    f'https://www.googleapis.com/youtube/v3/search',
+                    f'{YOUTUBE_API_BASE}/youtube/v3/search',
                     params={
                         'part': 'snippet',
                         'channelId': channel_id,
-                        'maxResults': 1,
+                        'maxResults': seen.POLL_ITEMS,
                         'order': 'date',
                         'type': 'video',
                         'key': youtube_api_key
@@ -422,119 +876,178 @@ async def check_youtube_videos():
                 ) as resp:
                     if resp.status != 200:
                         logger.error(f"Failed to get YouTube videos for {channel_name}: {resp.status}")
+                        tick.errors += 1
+                        complete = False
+                        if breaker.record_status(host, creator, resp.status, breaker.retry_after(resp.headers)):
+                            host_opened = True
+                            break
                         continue
                     
                     videos_data = await resp.json()
-                    if not videos_data.get('items'):
-                        logger.warning(f"No YouTube videos found for {channel_name}")
-                        continue
-                    
-                    latest_video = videos_data['items'][0]
-                    video_id = latest_video['id']['videoId']
-                    
-                    # Check if this is a new video (not in cache)
-                    if channel_name in youtube_cache and youtube_cache[channel_name] == video_id:
-                        continue
-                    
-                    # Update cache and send notification
-                    youtube_cache[channel_name] = video_id
-                    
-                    video_title = latest_video['snippet']['title']
-                    video_url = f"https://www.youtube.com/watch?v={video_id}"
-                    thumbnail_url = latest_video['snippet'].get('thumbnails', {}).get('high', {}).get('url', '')
-                    
-                    message = config_data["message"].replace("{user}", channel_name).replace("{link}", video_url)
-                    
-                    discord_channel = bot.get_channel(int(config_data["channel_id"]))
-                    if discord_channel:
-                        ping = config_data.get("ping", "")
-                        full_message = f"{ping} {message}" if ping else message
-                        
-                        embed = discord.Embed(title=video_title, description=message, color=0xFF0000)
-                        embed.set_image(url=thumbnail_url)
-                        
-                        await discord_channel.send(content=full_message, embed=embed)
-                        logger.info(f"Sent YouTube notification for {channel_name}")
+                
+                host.success()
+                if not videos_data.get('items'):
+                    logger.warning(f"No YouTube videos found for {channel_name}")
+                    creator.missing("Aucune vidéo trouvée")
+                    continue
+                creator.success()
+                
+                # Oldest first, so new videos are announced in the order they were published
+                videos = {
+                    video['id']['videoId']: video
+                    for video in sorted(videos_data['items'], key=lambda video: video['snippet'].get('publishedAt', ''))
+                }
+                
+                for video_id in youtube_cache.unseen(channel_name, list(videos)):
+                    snippet = videos[video_id]['snippet']
+                    thumbnail_url = snippet.get('thumbnails', {}).get('high', {}).get('url', '')
+                    await notify_subscribers(subscribers, send_youtube_notification, channel_name, video_id, snippet['title'], thumbnail_url)
+            
+            # Keep the hub leases alive for every configured channel whose ID is known, polled this pass
+            # or not. Nothing is renewed once the host breaker opened, and leases are dropped only after
+            # a complete pass in which every channel was resolved
+            if websub.enabled() and not host_opened:
+                known = {
+                    name: name if YOUTUBE_CHANNEL_ID.match(name) else youtube_channel_ids.get(name)
+                    for name in subscriptions
+                }
+                channel_ids = [channel_id for channel_id in known.values() if channel_id]
+                resolved = all(channel_id or name in missing for name, channel_id in known.items())
+                await websub.renew_leases(session, channel_ids, prune=complete and resolved)
     
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error in YouTube video check: {str(e)}")
+        tick.errors += 1
+        host.failure(str(e) or type(e).__name__)
     except Exception as e:
         logger.error(f"Error in YouTube video check: {str(e)}")
+        tick.errors += 1
+
+async def send_tiktok_notification(creator_name, config_data, video_url):
+    """Announce a new TikTok in the creator's configured channel"""
+    channel = tenants.current().bot.get_channel(int(config_data["channel_id"]))
+    if not channel:
+        return
+    
+    template = get_message_template("tiktok", creator_name, config_data)
+    message, full_message = template.render_notification(
+        config_data.get("ping", ""), user=creator_name, link=video_url
+    )
+    
+    embed = discord.Embed(
+        title=f"Nouveau TikTok de {creator_name}",
+        description=message,
+        color=0x00f2ea
+    )
+    embed.add_field(name="Lien", value=f"[Voir sur TikTok]({video_url})", inline=False)
+    
+    with metrics.NOTIFICATION_SEND_SECONDS.time(platform="tiktok"):
+        await delivery.send(delivery.UPLOAD, channel, content=full_message, embed=embed)
+    logger.info(f"Sent TikTok notification for {creator_name}")
+
+def tiktok_video_ids(html_content, creator_name):
+    """IDs of the videos listed on a creator's TikTok profile page"""
+    video_ids = []
+    for match in TIKTOK_STATE.finditer(html_content):
+        try:
+            state = json.loads(match.group(1))
+        except ValueError:
+            continue
+        # Video items only: keyed by ID in ItemModule, listed under ItemList's user posts
+        video_ids.extend((state.get("ItemModule") or {}).keys())
+        posts = ((state.get("ItemList") or {}).get("user-post") or {}).get("list") or []
+        video_ids.extend(post["id"] if isinstance(post, dict) else post for post in posts)
+    if not video_ids:
+        # Server-rendered profile: links to the creator's own videos
+        video_ids = re.findall(rf'/@{re.escape(creator_name)}/video/(\d+)', html_content, re.I)
+    return [str(video_id) for video_id in video_ids if str(video_id).isdigit()]
 
 @tasks.loop(minutes=10)
+@telemetry.tracked_loop("tiktok")
 async def check_tiktok_videos():
     """Check for new TikTok videos"""
     global tiktok_cache
-    config = load_config()
+    tick = telemetry.current_tick()
     
-    if "tiktok" not in config:
-        return
-    
-    tiktok_config = config["tiktok"]
+    # Each creator is fetched once, however many tenants follow them
+    subscriptions = await load_subscriptions("tiktok")
     
     # Skip if no enabled creators or no channels configured
-    if not any(creator["enabled"] and creator["channel_id"] for creator in tiktok_config.values()):
+    if not subscriptions:
         return
 
+    # Nothing is requested while TikTok is blocking or rate limiting us
+    host = breaker.for_host("www.tiktok.com")
+    if not host.allow():
+        return
+    
     # TikTok doesn't have an official API, we'll use a public API to scrape the data
     # In a production environment, it's better to use a reliable TikTok API service
     try:
-        async with aiohttp.ClientSession() as session:
-            for creator_name, config_data in tiktok_config.items():
-                if not config_data["enabled"] or not config_data["channel_id"]:
+        async with http_session() as session:
+            for creator_name, subscribers in subscriptions.items():
+                creator = breaker.for_creator("tiktok", creator_name)
+                if not creator.allow():
                     continue
                 
+                tick.items_checked += 1
                 # Using a public API to get TikTok user data
                 async with session.get(
-                    f'https://www.tiktok.com/@{creator_name}?lang=en'
+                    f'{TIKTOK_BASE}/@{creator_name}?lang=en'
                 ) as resp:
                     if resp.status != 200:
                         logger.error(f"Failed to get TikTok data for {creator_name}: {resp.status}")
+                        tick.errors += 1
+                        if breaker.record_status(host, creator, resp.status, breaker.retry_after(resp.headers)):
+                            break
                         continue
                     
                     html_content = await resp.text()
+                    host.success()
                     
                     # Very basic scraping - in production, use a proper API
                     # This is just a placeholder for the demonstration
                     try:
-                        import re
-                        video_ids = re.findall(r'"id":"(\d+)"', html_content)
+                        video_ids = tiktok_video_ids(html_content, creator_name)
                         
                         if not video_ids:
                             logger.warning(f"No TikTok video IDs found for {creator_name}")
+                            creator.missing("Aucune vidéo trouvée")
                             continue
                         
-                        latest_video_id = video_ids[0]
-                        
-                        # Check if this is a new video
-                        if creator_name in tiktok_cache and tiktok_cache[creator_name] == latest_video_id:
-                            continue
-                        
-                        # Update cache and send notification
-                        tiktok_cache[creator_name] = latest_video_id
+                        creator.success()
                         
-                        video_url = f"https://www.tiktok.com/@{creator_name}/video/{latest_video_id}"
+                        # Pinned videos come first on the profile; IDs grow with time, so sort to get the latest, oldest first
+                        latest_video_ids = sorted(set(video_ids), key=int)[-seen.POLL_ITEMS:]
                         
-                        message = config_data["message"].replace("{user}", creator_name).replace("{link}", video_url)
-                        
-                        channel = bot.get_channel(int(config_data["channel_id"]))
-                        if channel:
-                            ping = config_data.get("ping", "")
-                            full_message = f"{ping} {message}" if ping else message
-                            
-                            embed = discord.Embed(
-                                title=f"Nouveau TikTok de {creator_name}",
-                                description=message,
-                                color=0x00f2ea
-                            )
-                            embed.add_field(name="Lien", value=f"[Voir sur TikTok]({video_url})", inline=False)
-                            
-                            await channel.send(content=full_message, embed=embed)
-                            logger.info(f"Sent TikTok notification for {creator_name}")
+                        for video_id in tiktok_cache.unseen(creator_name, latest_video_ids):
+                            video_url = f"https://www.tiktok.com/@{creator_name}/video/{video_id}"
+                            await notify_subscribers(subscribers, send_tiktok_notification, creator_name, video_url)
                     
                     except Exception as e:
                         logger.error(f"Error parsing TikTok data for {creator_name}: {str(e)}")
+                        tick.errors += 1
     
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error(f"Error in TikTok video check: {str(e)}")
+        tick.errors += 1
+        host.failure(str(e) or type(e).__name__)
     except Exception as e:
         logger.error(f"Error in TikTok video check: {str(e)}")
+        tick.errors += 1
+
+@check_twitch_streams.before_loop
+@check_youtube_videos.before_loop
+@check_tiktok_videos.before_loop
+async def wait_until_cached():
+    """Hold the first poll until every tenant's guild cache is filled, so notification channels resolve"""
+    # A tenant that cannot connect must not hold up the others' notifications forever
+    waiters = [asyncio.create_task(tenant.bot.wait_until_ready()) for tenant in tenants.registry]
+    done, pending = await asyncio.wait(waiters, timeout=TENANT_READY_TIMEOUT)
+    for waiter in pending:
+        waiter.cancel()
+    if pending:
+        logger.warning(f"{len(pending)} tenant(s) not ready after {TENANT_READY_TIMEOUT} s, polling anyway")
 
 # Slash commands
 @bot.tree.command(name="config", description="Configure les notifications pour différentes plateformes")
@@ -553,41 +1066,44 @@ async def config_command(interaction: discord.Interaction, platform: str):
         await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
         return
     
-    config = load_config()
+    config = await config_store.load()
+    config.setdefault(platform, {})
     
-    if platform not in config:
-        config[platform] = {}
-        save_config(config)
-    
-    # Create embed for platform configuration
-    embed = discord.Embed(
-        title=f"Configuration de {platform.capitalize()}",
-        description=f"Gérez les créateurs {platform} et leurs notifications",
-        color=get_platform_color(platform)
-    )
-    
-    emoji = get_platform_emoji(platform)
-    
-    if config[platform]:
-        creators_list = "\n".join([f"• **{creator}** ({'✅ Activé' if settings['enabled'] else '❌ Désactivé'})" 
-                                  for creator, settings in config[platform].items()])
-        embed.add_field(
-            name=f"{emoji} Créateurs configurés",
-            value=creators_list or "Aucun créateur configuré",
-            inline=False
+    async def render():
+        """Build the platform panel"""
+        # Create embed for platform configuration
+        embed = discord.Embed(
+            title=f"Configuration de {platform.capitalize()}",
+            description=f"Gérez les créateurs {platform} et leurs notifications",
+            color=get_platform_color(platform)
         )
-    else:
+        
+        emoji = get_platform_emoji(platform)
+        
+        if config[platform]:
+            creators_list = "\n".join([f"• **{creator}** ({'✅ Activé' if settings['enabled'] else '❌ Désactivé'}){format_breaker_badge(platform, creator)}" 
+                                      for creator, settings in config[platform].items()])
+            embed.add_field(
+                name=f"{emoji} Créateurs configurés",
+                value=creators_list or "Aucun créateur configuré",
+                inline=False
+            )
+        else:
+            embed.add_field(
+                name=f"{emoji} Créateurs configurés",
+                value="Aucun créateur configuré pour cette plateforme.",
+                inline=False
+            )
+        
         embed.add_field(
-            name=f"{emoji} Créateurs configurés",
-            value="Aucun créateur configuré pour cette plateforme.",
+            name="🔧 Options",
+            value="Utilisez les boutons ci-dessous pour gérer les créateurs et leurs notifications.",
             inline=False
         )
+        return embed
     
-    embed.add_field(
-        name="🔧 Options",
-        value="Utilisez les boutons ci-dessous pour gérer les créateurs et leurs notifications.",
-        inline=False
-    )
+    # The panel only changes when the configuration is saved or a breaker changes state
+    embed = await renders.embed(("config", tenants.current().name, platform), (config_store.version, breaker.version), render)
     
     # Create buttons for creator management
     class ConfigView(discord.ui.View):
@@ -675,9 +1191,10 @@ async def config_command(interaction: discord.Interaction, platform: str):
         
         async def on_submit(self, interaction: discord.Interaction):
             creator = self.creator_name.value.strip()
+            session = await config_edits.EditSession.open(config_store, self.platform, creator)
             
             # Check if creator already exists
-            if creator in config[self.platform]:
+            if session.draft is not None:
                 await interaction.response.send_message(
                     embed=discord.Embed(
                         title="❌ Créateur existant",
@@ -688,14 +1205,26 @@ async def config_command(interaction: discord.Interaction, platform: str):
                 )
                 return
             
-            # Add creator to config
-            config[self.platform][creator] = {
+            if not await check_message_placeholders(interaction, self.platform, self.custom_message.value):
+                return
+            
+            # Add creator to config (another admin may have added it since the check)
+            session.draft = {
                 "enabled": True,
                 "message": self.custom_message.value,
                 "channel_id": None,
                 "ping": ""
             }
-            save_config(config)
+            if await session.commit():
+                await interaction.response.send_message(
+                    embed=discord.Embed(
+                        title="❌ Créateur existant",
+                        description=f"Le créateur **{creator}** vient d'être ajouté pour {self.platform} par un autre administrateur.",
+                        color=discord.Color.red()
+                    ),
+                    ephemeral=True
+                )
+                return
             
             success_embed = discord.Embed(
                 title="✅ Créateur ajouté avec succès",
@@ -719,15 +1248,37 @@ async def config_command(interaction: discord.Interaction, platform: str):
         ephemeral=True
     )
 
-async def show_creator_config(interaction: discord.Interaction, platform: str, creator: str):
-    """Show the configuration options for a specific creator"""
-    config = load_config()
-    creator_config = config[platform][creator]
+# Names of the creator settings, as shown in the edit panels
+SETTING_LABELS = {
+    "enabled": "Statut",
+    "message": "Message",
+    "channel_id": "Salon",
+    "ping": "Ping",
+    config_edits.EXISTS: "Créateur ajouté entre-temps",
+    config_edits.DELETED: "Créateur supprimé entre-temps"
+}
+
+async def show_creator_config(interaction: discord.Interaction, platform: str, creator: str, session=None, notice=None):
+    """Show the configuration panel of a creator; its buttons edit a draft, written once with "Enregistrer" """
+    if session is None:
+        session = await config_edits.EditSession.open(config_store, platform, creator)
+    creator_config = session.draft
+    
+    if creator_config is None:
+        await interaction.response.edit_message(
+            embed=discord.Embed(
+                title="❌ Créateur introuvable",
+                description=f"Le créateur **{creator}** n'existe plus pour {platform}. Utilisez `/config {platform}` pour revenir à la liste.",
+                color=discord.Color.red()
+            ),
+            view=None
+        )
+        return
     
     # Create a detailed embed with platform-specific styling
     embed = discord.Embed(
         title=f"Configuration de {creator}",
-        description=f"Personnalisez les notifications pour ce créateur {platform}",
+        description=notice or f"Personnalisez les notifications pour ce créateur {platform}",
         color=get_platform_color(platform)
     )
     
@@ -755,6 +1306,13 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
         inline=True
     )
     
+    # Circuit breaker state of the creator's checks
+    embed.add_field(
+        name="🩺 Santé",
+        value=format_breaker_status(breaker.peek_creator(platform, creator)),
+        inline=False
+    )
+    
     # Message preview with formatting
     placeholder_message = creator_config["message"]
     
@@ -771,9 +1329,7 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
         example_values["title"] = "Ma nouvelle vidéo incroyable"
     
     # Replace placeholders with example values for preview
-    preview_message = placeholder_message
-    for key, value in example_values.items():
-        preview_message = preview_message.replace(f"{{{key}}}", value)
+    preview_message = message_templates.MessageTemplate(placeholder_message).render(**example_values)
     
     embed.add_field(
         name="💬 Format du message", 
@@ -787,9 +1343,31 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
         inline=False
     )
     
+    # Nothing is written until the draft is saved
+    if config_edits.DELETED in session.conflicts:
+        embed.add_field(
+            name="⚠️ Conflit",
+            value=f"Un autre administrateur a supprimé **{creator}** entre-temps : vos modifications ne peuvent pas être enregistrées.\n"
+                  f"« Recharger » confirme la suppression ; ajoutez-le de nouveau avec `/config {platform}` si besoin.",
+            inline=False
+        )
+    elif session.conflicts:
+        embed.add_field(
+            name="⚠️ Conflit",
+            value="Un autre administrateur a modifié : " + ", ".join(SETTING_LABELS.get(setting, setting) for setting in session.conflicts)
+                  + ".\n« Écraser » enregistre vos valeurs, « Recharger » reprend les siennes.",
+            inline=False
+        )
+    elif session.dirty:
+        embed.add_field(
+            name="✏️ Modifications non enregistrées",
+            value=", ".join(SETTING_LABELS.get(setting, setting) for setting in session.changes()),
+            inline=False
+        )
+    
     # Add footer with platform emoji
     embed.set_footer(
-        text=f"Créateur {platform} • Cliquez sur les boutons ci-dessous pour modifier",
+        text=f"Créateur {platform} • Modifiez puis cliquez sur Enregistrer",
         icon_url="https://cdn.discordapp.com/emojis/1012074883568758835.png?v=1" # Discord logo
     )
     
@@ -807,31 +1385,13 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
         
         @discord.ui.button(label="Activer", style=discord.ButtonStyle.green, emoji="✅", disabled=creator_config["enabled"], row=0)
         async def enable_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-            config[platform][creator]["enabled"] = True
-            save_config(config)
-            
-            success_embed = discord.Embed(
-                title="✅ Notification activée",
-                description=f"Les notifications pour **{creator}** sont maintenant **activées**.",
-                color=discord.Color.green()
-            )
-            await interaction.response.send_message(embed=success_embed, ephemeral=True)
-            
-            await show_creator_config(interaction, platform, creator)
+            session.set("enabled", True)
+            await show_creator_config(interaction, platform, creator, session)
         
         @discord.ui.button(label="Désactiver", style=discord.ButtonStyle.red, emoji="❌", disabled=not creator_config["enabled"], row=0)
         async def disable_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-            config[platform][creator]["enabled"] = False
-            save_config(config)
-            
-            success_embed = discord.Embed(
-                title="❌ Notification désactivée",
-                description=f"Les notifications pour **{creator}** sont maintenant **désactivées**.",
-                color=discord.Color.red()
-            )
-            await interaction.response.send_message(embed=success_embed, ephemeral=True)
-            
-            await show_creator_config(interaction, platform, creator)
+            session.set("enabled", False)
+            await show_creator_config(interaction, platform, creator, session)
         
         @discord.ui.button(label="Message", style=discord.ButtonStyle.blurple, emoji="💬", row=1)
         async def message_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -851,63 +1411,14 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
                     self.add_item(self.message_input)
                 
                 async def on_submit(self, interaction: discord.Interaction):
-                    config[platform][creator]["message"] = self.message_input.value
-                    save_config(config)
-                    
-                    success_embed = discord.Embed(
-                        title="✅ Message configuré",
-                        description=f"Le message de notification pour **{creator}** a été mis à jour.",
-                        color=discord.Color.green()
-                    )
-                    success_embed.add_field(
-                        name="Nouveau message",
-                        value=f"```\n{self.message_input.value}\n```",
-                        inline=False
-                    )
+                    if not await check_message_placeholders(interaction, platform, self.message_input.value):
+                        return
                     
-                    await interaction.response.send_message(embed=success_embed, ephemeral=True)
-                    await show_creator_config(interaction, platform, creator)
+                    session.set("message", self.message_input.value)
+                    await show_creator_config(interaction, platform, creator, session)
             
             await interaction.response.send_modal(MessageModal())
         
-        @discord.ui.button(label="Salon", style=discord.ButtonStyle.blurple, emoji="📢", row=1)
-        async def channel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-            class ChannelSelectView(discord.ui.View):
-                def __init__(self):
-                    super().__init__(timeout=180)
-                    
-                    # Add channel select
-                    self.channel_select = discord.ui.ChannelSelect(
-                        placeholder="Sélectionner un salon texte",
-                        channel_types=[discord.ChannelType.text],
-                        min_values=1,
-                        max_values=1
-                    )
-                    self.channel_select.callback = self.channel_select_callback
-                    self.add_item(self.channel_select)
-                
-                async def channel_select_callback(self, interaction: discord.Interaction):
-                    selected_channel = self.channel_select.values[0]
-                    config[platform][creator]["channel_id"] = str(selected_channel.id)
-                    save_config(config)
-                    
-                    success_embed = discord.Embed(
-                        title="✅ Salon configuré",
-                        description=f"Les notifications pour **{creator}** seront envoyées dans {selected_channel.mention}.",
-                        color=discord.Color.green()
-                    )
-                    
-                    await interaction.response.send_message(embed=success_embed, ephemeral=True)
-                    await show_creator_config(interaction, platform, creator)
-            
-            channel_embed = discord.Embed(
-                title=f"Sélection de salon pour {creator}",
-                description="Choisissez le salon où les notifications seront envoyées",
-                color=get_platform_color(platform)
-            )
-            
-            await interaction.response.send_message(embed=channel_embed, view=ChannelSelectView(), ephemeral=True)
-        
         @discord.ui.button(label="Ping", style=discord.ButtonStyle.blurple, emoji="🔔", row=1)
         async def ping_button(self, interaction: discord.Interaction, button: discord.ui.Button):
             class PingModal(discord.ui.Modal):
@@ -923,26 +1434,31 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
                     self.add_item(self.ping_input)
                 
                 async def on_submit(self, interaction: discord.Interaction):
-                    config[platform][creator]["ping"] = self.ping_input.value
-                    save_config(config)
-                    
-                    # Create success feedback
-                    if self.ping_input.value.strip():
-                        desc = f"Les notifications pour **{creator}** mentionneront maintenant **{self.ping_input.value}**."
-                    else:
-                        desc = f"Les notifications pour **{creator}** n'incluront plus de mentions."
-                    
-                    success_embed = discord.Embed(
-                        title="✅ Ping configuré",
-                        description=desc,
-                        color=discord.Color.green()
-                    )
-                    
-                    await interaction.response.send_message(embed=success_embed, ephemeral=True)
-                    await show_creator_config(interaction, platform, creator)
+                    session.set("ping", self.ping_input.value)
+                    await show_creator_config(interaction, platform, creator, session)
             
             await interaction.response.send_modal(PingModal())
         
+        # A creator deleted meanwhile is not re-created from the draft: only "Recharger" is offered
+        @discord.ui.button(label="Écraser" if session.conflicts else "Enregistrer", style=discord.ButtonStyle.success, emoji="💾",
+                           disabled=not session.dirty or config_edits.DELETED in session.conflicts, row=2)
+        async def save_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+            was_enabled = (session.base or {}).get("enabled")
+            conflicts = await session.commit(force=bool(session.conflicts))
+            if conflicts:
+                await show_creator_config(interaction, platform, creator, session)
+                return
+            
+            # Give a quarantined creator a fresh start when it is enabled again
+            if session.draft is not None and session.draft["enabled"] and not was_enabled:
+                breaker.for_creator(platform, creator).reset()
+            await show_creator_config(interaction, platform, creator, session, notice="✅ Modifications enregistrées.")
+        
+        @discord.ui.button(label="Recharger", style=discord.ButtonStyle.secondary, emoji="🔄", row=2)
+        async def reload_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+            await session.reload()
+            await show_creator_config(interaction, platform, creator, session, notice="🔄 Configuration actuelle rechargée.")
+        
         @discord.ui.button(label="Supprimer", style=discord.ButtonStyle.danger, emoji="🗑️", row=2)
         async def delete_button(self, interaction: discord.Interaction, button: discord.ui.Button):
             # Create confirmation view
@@ -952,26 +1468,31 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
                 
                 @discord.ui.button(label="Confirmer", style=discord.ButtonStyle.danger, emoji="✅")
                 async def confirm_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                    del config[platform][creator]
-                    save_config(config)
+                    session.deleted = True
+                    conflicts = await session.commit()
+                    if conflicts:
+                        session.deleted = False
+                        await interaction.response.edit_message(
+                            embed=discord.Embed(
+                                title="⚠️ Suppression annulée",
+                                description=f"**{creator}** a été modifié par un autre administrateur entre-temps "
+                                            f"({', '.join(SETTING_LABELS.get(setting, setting) for setting in conflicts)}). "
+                                            "Rechargez la configuration avant de le supprimer.",
+                                color=discord.Color.orange()
+                            ),
+                            view=None
+                        )
+                        return
                     
                     success_embed = discord.Embed(
                         title="🗑️ Créateur supprimé",
-                        description=f"Le créateur **{creator}** a été supprimé des notifications {platform}.",
+                        description=f"Le créateur **{creator}** a été supprimé des notifications {platform}. "
+                                    f"Utilisez `/config {platform}` pour revenir à la liste des créateurs.",
                         color=discord.Color.red()
                     )
                     
-                    await interaction.response.send_message(embed=success_embed, ephemeral=True)
-                    
-                    # Return to platform config
-                    embed = discord.Embed(
-                        title=f"Configuration de {platform}",
-                        description="Le créateur a été supprimé. Utilisez `/config {platform}` pour revenir à la liste des créateurs.",
-                        color=get_platform_color(platform)
-                    )
-                    
-                    # Update the original message
-                    await interaction.message.edit(embed=embed, view=None)
+                    # Update the confirmation message
+                    await interaction.response.edit_message(embed=success_embed, view=None)
                 
                 @discord.ui.button(label="Annuler", style=discord.ButtonStyle.secondary, emoji="❌")
                 async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -981,7 +1502,7 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
                         color=discord.Color.blurple()
                     )
                     
-                    await interaction.response.send_message(embed=cancel_embed, ephemeral=True)
+                    await interaction.response.edit_message(embed=cancel_embed, view=None)
             
             confirm_embed = discord.Embed(
                 title="⚠️ Confirmation de suppression",
@@ -998,8 +1519,14 @@ async def show_creator_config(interaction: discord.Interaction, platform: str, c
             
         @discord.ui.button(label="Retour", style=discord.ButtonStyle.secondary, emoji="◀️", row=2)
         async def back_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-            # Go back to platform config
+            # Go back to platform config (an unsaved draft is dropped)
             await config_command(interaction, platform)
+        
+        @discord.ui.select(cls=discord.ui.ChannelSelect, channel_types=[discord.ChannelType.text],
+                           placeholder="📢 Salon des notifications", min_values=1, max_values=1, row=3)
+        async def channel_select(self, interaction: discord.Interaction, select: discord.ui.ChannelSelect):
+            session.set("channel_id", str(select.values[0].id))
+            await show_creator_config(interaction, platform, creator, session)
     
     await interaction.response.edit_message(embed=embed, view=ConfigView())
 
@@ -1027,18 +1554,19 @@ async def add_creator_command(interaction: discord.Interaction, platform: str, u
         )
         return
     
-    # Load config
-    config = load_config()
-    
-    # Initialize platform if needed
-    if platform not in config:
-        config[platform] = {}
-    
     # Clean username
     username = username.strip()
     
-    # Check if creator already exists
-    if username in config[platform]:
+    # Add creator with default settings, unless it already exists (checked again when saving)
+    session = await config_edits.EditSession.open(config_store, platform, username)
+    if session.draft is None:
+        session.draft = {
+            "enabled": True,
+            "message": get_platform_default_message(platform),
+            "channel_id": None,
+            "ping": ""
+        }
+    if session.base is not None or await session.commit():
         await interaction.response.send_message(
             embed=discord.Embed(
                 title="❌ Créateur existant",
@@ -1049,15 +1577,6 @@ async def add_creator_command(interaction: discord.Interaction, platform: str, u
         )
         return
     
-    # Add creator with default settings
-    config[platform][username] = {
-        "enabled": True,
-        "message": get_platform_default_message(platform),
-        "channel_id": None,
-        "ping": ""
-    }
-    save_config(config)
-    
     # Create success embed
     embed = discord.Embed(
         title=f"✅ {get_platform_emoji(platform)} Créateur ajouté avec succès",
@@ -1100,104 +1619,113 @@ async def add_creator_command(interaction: discord.Interaction, platform: str, u
 async def rank_command(interaction: discord.Interaction):
     """Show user's rank and XP"""
     user_id = str(interaction.user.id)
-    user_data = get_user_data(user_id)
-    
-    current_xp = user_data["xp"]
-    current_level = user_data["level"]
-    xp_for_next_level = calculate_xp_for_level(current_level + 1)
-    xp_for_current_level = calculate_xp_for_level(current_level)
-    
-    # Calculate progress percentage
-    progress = ((current_xp - xp_for_current_level) / (xp_for_next_level - xp_for_current_level)) * 100
-    progress = max(0, min(100, progress))  # Ensure between 0-100%
-    
-    # Create progress bar
-    bar_length = 20
-    filled_length = int(bar_length * progress / 100)
-    bar = '█' * filled_length + '░' * (bar_length - filled_length)
-    
-    embed = discord.Embed(
-        title=f"Niveau de {interaction.user.display_name}",
-        color=discord.Color.blue()
+    user_data = await get_user_data(user_id)
+    
+    async def render():
+        """Build the rank card"""
+        current_xp = user_data["xp"]
+        current_level = user_data["level"]
+        xp_for_next_level = calculate_xp_for_level(current_level + 1)
+        xp_for_current_level = calculate_xp_for_level(current_level)
+        
+        # Calculate progress percentage
+        progress = ((current_xp - xp_for_current_level) / (xp_for_next_level - xp_for_current_level)) * 100
+        progress = max(0, min(100, progress))  # Ensure between 0-100%
+        
+        # Create progress bar
+        bar_length = 20
+        filled_length = int(bar_length * progress / 100)
+        bar = '█' * filled_length + '░' * (bar_length - filled_length)
+        
+        embed = discord.Embed(
+            title=f"Niveau de {interaction.user.display_name}",
+            color=discord.Color.blue()
+        )
+        
+        embed.add_field(name="Niveau", value=str(current_level), inline=True)
+        embed.add_field(name="XP Total", value=str(current_xp), inline=True)
+        embed.add_field(name=f"Progression vers niveau {current_level + 1}", value=f"`{bar}` {progress:.1f}%", inline=False)
+        embed.add_field(name="XP nécessaire", value=f"{current_xp - xp_for_current_level}/{xp_for_next_level - xp_for_current_level}", inline=True)
+        
+        embed.set_thumbnail(url=interaction.user.display_avatar.url)
+        return embed
+    
+    # Keyed by everything the card shows, so it is never stale
+    embed = await renders.embed(
+        ("rank", user_id),
+        (user_data["xp"], user_data["level"], interaction.user.display_name, interaction.user.display_avatar.url),
+        render
     )
     
-    embed.add_field(name="Niveau", value=str(current_level), inline=True)
-    embed.add_field(name="XP Total", value=str(current_xp), inline=True)
-    embed.add_field(name=f"Progression vers niveau {current_level + 1}", value=f"`{bar}` {progress:.1f}%", inline=False)
-    embed.add_field(name="XP nécessaire", value=f"{current_xp - xp_for_current_level}/{xp_for_next_level - xp_for_current_level}", inline=True)
-    
-    embed.set_thumbnail(url=interaction.user.display_avatar.url)
-    
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="leaderboard", description="Affiche le classement des utilisateurs par niveau")
 async def leaderboard_command(interaction: discord.Interaction):
     """Show the server leaderboard"""
-    users_data = load_users()
-    
-    # Filter out users not in the server
-    server_members = {str(member.id): member for member in interaction.guild.members}
-    
-    # Create leaderboard data
-    leaderboard = []
-    for user_id, data in users_data.items():
-        if user_id in server_members:
-            leaderboard.append({
-                "id": user_id,
-                "member": server_members[user_id],
-                "xp": data["xp"],
-                "level": data["level"]
-            })
-    
-    # Sort by XP
-    leaderboard.sort(key=lambda x: x["xp"], reverse=True)
+    async def render():
+        """Build the leaderboard, or None when nobody from this server is ranked"""
+        ranked_users = await user_store.ranked()
+        
+        # Keep the top 10 users that are members of this server, already sorted by XP
+        leaderboard = [
+            {"id": user_id, "member": member, "xp": xp, "level": level}
+            for member, user_id, xp, level in await member_cache.resolve_ranked_members(interaction.guild, ranked_users, 10)
+        ]
+        
+        if not leaderboard:
+            return None
+        
+        embed = discord.Embed(
+            title=f"Classement du serveur {interaction.guild.name}",
+            description="Les membres les plus actifs du serveur",
+            color=discord.Color.gold()
+        )
+        
+        for i, entry in enumerate(leaderboard, 1):
+            medal = ""
+            if i == 1:
+                medal = "🥇 "
+            elif i == 2:
+                medal = "🥈 "
+            elif i == 3:
+                medal = "🥉 "
+            else:
+                medal = f"{i}. "
+            
+            member = entry["member"]
+            embed.add_field(
+                name=f"{medal}{member.display_name}",
+                value=f"Niveau {entry['level']} • {entry['xp']} XP",
+                inline=False
+            )
+        return embed
     
-    # Keep only top 10
-    leaderboard = leaderboard[:10]
+    # Rebuilt at most once per XP flush (and TTL), however many requests arrive meanwhile
+    embed = await renders.embed(("leaderboard", tenants.current().name, interaction.guild.id), user_store.flushed_version, render)
     
-    if not leaderboard:
+    if embed is None:
         await interaction.response.send_message("Aucun utilisateur dans le classement pour le moment.", ephemeral=True)
         return
     
-    embed = discord.Embed(
-        title=f"Classement du serveur {interaction.guild.name}",
-        description="Les membres les plus actifs du serveur",
-        color=discord.Color.gold()
-    )
-    
-    for i, entry in enumerate(leaderboard, 1):
-        medal = ""
-        if i == 1:
-            medal = "🥇 "
-        elif i == 2:
-            medal = "🥈 "
-        elif i == 3:
-            medal = "🥉 "
-        else:
-            medal = f"{i}. "
-        
-        member = entry["member"]
-        embed.add_field(
-            name=f"{medal}{member.display_name}",
-            value=f"Niveau {entry['level']} • {entry['xp']} XP",
-            inline=False
-        )
-    
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="balance", description="Affiche ton solde de monnaie virtuelle")
 async def balance_command(interaction: discord.Interaction):
     """Show user's balance"""
     user_id = str(interaction.user.id)
-    user_data = get_user_data(user_id)
+    user_data = await get_user_data(user_id)
     
     balance = user_data["balance"]
     
-    embed = discord.Embed(
-        title="💰 Solde",
-        description=f"{interaction.user.display_name}, tu possèdes **{balance}** pièces.",
-        color=discord.Color.gold()
-    )
+    async def render():
+        """Build the balance card"""
+        return discord.Embed(
+            title="💰 Solde",
+            description=f"{interaction.user.display_name}, tu possèdes **{balance}** pièces.",
+            color=discord.Color.gold()
+        )
+    
+    embed = await renders.embed(("balance", user_id), (balance, interaction.user.display_name), render)
     
     await interaction.response.send_message(embed=embed)
 
@@ -1205,13 +1733,13 @@ async def balance_command(interaction: discord.Interaction):
 async def daily_command(interaction: discord.Interaction):
     """Collect daily reward"""
     user_id = str(interaction.user.id)
-    user_data = get_user_data(user_id)
-    
-    # Check if user already claimed today
-    last_claim = user_data.get("daily_last")
     today = datetime.datetime.now().strftime("%Y-%m-%d")
+    reward_amount = random.randint(50, 200)
     
-    if last_claim == today:
+    # Check and claim under the user's lock so two /daily cannot both pay out
+    claimed, user_data = await bank.claim_daily(user_id, today, reward_amount)
+    
+    if not claimed:
         # Already claimed today
         next_claim = (datetime.datetime.now() + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0)
         time_until = next_claim - datetime.datetime.now()
@@ -1227,13 +1755,6 @@ async def daily_command(interaction: discord.Interaction):
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
     
-    # Give reward
-    reward_amount = random.randint(50, 200)
-    user_data["balance"] += reward_amount
-    user_data["daily_last"] = today
-    
-    update_user_data(user_id, user_data)
-    
     embed = discord.Embed(
         title="💰 Récompense quotidienne",
         description=f"Tu as reçu **{reward_amount}** pièces !\nTon nouveau solde est de **{user_data['balance']}** pièces.",
@@ -1260,21 +1781,13 @@ async def pay_command(interaction: discord.Interaction, user: discord.Member, am
     sender_id = str(interaction.user.id)
     recipient_id = str(user.id)
     
-    sender_data = get_user_data(sender_id)
-    
-    if sender_data["balance"] < amount:
+    # Debit and credit both accounts in a single commit
+    try:
+        sender_data, recipient_data = await bank.transfer(sender_id, recipient_id, amount)
+    except economy.InsufficientFunds:
         await interaction.response.send_message("Tu n'as pas assez d'argent pour effectuer ce transfert.", ephemeral=True)
         return
     
-    # Update sender's balance
-    sender_data["balance"] -= amount
-    update_user_data(sender_id, sender_data)
-    
-    # Update recipient's balance
-    recipient_data = get_user_data(recipient_id)
-    recipient_data["balance"] += amount
-    update_user_data(recipient_id, recipient_data)
-    
     embed = discord.Embed(
         title="💸 Transfert réussi",
         description=f"Tu as envoyé **{amount}** pièces à {user.mention}.\nTon nouveau solde est de **{sender_data['balance']}** pièces.",
@@ -1291,10 +1804,39 @@ async def pay_command(interaction: discord.Interaction, user: discord.Member, am
             color=discord.Color.green()
         )
         
-        await user.send(embed=recipient_embed)
+        await delivery.send(delivery.LOW, user, embed=recipient_embed)
     except discord.Forbidden:
         pass  # User has DMs closed
 
+@bot.tree.command(name="airdrop", description="Distribue des pièces à tous les membres du serveur")
+@app_commands.describe(
+    amount="Le montant à distribuer à chaque membre",
+    role="Limiter la distribution aux membres de ce rôle"
+)
+async def airdrop_command(interaction: discord.Interaction, amount: int, role: discord.Role = None):
+    """Credit coins to every member of the server (or of a role)"""
+    # Check if user has admin permissions
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+    
+    if amount <= 0:
+        await interaction.response.send_message("Le montant doit être supérieur à 0.", ephemeral=True)
+        return
+    
+    # Listing members may page through the API when the member cache is disabled
+    await interaction.response.defer()
+    recipients = [member_id async for member_id in member_cache.iter_member_ids(interaction.guild, role)]
+    count = await bank.airdrop(recipients, amount, reason=f"airdrop by {interaction.user.id}")
+    
+    embed = discord.Embed(
+        title="🪂 Distribution effectuée",
+        description=f"**{amount}** pièces ont été envoyées à **{count}** membre(s){f' du rôle {role.mention}' if role else ''}.",
+        color=discord.Color.green()
+    )
+    
+    await interaction.followup.send(embed=embed)
+
 @bot.tree.command(name="ban", description="Bannir un membre du serveur")
 @app_commands.describe(
     user="L'utilisateur à bannir",
@@ -1309,6 +1851,7 @@ async def ban_command(interaction: discord.Interaction, user: discord.Member, re
     
     try:
         await user.ban(reason=reason)
+        case, _ = await case_log.record(interaction.guild.id, user.id, "ban", interaction.user.id, reason)
         
         embed = discord.Embed(
             title="🔨 Utilisateur banni",
@@ -1316,6 +1859,7 @@ async def ban_command(interaction: discord.Interaction, user: discord.Member, re
             color=discord.Color.red()
         )
         embed.add_field(name="Raison", value=reason)
+        embed.set_footer(text=f"Cas #{case['case']}")
         
         await interaction.response.send_message(embed=embed)
     except discord.Forbidden:
@@ -1342,6 +1886,7 @@ async def kick_command(interaction: discord.Interaction, user: discord.Member, r
     
     try:
         await user.kick(reason=reason)
+        case, _ = await case_log.record(interaction.guild.id, user.id, "kick", interaction.user.id, reason)
         
         embed = discord.Embed(
             title="👢 Utilisateur expulsé",
@@ -1349,6 +1894,7 @@ async def kick_command(interaction: discord.Interaction, user: discord.Member, r
             color=discord.Color.orange()
         )
         embed.add_field(name="Raison", value=reason)
+        embed.set_footer(text=f"Cas #{case['case']}")
         
         await interaction.response.send_message(embed=embed)
     except discord.Forbidden:
@@ -1373,12 +1919,19 @@ async def warn_command(interaction: discord.Interaction, user: discord.Member, r
         await interaction.response.send_message("Tu ne peux pas avertir cet utilisateur car son rôle est supérieur ou égal au tien.", ephemeral=True)
         return
     
+    case, escalation = await case_log.record(interaction.guild.id, user.id, "warn", interaction.user.id, reason)
+    recent_warns = await case_log.count(interaction.guild.id, user.id, "warn", since=time.time() - 24 * 3600)
+    
     embed = discord.Embed(
         title="⚠️ Avertissement",
         description=f"{user.mention} a reçu un avertissement.",
         color=discord.Color.yellow()
     )
     embed.add_field(name="Raison", value=reason)
+    embed.add_field(name="Avertissements (24 h)", value=str(recent_warns))
+    if escalation:
+        embed.add_field(name="⛔ Escalade automatique", value=await apply_escalation(interaction, user, escalation), inline=False)
+    embed.set_footer(text=f"Cas #{case['case']}")
     
     await interaction.response.send_message(embed=embed)
     
@@ -1401,6 +1954,108 @@ async def warn_command_error(interaction: discord.Interaction, error):
     if isinstance(error, commands.MissingPermissions):
         await interaction.response.send_message("Tu n'as pas la permission d'avertir des membres.", ephemeral=True)
 
+# Emoji and name of each moderation action, as shown in case lists
+CASE_ACTIONS = {
+    "warn": ("⚠️", "Avertissement"),
+    "timeout": ("⏳", "Exclusion temporaire"),
+    "kick": ("👢", "Expulsion"),
+    "ban": ("🔨", "Bannissement")
+}
+
+def format_window(seconds):
+    """Render a duration in hours below two days, else in days"""
+    return f"{seconds // 3600} h" if seconds < 48 * 3600 else f"{seconds // 86400} j"
+
+async def apply_escalation(interaction: discord.Interaction, member: discord.Member, rule):
+    """Apply the sanction an escalation rule leads to, record it as a case and describe it"""
+    reason = f"Escalade automatique : {rule.count} × {CASE_ACTIONS[rule.action][1].lower()} en {format_window(rule.window)}"
+    try:
+        if rule.then == "timeout":
+            await member.timeout(datetime.timedelta(seconds=rule.duration), reason=reason)
+        elif rule.then == "kick":
+            await member.kick(reason=reason)
+        elif rule.then == "ban":
+            await member.ban(reason=reason)
+    except discord.Forbidden:
+        return f"{reason}, mais je n'ai pas la permission d'appliquer la sanction."
+    except discord.HTTPException as e:
+        logger.error(f"Failed to apply escalation {rule.then} to {member.id}: {str(e)}")
+        return f"{reason}, mais la sanction n'a pas pu être appliquée ({e.status}). Appliquez-la manuellement."
+    
+    case, _ = await case_log.record(interaction.guild.id, member.id, rule.then, interaction.client.user.id, reason, duration=rule.duration)
+    emoji, name = CASE_ACTIONS[rule.then]
+    duration = f" ({format_window(rule.duration)})" if rule.duration else ""
+    return f"{emoji} {name}{duration} — {reason} (cas #{case['case']})"
+
+async def build_cases_embed(guild: discord.Guild, user: discord.abc.User, page: int):
+    """Build one page of a member's moderation history (the last one if page is past it); return (embed, page, page count)"""
+    cases, pages = await case_log.history(guild.id, user.id, page)
+    if page >= pages:
+        page = pages - 1
+        cases, pages = await case_log.history(guild.id, user.id, page)
+    now = time.time()
+    
+    embed = discord.Embed(
+        title=f"Historique de modération de {user.display_name}",
+        color=discord.Color.dark_orange()
+    )
+    totals = []
+    for action, (emoji, name) in CASE_ACTIONS.items():
+        count = await case_log.count(guild.id, user.id, action)
+        if count:
+            totals.append(f"{emoji} {name} : **{count}**")
+    embed.description = "\n".join(totals) or "Aucune sanction enregistrée."
+    
+    warns = [
+        f"{label} : **{await case_log.count(guild.id, user.id, 'warn', since=now - seconds)}**"
+        for label, seconds in (("24 h", 24 * 3600), ("7 j", 7 * 86400), ("30 j", 30 * 86400))
+    ]
+    embed.add_field(name="⚠️ Avertissements récents", value=" • ".join(warns), inline=False)
+    
+    for case in cases:
+        emoji, name = CASE_ACTIONS.get(case["action"], ("•", case["action"]))
+        duration = f" ({format_window(case['duration'])})" if case.get("duration") else ""
+        embed.add_field(
+            name=f"#{case['case']} {emoji} {name}{duration}",
+            value=f"{case['reason']}\nPar <@{case['moderator']}> <t:{int(case['ts'])}:R>",
+            inline=False
+        )
+    embed.set_footer(text=f"Page {page + 1}/{pages}")
+    return embed, page, pages
+
+@bot.tree.command(name="cases", description="Affiche l'historique de modération d'un membre")
+@app_commands.describe(
+    user="Le membre dont afficher l'historique",
+    page="La page de l'historique (les plus récents d'abord)"
+)
+async def cases_command(interaction: discord.Interaction, user: discord.User, page: app_commands.Range[int, 1, None] = 1):
+    """Show a member's moderation cases, newest first, with recent counts"""
+    if not interaction.user.guild_permissions.manage_messages:
+        await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+    
+    class CasesView(discord.ui.View):
+        def __init__(self, page, pages):
+            super().__init__(timeout=180)
+            self.page = page
+            self.previous_page.disabled = page == 0
+            self.next_page.disabled = page >= pages - 1
+        
+        async def show(self, interaction: discord.Interaction, page):
+            embed, page, pages = await build_cases_embed(interaction.guild, user, page)
+            await interaction.response.edit_message(embed=embed, view=CasesView(page, pages))
+        
+        @discord.ui.button(label="Plus récents", style=discord.ButtonStyle.secondary, emoji="◀️")
+        async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+            await self.show(interaction, self.page - 1)
+        
+        @discord.ui.button(label="Plus anciens", style=discord.ButtonStyle.secondary, emoji="▶️")
+        async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+            await self.show(interaction, self.page + 1)
+    
+    embed, page, pages = await build_cases_embed(interaction.guild, user, page - 1)
+    await interaction.response.send_message(embed=embed, view=CasesView(page, pages), ephemeral=True)
+
 @bot.tree.command(name="clear", description="Supprimer un certain nombre de messages")
 @app_commands.describe(
     amount="Le nombre de messages à supprimer (1-100)"
@@ -1427,14 +2082,152 @@ async def clear_command_error(interaction: discord.Interaction, error):
     if isinstance(error, commands.MissingPermissions):
         await interaction.response.send_message("Tu n'as pas la permission de supprimer des messages.", ephemeral=True)
 
+@bot.tree.command(name="botstats", description="Affiche les temps de réponse des commandes du bot")
+async def botstats_command(interaction: discord.Interaction):
+    """Show rolling latency and error statistics per slash command"""
+    # Check if user has admin permissions
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+    
+    rows = command_stats.summary()
+    
+    embed = discord.Embed(
+        title="📈 Statistiques des commandes",
+        description=f"Latences sur les {command_stats.WINDOW_SIZE} dernières exécutions de chaque commande (p50 / p95 / p99).",
+        color=discord.Color.blurple()
+    )
+    
+    if not rows:
+        embed.add_field(name="Aucune donnée", value="Aucune commande n'a encore été exécutée.", inline=False)
+    
+    for row in rows[:24]:
+        value = f"{row['p50_ms']} / {row['p95_ms']} / {row['p99_ms']} ms • {row['calls']} appels"
+        if row["ttfr_p95_ms"] is not None:
+            value += f"\nPremière réponse p95 : {row['ttfr_p95_ms']} ms"
+        if row["late"]:
+            value += f"\n⚠️ {row['late']} réponse(s) après {command_stats.INTERACTION_DEADLINE:.0f}s"
+        if row["errors"]:
+            errors = ", ".join(f"{name} ×{count}" for name, count in row["error_types"].items())
+            value += f"\n❌ {errors}"
+        embed.add_field(name=f"/{row['command']}", value=value, inline=False)
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# Performance diagnostics, for administrators
+debug_group = app_commands.Group(name="debug", description="Outils de diagnostic des performances du bot")
+
+@debug_group.command(name="profile", description="Profile le bot en direct pendant quelques secondes")
+@app_commands.describe(seconds="Durée du profil en secondes")
+async def debug_profile_command(interaction: discord.Interaction, seconds: app_commands.Range[int, 1, profiler.MAX_PROFILE_SECONDS] = 10):
+    """Run a sampling profile of every thread and return the top functions and the collapsed stacks"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    
+    # Sampled from a worker thread so handlers and pollers keep running while being profiled
+    try:
+        profile = await asyncio.to_thread(profiler.sample, seconds)
+    except profiler.ProfilerBusy:
+        await interaction.followup.send("Un profil est déjà en cours, réessaie dans quelques secondes.", ephemeral=True)
+        return
+    
+    stacks = discord.File(io.BytesIO(profile.collapsed().encode()), filename=f"profile-{int(time.time())}.txt")
+    await interaction.followup.send(f"```\n{profile.format_top()[:1900]}\n```", file=stacks, ephemeral=True)
+
+@debug_group.command(name="snapshot", description="Prend un instantané de la mémoire (démarre tracemalloc)")
+async def debug_snapshot_command(interaction: discord.Interaction):
+    """Record the tracemalloc baseline compared by /debug diff"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    result = await asyncio.to_thread(profiler.take_snapshot)
+    caches = "\n".join(f"{name}: {size}" for name, size in result["caches"].items())
+    await interaction.followup.send(
+        f"📸 Instantané pris ({profiler.format_bytes(result['traced_bytes'])} suivis). "
+        f"Utilise `/debug diff` plus tard pour voir ce qui a grossi.\n```\n{caches}\n```",
+        ephemeral=True
+    )
+
+@debug_group.command(name="diff", description="Compare la mémoire avec le dernier instantané")
+@app_commands.describe(stop="Arrêter tracemalloc après la comparaison (il ralentit les allocations)")
+async def debug_diff_command(interaction: discord.Interaction, stop: bool = False):
+    """Show the allocation sites and caches that grew since /debug snapshot"""
+    if not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    result = await asyncio.to_thread(profiler.diff)
+    if result is None:
+        await interaction.followup.send("Aucun instantané : utilise d'abord `/debug snapshot`.", ephemeral=True)
+        return
+    if stop:
+        profiler.stop_tracing()
+    
+    await interaction.followup.send(f"```\n{profiler.format_diff(result)[:1900]}\n```", ephemeral=True)
+
+bot.tree.add_command(debug_group)
+
+# Event handlers every tenant's bot runs (the commands are copied from the tree)
+TENANT_EVENTS = ("setup_hook", "on_ready", "on_resumed", "on_disconnect", "on_message",
+                 "on_member_join", "on_raw_member_remove", "on_app_command_completion")
+
+def add_tenant(name):
+    """Create a tenant with its own bot, sharing the commands and event handlers of the primary one"""
+    client = create_bot()
+    for command in bot.tree.get_commands():
+        client.tree.add_command(command)
+    for event in TENANT_EVENTS:
+        setattr(client, event, getattr(bot, event))
+    return create_tenant(
+        name,
+        client,
+        tenants.data_path(name, "config.json"),
+        tenants.data_path(name, "users.json"),
+        tenants.data_path(name, "users.bin"),
+        tenants.data_path(name, "ledger.jsonl"),
+        tenants.data_path(name, "cases.jsonl")
+    )
+
+async def run_tenant(tenant, token):
+    """Run a tenant's bot; its events and commands are handled as that tenant"""
+    with tenant.active():
+        try:
+            await tenant.bot.start(token)
+        except Exception as e:
+            logger.error(f"Failed to start bot of tenant {tenant.name}: {str(e)}")
+
 async def bot_start():
-    """Start the Discord bot with the token from environment variables"""
+    """Start the Discord bot with the token from environment variables, and one bot per DISCORD_TOKENS entry"""
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         logger.error("DISCORD_TOKEN not found in environment variables")
         return
     
     try:
-        await bot.start(token)
-    except Exception as e:
-        logger.error(f"Failed to start bot: {str(e)}")
+        extra_tokens = tenants.parse_tokens()
+    except ValueError as e:
+        logger.error(str(e))
+        return
+    runs = [run_tenant(tenants.registry[0], token)]
+    for name, tenant_token in extra_tokens:
+        runs.append(run_tenant(add_tenant(name), tenant_token))
+    
+    startup["started_at"] = time.perf_counter()
+    loop_monitor.start()
+    eventsub.receiver.attach(asyncio.get_running_loop(), handle_eventsub_event)
+    websub.receiver.attach(asyncio.get_running_loop(), handle_websub_entry)
+    
+    try:
+        await asyncio.gather(*runs)
+    finally:
+        await close_http_session()
+        for tenant in tenants.registry:
+            await tenant.bank.flush()
+            await tenant.user_store.flush()
+            await tenant.case_log.flush()
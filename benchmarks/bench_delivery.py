@@ -0,0 +1,118 @@
+"""
+StreamNotify+ Delivery Burst Test
+Replays a burst of chat level-ups, upload announcements and live alerts into channels that
+allow 5 messages per window (Discord's per-channel bucket, with a shortened window), once
+sending directly in arrival order and once through the delivery scheduler. Reports how long
+each class waited and how many low-priority messages were shed.
+
+Usage: python benchmarks/bench_delivery.py [--channels 5] [--seconds 10] [--level-ups-per-second 20]
+                                           [--uploads 40] [--lives 15] [--window 1.0]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+import collections
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import delivery
+
+class BucketChannel:
+    """Channel stand-in that, like discord.py, makes a send wait for a free slot in the route's bucket"""
+
+    def __init__(self, channel_id, limit, period, latency):
+        self.id = channel_id
+        self.limit = limit
+        self.period = period
+        self.latency = latency
+        self._sent = collections.deque()
+        self._lock = asyncio.Lock()
+
+    async def send(self, content=None, embed=None):
+        async with self._lock:
+            now = time.monotonic()
+            while self._sent and self._sent[0] <= now - self.period:
+                self._sent.popleft()
+            if len(self._sent) >= self.limit:
+                await asyncio.sleep(self._sent[0] + self.period - now)
+            self._sent.append(time.monotonic())
+        await asyncio.sleep(self.latency)
+        return content
+
+def build_traffic(args):
+    """Return (at, kind, channel index) events: steady level-ups, then a burst of uploads and lives"""
+    rng = random.Random(1)
+    events = []
+    for i in range(int(args.seconds * args.level_ups_per_second)):
+        events.append((rng.uniform(0, args.seconds), "low", rng.randrange(args.channels)))
+    burst = args.seconds / 3
+    for i in range(args.uploads):
+        events.append((burst + rng.uniform(0, 0.5), "upload", rng.randrange(args.channels)))
+    for i in range(args.lives):
+        events.append((burst + 0.25 + rng.uniform(0, 0.5), "live", rng.randrange(args.channels)))
+    return sorted(events)
+
+async def replay(args, events, scheduler):
+    """Send every event at its time; return the delays per class and the number shed"""
+    channels = [BucketChannel(900 + i, delivery.ROUTE_LIMIT, args.window, args.latency) for i in range(args.channels)]
+    priorities = {"live": delivery.LIVE, "upload": delivery.UPLOAD, "low": delivery.LOW}
+    delays = collections.defaultdict(list)
+    shed = collections.Counter()
+
+    async def deliver(kind, channel):
+        queued = time.monotonic()
+        if scheduler is None:
+            await channel.send(content=kind)
+        elif await scheduler.send(priorities[kind], channel, content=kind) is None:
+            shed[kind] += 1
+            return
+        delays[kind].append(time.monotonic() - queued)
+
+    started = time.monotonic()
+    tasks = []
+    for at, kind, index in events:
+        await asyncio.sleep(max(0, started + at - time.monotonic()))
+        tasks.append(asyncio.create_task(deliver(kind, channels[index])))
+    await asyncio.gather(*tasks)
+    return delays, shed, time.monotonic() - started
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+async def run(args):
+    # Old level-ups are dropped in proportion to the shortened window
+    delivery.LOW_PRIORITY_MAX_AGE = args.max_age
+    events = build_traffic(args)
+    counts = collections.Counter(kind for _, kind, _ in events)
+    print(f"{args.channels} channels at {delivery.ROUTE_LIMIT} messages / {args.window:.1f} s, "
+          f"{counts['low']} level-ups over {args.seconds:.0f} s, a burst of {counts['upload']} uploads "
+          f"and {counts['live']} live alerts, level-ups older than {args.max_age:.1f} s shed")
+    for name, scheduler in (("direct, arrival order", None),
+                            ("delivery scheduler", delivery.Scheduler(route_period=args.window))):
+        delays, shed, elapsed = await replay(args, events, scheduler)
+        print(f"\n{name} (all sent after {elapsed:.1f} s)")
+        print(f"  {'class':<7} {'sent':>5} {'shed':>5} {'p50 wait':>9} {'p99 wait':>9} {'max wait':>9}")
+        for kind in ("live", "upload", "low"):
+            values = delays[kind]
+            print(f"  {kind:<7} {len(values):>5} {shed[kind]:>5} {statistics.median(values) if values else 0:>8.2f}s "
+                  f"{percentile(values, 0.99):>8.2f}s {max(values, default=0):>8.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Delivery burst test")
+    parser.add_argument("--channels", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--level-ups-per-second", type=float, default=20)
+    parser.add_argument("--uploads", type=int, default=40)
+    parser.add_argument("--lives", type=int, default=15)
+    parser.add_argument("--window", type=float, default=1.0, help="seconds of the per-channel 5-message window")
+    parser.add_argument("--max-age", type=float, default=3.0, help="seconds after which a queued level-up is shed")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds a send takes once its slot is free")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
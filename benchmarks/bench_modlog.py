@@ -0,0 +1,124 @@
+"""
+StreamNotify+ Moderation Log Benchmark
+Builds a journal of moderation cases spread over many guilds and users, then measures how long
+the case log takes to load, record new cases, page a member's history and count cases in a
+sliding window. Finally grows one member's history and compares the escalation check done on
+each record (rolling windows) with counting the same window by scanning the history.
+
+Usage: python benchmarks/bench_modlog.py [--cases 300000] [--guilds 50] [--users 20000] [--records 50000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modlog
+
+ACTIONS = ("warn",) * 8 + ("timeout", "kick", "ban")
+DAY = 24 * 3600
+
+def write_journal(path, args, rng):
+    """Write args.cases cases over the last 90 days, a few users of each guild getting most of them"""
+    now = time.time()
+    numbers = {}
+    with open(path, 'w', encoding='utf-8') as f:
+        for ts in sorted(now - rng.uniform(0, 90 * DAY) for _ in range(args.cases)):
+            guild = str(rng.randrange(args.guilds))
+            numbers[guild] = numbers.get(guild, 0) + 1
+            user = str(int(rng.paretovariate(1.2)) % args.users)
+            f.write(json.dumps({
+                "case": numbers[guild], "ts": ts, "guild": guild, "user": user,
+                "action": rng.choice(ACTIONS), "moderator": "1", "reason": "Spam", "duration": None
+            }) + "\n")
+
+def timed(samples):
+    """Median and p99 of per-call timings, in microseconds"""
+    ordered = sorted(samples)
+    return statistics.median(ordered) * 1e6, ordered[int(0.99 * (len(ordered) - 1))] * 1e6
+
+def scan_count(cases, action, since):
+    """The same count by scanning the member's whole history"""
+    return sum(1 for case in cases if case["action"] == action and case["ts"] >= since)
+
+async def run(args):
+    modlog.CASE_FLUSH_DELAY = 3600
+    rng = random.Random(1)
+    directory = tempfile.mkdtemp(prefix="bench-modlog-")
+    path = os.path.join(directory, "cases.jsonl")
+    write_journal(path, args, rng)
+    print(f"{args.cases:,} cases in {args.guilds} guilds, users drawn from {args.users:,} "
+          f"({os.path.getsize(path) / 2 ** 20:.0f} MiB journal)")
+
+    log = modlog.CaseLog(path)
+    started = time.perf_counter()
+    await log.load()
+    print(f"\n  load and index          {time.perf_counter() - started:>8.2f} s")
+
+    members = [(str(rng.randrange(args.guilds)), str(int(rng.paretovariate(1.2)) % args.users)) for _ in range(args.records)]
+    started = time.perf_counter()
+    for guild, user in members:
+        await log.record(guild, user, rng.choice(ACTIONS), 1, "Spam")
+    elapsed = time.perf_counter() - started
+    print(f"  record                  {args.records / elapsed:>8,.0f} cases/s")
+    started = time.perf_counter()
+    await log.flush()
+    print(f"  append {args.records:,} to disk   {time.perf_counter() - started:>8.2f} s")
+
+    history, counts = [], []
+    since = time.time() - 7 * DAY
+    for guild, user in members[:5000]:
+        started = time.perf_counter()
+        await log.history(guild, user, rng.randrange(3))
+        history.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        await log.count(guild, user, "warn", since=since)
+        counts.append(time.perf_counter() - started)
+    print(f"  history page            {timed(history)[0]:>8.1f} us median, {timed(history)[1]:.1f} us p99")
+    print(f"  warns in the last 7 d   {timed(counts)[0]:>8.1f} us median, {timed(counts)[1]:.1f} us p99")
+    heaviest = max(log._cases.values(), key=len)
+    print(f"  (busiest member has {len(heaviest):,} cases)")
+
+    # One member warned over and over: the escalation check against a scan of the history
+    rule = modlog.ESCALATIONS[0]
+    print(f"\nEscalation check ({rule.count} {rule.action}s in {rule.window // 3600} h) as one member's history grows")
+    print(f"  {'history':>9} {'rolling window':>15} {'history scan':>13}")
+    grown = modlog.CaseLog(os.path.join(directory, "grown.jsonl"))
+    await grown.load()
+    size = 0
+    for target in (100, 1000, 10000, 100000):
+        while size < target:
+            ts = time.time() - DAY * (target - size) / 1000
+            grown._index({"case": size + 1, "ts": ts, "guild": "1", "user": "1", "action": "warn",
+                          "moderator": "1", "reason": "Spam", "duration": None})
+            size += 1
+        cases = grown._cases[("1", "1")]
+        window, scan = [], []
+        # Measured apart: a scan in between evicts the windows from the CPU cache
+        for _ in range(200):
+            started = time.perf_counter()
+            grown._index({"case": size + 1, "ts": time.time(), "guild": "1", "user": "1", "action": "warn",
+                          "moderator": "1", "reason": "Spam", "duration": None})
+            window.append(time.perf_counter() - started)
+        for _ in range(200):
+            started = time.perf_counter()
+            scan_count(cases, rule.action, time.time() - rule.window)
+            scan.append(time.perf_counter() - started)
+        print(f"  {target:>9,} {timed(window)[0]:>12.1f} us {timed(scan)[0]:>10.0f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description="Moderation case log benchmark")
+    parser.add_argument("--cases", type=int, default=300000)
+    parser.add_argument("--guilds", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--records", type=int, default=50000, help="cases recorded after loading")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+StreamNotify+ Poller Load Test
+Runs the real Twitch, YouTube and TikTok pollers against the local fake platform server
+(benchmarks/fake_platforms.py) with 10 / 500 / 5,000 configured creators per platform.
+Each size runs a cold tick (empty caches) then a warm tick after a fraction of the creators
+went live or posted, and reports tick duration, requests sent and notifications emitted.
+
+Usage: python benchmarks/bench_pollers.py [--creators 10 500 5000] [--latency 0.005] [--error-rate 0]
+                                          [--rate-limit-rate 0] [--change-rate 0.05] [--uploads 1] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import collections
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Credentials the pollers require; the fake accepts anything. Push delivery stays off.
+os.environ.setdefault("TWITCH_CLIENT_ID", "fake-client-id")
+os.environ.setdefault("TWITCH_CLIENT_SECRET", "fake-client-secret")
+os.environ.setdefault("YOUTUBE_API_KEY", "fake-api-key")
+for name in ("EVENTSUB_CALLBACK_URL", "WEBSUB_CALLBACK_URL"):
+    os.environ.pop(name, None)
+
+import fake_platforms
+
+# One creator in this many does not exist on the platform
+MISSING_EVERY = 100
+
+class FakeChannel:
+    """Discord channel stand-in counting the notifications sent to it"""
+
+    def __init__(self):
+        self.id = 123456789012345678
+        self.sent = collections.Counter()
+
+    async def send(self, content=None, embed=None):
+        self.sent[embed.color.value if embed and embed.color else None] += 1
+
+def build_config(creators):
+    """Return a notification config with the given number of enabled creators per platform"""
+    config = {}
+    for platform in ("twitch", "youtube", "tiktok"):
+        config[platform] = {
+            (f"missing{i}" if i % MISSING_EVERY == MISSING_EVERY - 1 else f"{platform}creator{i}"): {
+                "enabled": True,
+                "message": "{user} : {link}",
+                "channel_id": "123456789012345678",
+                "ping": ""
+            }
+            for i in range(creators)
+        }
+    return config
+
+def reset_state(app, breaker):
+    """Forget everything the pollers remember between runs"""
+    for cache in (app.tiktok_cache, app.youtube_cache, app.twitch_cache, app.twitch_users, app.youtube_channel_ids):
+        cache.clear()
+    app.twitch_auth.update(token=None, expires_at=0)
+    breaker._breakers.clear()
+
+async def run_tick(app, platforms, channel, name, poller):
+    """Run one poller iteration; return its result row"""
+    platforms.reset_counters()
+    channel.sent.clear()
+    errors = app.telemetry.snapshot()["loops"][name]["errors"]
+    started = time.perf_counter()
+    await poller()
+    duration = time.perf_counter() - started
+    stats = app.telemetry.snapshot()["loops"][name]
+    return {
+        "platform": name,
+        "seconds": duration,
+        "requests": sum(platforms.requests.values()),
+        "notifications": sum(channel.sent.values()),
+        "checked": stats["items_checked"],
+        "errors": stats["errors"] - errors,
+        "injected": dict(platforms.injected)
+    }
+
+async def run(args):
+    platforms = fake_platforms.FakePlatforms(args.latency, args.error_rate, args.rate_limit_rate, live_rate=args.live_rate)
+    runner, base_url = await fake_platforms.start(platforms)
+    for name in ("TWITCH_AUTH_BASE", "TWITCH_API_BASE", "YOUTUBE_API_BASE", "TIKTOK_BASE"):
+        os.environ[name] = base_url
+
+    import app
+    import storage
+    import breaker
+    import message_templates
+
+    # One log line per notification or injected error would drown the table
+    logging.getLogger().setLevel(logging.CRITICAL)
+    channel = FakeChannel()
+    app.bot.get_channel = lambda channel_id: channel
+    # One fake stands for every configured channel: do not hold it to a single channel's send window
+    app.delivery.scheduler.route_limit = float("inf")
+    pollers = (
+        ("twitch", app.check_twitch_streams),
+        ("youtube", app.check_youtube_videos),
+        ("tiktok", app.check_tiktok_videos)
+    )
+    for name, poller in pollers:
+        app.telemetry.register_loop(name, poller.minutes * 60)
+
+    print(f"Fake platforms at {base_url}: {args.latency * 1000:.1f} ms latency, "
+          f"{args.error_rate:.0%} errors, {args.rate_limit_rate:.0%} 429s, {args.change_rate:.0%} of creators change between ticks ({args.uploads} upload(s) each)")
+    results = []
+    for creators in args.creators:
+        directory = tempfile.mkdtemp(prefix="bench-pollers-")
+        app.tenants.current().config_store = storage.ConfigStore(
+            os.path.join(directory, "config.json"), build_config(creators), compile=message_templates.compile_config
+        )
+        reset_state(app, breaker)
+        platforms.live.clear()
+        platforms.videos.clear()
+
+        print(f"\n{creators:,} creators per platform")
+        print(f"  {'poller':<8} {'tick':<5} {'duration':>10} {'requests':>9} {'req/s':>8} {'notified':>9} {'errors':>7}")
+        for tick in ("cold", "warm"):
+            if tick == "warm":
+                platforms.advance(args.change_rate, args.uploads)
+            for name, poller in pollers:
+                row = await run_tick(app, platforms, channel, name, poller)
+                row.update(creators=creators, tick=tick)
+                results.append(row)
+                print(f"  {name:<8} {tick:<5} {row['seconds']:>9.2f}s {row['requests']:>9} "
+                      f"{row['requests'] / row['seconds']:>8.0f} {row['notifications']:>9} {row['errors']:>7}")
+
+    await runner.cleanup()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Poller load test against fake platforms")
+    parser.add_argument("--creators", type=int, nargs="+", default=[10, 500, 5000])
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added to every fake response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--live-rate", type=float, default=0.2, help="fraction of Twitch creators live at start")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="fraction of creators changing before the warm tick")
+    parser.add_argument("--uploads", type=int, default=1, help="videos each changing creator posts before the warm tick")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
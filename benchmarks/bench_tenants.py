@@ -0,0 +1,115 @@
+"""
+StreamNotify+ Multi-Tenant Load Test
+Hosts 1 / 3 / 10 tenants (bot identities) in one process, all following the same creators,
+and runs the shared pollers against the local fake platform server. Requests per tick stay
+the same however many tenants there are, while every tenant still gets its notifications;
+separate processes would each send the single-tenant request count. Also reports the
+resident memory a tenant adds, next to the memory of a whole bot process.
+
+Usage: python benchmarks/bench_tenants.py [--tenants 1 3 10] [--creators 500] [--latency 0.005] [--change-rate 0.05]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_platforms
+from bench_pollers import FakeChannel, build_config, reset_state
+
+def read_rss_kib():
+    """Return the resident set size of this process in KiB"""
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+
+async def run(args):
+    platforms = fake_platforms.FakePlatforms(args.latency, live_rate=args.live_rate)
+    runner, base_url = await fake_platforms.start(platforms)
+    for name in ("TWITCH_AUTH_BASE", "TWITCH_API_BASE", "YOUTUBE_API_BASE", "TIKTOK_BASE"):
+        os.environ[name] = base_url
+
+    process_kib = read_rss_kib()
+    import app
+    import storage
+    import breaker
+    import message_templates
+    process_kib = read_rss_kib() - process_kib
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    directory = tempfile.mkdtemp(prefix="bench-tenants-")
+    app.tenants.TENANTS_DIR = directory
+    config = build_config(args.creators)
+    channels = {}
+
+    def prepare(tenant):
+        """Give a tenant the shared creator list and a channel counting its notifications"""
+        tenant.config_store = storage.ConfigStore(
+            os.path.join(directory, f"{tenant.name}.json"), config, compile=message_templates.compile_config
+        )
+        channel = channels[tenant.name] = FakeChannel()
+        tenant.bot.get_channel = lambda channel_id: channel
+
+    prepare(app.tenants.registry[0])
+    # One fake per tenant stands for all its configured channels: do not hold it to a single channel's send window
+    app.delivery.scheduler.route_limit = float("inf")
+    pollers = (
+        ("twitch", app.check_twitch_streams),
+        ("youtube", app.check_youtube_videos),
+        ("tiktok", app.check_tiktok_videos)
+    )
+    for name, poller in pollers:
+        app.telemetry.register_loop(name, poller.minutes * 60)
+
+    print(f"{args.creators:,} creators per platform followed by every tenant, {args.latency * 1000:.1f} ms latency, "
+          f"{args.change_rate:.0%} change before the warm tick")
+    print(f"Importing the bot takes {process_kib / 1024:.1f} MiB of resident memory (the floor of a separate process)")
+    print(f"\n{'tenants':>7} {'tick':<5} {'duration':>10} {'requests':>9} {'req/tenant':>11} "
+          f"{'notified':>9} {'per tenant':>11} {'RSS/tenant':>11}")
+    single = {}
+    for count in sorted(args.tenants):
+        rss_before = read_rss_kib()
+        added = 0
+        while len(app.tenants.registry) < count:
+            prepare(app.add_tenant(f"tenant{len(app.tenants.registry)}"))
+            added += 1
+        rss_per_tenant = (read_rss_kib() - rss_before) / added if added else None
+
+        reset_state(app, breaker)
+        platforms.live.clear()
+        platforms.videos.clear()
+        for tick in ("cold", "warm"):
+            if tick == "warm":
+                platforms.advance(args.change_rate)
+            platforms.reset_counters()
+            for channel in channels.values():
+                channel.sent.clear()
+            started = time.perf_counter()
+            for name, poller in pollers:
+                await poller()
+            duration = time.perf_counter() - started
+            requests = sum(platforms.requests.values())
+            notified = [sum(channel.sent.values()) for channel in channels.values()]
+            single.setdefault(tick, requests)
+            rss = f"{rss_per_tenant:>7.0f} KiB" if rss_per_tenant is not None else f"{'-':>11}"
+            print(f"{count:>7} {tick:<5} {duration:>9.2f}s {requests:>9} {requests / count:>11.0f} "
+                  f"{sum(notified):>9} {min(notified):>5}-{max(notified):<5} {rss}")
+        print(f"{'':>7} separate processes would send {single['cold'] * count} cold / {single['warm'] * count} warm requests")
+
+    await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared polling across tenants")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--creators", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds added to every fake response")
+    parser.add_argument("--live-rate", type=float, default=0.2, help="fraction of Twitch creators live at start")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="fraction of creators changing before the warm tick")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
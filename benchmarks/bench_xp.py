@@ -0,0 +1,241 @@
+"""
+StreamNotify+ XP / Economy Benchmark Suite
+Drives the bot's own add_xp, get_user_data, update_user_data, leaderboard ranking and /pay
+transfer paths against a temporary store of synthetic users, with synthetic message streams
+(a few chatty authors, a long tail of quiet ones). Each user count runs in a fresh process.
+
+Reports ops/s, p50/p99 latency, bytes written (during each scenario and by the final
+write-behind flush) and peak RSS, and writes the results as JSON
+so storage changes can be compared run to run:
+
+    python benchmarks/bench_xp.py --output before.json
+    python benchmarks/bench_xp.py --output after.json --compare before.json
+
+Usage: python benchmarks/bench_xp.py [--users 1000 100000 1000000] [--ops 20000] [--format json|binary]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Members of the synthetic guild the leaderboard is computed for
+GUILD_MEMBERS = 5000
+
+# Concurrent message handlers, like bursts of gateway events
+CONCURRENCY = 50
+
+def read_proc_status(field):
+    """Return a /proc/self/status value in kB, or None off Linux"""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith(field))
+    except (OSError, StopIteration):
+        return None
+
+def bytes_written():
+    """Return the bytes this process has written so far, or None off Linux"""
+    try:
+        with open("/proc/self/io") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("wchar"))
+    except (OSError, StopIteration):
+        return None
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(len(values) * fraction + 0.5) - 1))]
+
+def message_authors(user_ids, count, rng):
+    """Yield message authors: 20% of the users send 80% of the messages"""
+    chatty = user_ids[:max(1, len(user_ids) // 5)]
+    for _ in range(count):
+        yield rng.choice(chatty) if rng.random() < 0.8 else rng.choice(user_ids)
+
+async def measure(name, operations, concurrency=CONCURRENCY):
+    """Run the awaitables produced by operations with bounded concurrency; return a result row"""
+    latencies = []
+    iterator = iter(operations)
+    written = bytes_written()
+
+    async def worker():
+        for operation in iterator:
+            started = time.perf_counter()
+            await operation()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    after = bytes_written()
+    return {
+        "name": name,
+        "ops": len(latencies),
+        "seconds": elapsed,
+        "ops_per_second": len(latencies) / elapsed if elapsed else None,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "bytes_written": after - written if written is not None and after is not None else None
+    }
+
+async def run_child(users, ops, users_format, seed):
+    """Benchmark one user count in this process and return its results"""
+    import storage
+    import economy
+    import app
+    from user_table import UserTable
+
+    rng = random.Random(seed)
+    directory = tempfile.mkdtemp(prefix="bench-xp-")
+    users_path = os.path.join(directory, "users.json")
+
+    # Seed the store file directly: building 1M users through add_xp would dominate the run
+    table = UserTable()
+    for i in range(users):
+        xp = rng.randint(0, 50000)
+        table.append_row(1100000000000000000 + i, xp, xp // 100 + 1, 1000, -1)
+    if users_format == "binary":
+        import snapshot
+        snapshot_path = os.path.join(directory, "users.bin")
+        snapshot.write_table(snapshot_path, table)
+    else:
+        snapshot_path = None
+        storage._write_user_table(users_path, table)
+    user_ids = [str(user_id) for user_id in table.ids]
+    del table
+
+    # Point the bot's globals at the temporary store
+    app.user_store = storage.UserStore(users_path, snapshot_path=snapshot_path)
+    app.bank = economy.Economy(app.user_store, os.path.join(directory, "ledger.jsonl"))
+
+    results = []
+    started = time.perf_counter()
+    await app.user_store.load()
+    load_seconds = time.perf_counter() - started
+
+    # Synthetic message stream through the on_message XP path
+    authors = list(message_authors(user_ids, ops, rng))
+    results.append(await measure("add_xp", (lambda user_id=user_id: app.add_xp(user_id, rng.randint(5, 15)) for user_id in authors)))
+
+    # /rank and /balance lookups
+    lookups = [rng.choice(user_ids) for _ in range(ops)]
+    results.append(await measure("get_user_data", (lambda user_id=user_id: app.get_user_data(user_id) for user_id in lookups)))
+
+    # Whole-record replacement
+    async def update(user_id):
+        data = await app.get_user_data(user_id)
+        data["balance"] += 1
+        await app.update_user_data(user_id, data)
+    results.append(await measure("update_user_data", (lambda user_id=user_id: update(user_id) for user_id in lookups[:ops // 4])))
+
+    # /pay between random members
+    pairs = [rng.sample(user_ids, 2) for _ in range(ops // 2)]
+
+    async def pay(sender, recipient):
+        try:
+            await app.bank.transfer(sender, recipient, rng.randint(1, 50))
+        except economy.InsufficientFunds:
+            pass
+    results.append(await measure("pay", (lambda pair=pair: pay(*pair) for pair in pairs)))
+
+    # /leaderboard: full ranking then the top 10 guild members (without the render cache)
+    class Member:
+        def __init__(self, user_id):
+            self.id = int(user_id)
+
+    class Guild:
+        members = [Member(user_id) for user_id in rng.sample(user_ids, min(GUILD_MEMBERS, len(user_ids)))]
+
+    async def leaderboard():
+        ranked = await app.user_store.ranked()
+        return await app.member_cache.resolve_ranked_members(Guild, ranked, 10)
+    rounds = max(3, min(200, 2000000 // max(users, 1)))
+    results.append(await measure("leaderboard", (leaderboard for _ in range(rounds)), concurrency=1))
+
+    # Final write-behind flush
+    written = bytes_written()
+    started = time.perf_counter()
+    await app.user_store.flush()
+    await app.bank.flush()
+    flush_seconds = time.perf_counter() - started
+    after = bytes_written()
+
+    return {
+        "users": users,
+        "format": users_format,
+        "load_seconds": load_seconds,
+        "flush_seconds": flush_seconds,
+        "flush_bytes": after - written if written is not None and after is not None else None,
+        "store_file_bytes": os.path.getsize(snapshot_path or users_path),
+        "peak_rss_mb": (read_proc_status("VmHWM") or 0) / 1024,
+        "operations": results
+    }
+
+def print_results(run, previous=None):
+    """Print one user count's results, with the change from a previous run if given"""
+    print(f"\n{run['users']:,} users ({run['format']}): load {run['load_seconds']:.2f} s, "
+          f"final flush {run['flush_seconds']:.2f} s / {(run['flush_bytes'] or 0) / 2**20:.1f} MB, peak RSS {run['peak_rss_mb']:.1f} MB")
+    print(f"  {'operation':<18} {'ops/s':>12} {'p50':>10} {'p99':>10} {'written':>12}")
+    before = {row["name"]: row for row in previous["operations"]} if previous else {}
+    for row in run["operations"]:
+        written = f"{row['bytes_written'] / 2**20:.1f} MB" if row["bytes_written"] is not None else "-"
+        line = f"  {row['name']:<18} {row['ops_per_second']:>12,.0f} {row['p50_ms']:>8.3f}ms {row['p99_ms']:>8.3f}ms {written:>12}"
+        if row["name"] in before:
+            change = row["ops_per_second"] / before[row["name"]]["ops_per_second"] - 1
+            line += f"   ({change:+.0%} ops/s)"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--ops", type=int, default=20000, help="operations per scenario")
+    parser.add_argument("--format", choices=("json", "binary"), default="json", help="user store format")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="previous --output file to compare with")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(asyncio.run(run_child(args.child, args.ops, args.format, args.seed))))
+        return
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = {run["users"]: run for run in json.load(f)["runs"]}
+
+    runs = []
+    for users in args.users:
+        # A fresh interpreter per size keeps peak RSS and caches independent
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(users), "--ops", str(args.ops),
+             "--format", args.format, "--seed", str(args.seed)],
+            check=True, capture_output=True, text=True, cwd=ROOT
+        )
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        runs.append(run)
+        print_results(run, previous.get(users))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "ops": args.ops,
+                "runs": runs
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
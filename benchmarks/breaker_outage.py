@@ -0,0 +1,66 @@
+"""
+StreamNotify+ Circuit Breaker Outage Simulation
+Replays a poller against a simulated platform outage (429s, then recovery) and a creator
+whose handle disappeared, counting the requests sent with and without circuit breakers.
+
+Usage: python benchmarks/breaker_outage.py [--creators 20] [--hours 24] [--outage 6]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import breaker
+
+TICK = 600
+
+def platform_status(now, creator, outage_end):
+    """Return the HTTP status the simulated platform answers"""
+    if now < outage_end:
+        return 429
+    if creator == "deleted":
+        return 404
+    return 200
+
+def simulate(creators, hours, outage_hours, use_breakers):
+    """Return (requests sent, requests that failed) over the simulated period"""
+    breaker._breakers.clear()
+    host = breaker.for_host(f"simulated-{use_breakers}")
+    outage_end = outage_hours * 3600
+    sent = failed = 0
+    for now in range(0, hours * 3600, TICK):
+        if use_breakers and not host.allow(now):
+            continue
+        for name in creators:
+            creator = breaker.for_creator("simulated", f"{use_breakers}-{name}")
+            if use_breakers and not creator.allow(now):
+                continue
+            sent += 1
+            status = platform_status(now, name, outage_end)
+            if status == 200:
+                if use_breakers:
+                    host.success()
+                    creator.success()
+                continue
+            failed += 1
+            if use_breakers and breaker.record_status(host, creator, status, now=now):
+                break
+    return sent, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Circuit breaker outage simulation")
+    parser.add_argument("--creators", type=int, default=20)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--outage", type=int, default=6)
+    args = parser.parse_args()
+
+    creators = [f"creator{i}" for i in range(args.creators - 1)] + ["deleted"]
+    print(f"{args.creators} creators polled every {TICK // 60} min for {args.hours} h; "
+          f"{args.outage} h of HTTP 429 then one handle answers 404")
+    for use_breakers in (False, True):
+        sent, failed = simulate(creators, args.hours, args.outage, use_breakers)
+        print(f"  {'with breakers' if use_breakers else 'without breakers':<17} {sent:>6} requests, {failed:>6} wasted on errors")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+StreamNotify+ Config Editing Sessions
+Simulates admins editing creator panels at the same time, each changing different settings
+(so every change should survive), then two admins changing the same setting. Compares the
+former panels (configuration captured when the panel opens, saved on every click) with edit
+sessions (a draft per panel, one compare-and-swap commit): config writes, lost changes and
+reported conflicts.
+
+Usage: python benchmarks/config_sessions.py [--admins 8] [--creators 20] [--clicks 6]
+"""
+import os
+import sys
+import random
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+import config_edits
+
+SETTINGS = ("enabled", "message", "channel_id", "ping")
+
+def build_config(creators):
+    return {"twitch": {
+        f"creator{i}": {"enabled": True, "message": "{user} est en live : {link}", "channel_id": None, "ping": ""}
+        for i in range(creators)
+    }}
+
+def plan_edits(args, rng):
+    """Give each admin one creator and clicks on settings no other admin of that creator touches"""
+    plans = []
+    for admin in range(args.admins):
+        taken = {}
+        for other, edits in plans:
+            taken.setdefault(other, set()).update(setting for setting, _ in edits)
+        # Creators whose settings are all taken are left out
+        creators = [f"creator{i}" for i in range(args.creators) if len(taken.get(f"creator{i}", ())) < len(SETTINGS)]
+        if not creators:
+            break
+        creator = rng.choice(creators)
+        free = [setting for setting in SETTINGS if setting not in taken.get(creator, ())]
+        edits = []
+        for click in range(args.clicks):
+            setting = rng.choice(free)
+            value = {"enabled": click % 2 == 0, "message": f"admin {admin} clic {click} : {{link}}",
+                     "channel_id": str(900000 + admin * 100 + click), "ping": f"<@&{admin}{click}>"}[setting]
+            edits.append((setting, value))
+        plans.append((creator, edits))
+    return plans
+
+async def captured_panel(store, creator, edits, rng):
+    """The former panel: config loaded when it opens, whole config saved on every click"""
+    config = await store.load()
+    for setting, value in edits:
+        await asyncio.sleep(rng.uniform(0, 0.01))
+        config["twitch"][creator][setting] = value
+        await store.save(config)
+    return []
+
+async def session_panel(store, creator, edits, rng):
+    """An edit session: clicks change the draft, one commit at the end"""
+    session = await config_edits.EditSession.open(store, "twitch", creator)
+    for setting, value in edits:
+        await asyncio.sleep(rng.uniform(0, 0.01))
+        session.set(setting, value)
+    return await session.commit()
+
+async def run_scenario(name, panel, plans, args, directory):
+    store = storage.ConfigStore(os.path.join(directory, f"{name}.json"), build_config(args.creators))
+    await store.load()
+    rng = random.Random(2)
+    conflicts = await asyncio.gather(*(panel(store, creator, edits, rng) for creator, edits in plans))
+    final = await store.load()
+
+    # Every admin's last value of each setting should be in the final configuration
+    expected = {}
+    for creator, edits in plans:
+        for setting, value in edits:
+            expected[(creator, setting)] = value
+    lost = sum(1 for (creator, setting), value in expected.items() if final["twitch"][creator][setting] != value)
+    return store.version, lost, len(expected), sum(1 for found in conflicts if found)
+
+async def same_setting(panel, directory, name):
+    """Two admins open the same creator and both change its ping; return (final ping, conflicts reported)"""
+    store = storage.ConfigStore(os.path.join(directory, f"{name}-same.json"), build_config(1))
+    rng = random.Random(3)
+    first, second = await asyncio.gather(
+        panel(store, "creator0", [("ping", "@everyone")], rng),
+        panel(store, "creator0", [("ping", "@here")], rng)
+    )
+    return (await store.load())["twitch"]["creator0"]["ping"], [found for found in (first, second) if found]
+
+async def run(args):
+    directory = tempfile.mkdtemp(prefix="bench-config-")
+    plans = plan_edits(args, random.Random(1))
+    print(f"{len(plans)} admins editing {args.creators} creators, {args.clicks} clicks each, no two on the same setting")
+    print(f"\n  {'panel':<22} {'writes':>7} {'lost changes':>13} {'conflicts':>10}")
+    for name, panel in (("captured config", captured_panel), ("edit session", session_panel)):
+        writes, lost, total, conflicts = await run_scenario(name.split()[0], panel, plans, args, directory)
+        print(f"  {name:<22} {writes:>7} {lost:>7} / {total:<5} {conflicts:>10}")
+
+    print("\nTwo admins change the same ping at the same time")
+    for name, panel in (("captured config", captured_panel), ("edit session", session_panel)):
+        ping, conflicts = await same_setting(panel, directory, name.split()[0])
+        reported = f"conflict reported on {conflicts[0]}" if conflicts else "no conflict reported"
+        print(f"  {name:<22} final ping {ping!r}, {reported}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Config editing sessions")
+    parser.add_argument("--admins", type=int, default=8)
+    parser.add_argument("--creators", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=6)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
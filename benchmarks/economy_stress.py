@@ -0,0 +1,104 @@
+"""
+StreamNotify+ Economy Stress Test
+Runs concurrent /pay transfers, XP writes and airdrops against a temporary store
+and checks that the total supply is conserved.
+
+Usage: python benchmarks/economy_stress.py [--users 200] [--transfers 20000]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+import economy
+
+async def run(users, transfers, concurrency, seed):
+    """Run the stress scenario and return True when the supply is conserved"""
+    random.seed(seed)
+    storage.USER_FLUSH_DELAY = 0.05
+    economy.LEDGER_FLUSH_DELAY = 0.05
+    directory = tempfile.mkdtemp(prefix="economy-stress-")
+    store = storage.UserStore(os.path.join(directory, "users.json"))
+    bank = economy.Economy(store, os.path.join(directory, "ledger.jsonl"))
+
+    user_ids = [str(100000 + i) for i in range(users)]
+    initial = 1000
+    await bank.airdrop(user_ids, initial, reason="stress seed")
+    expected = initial * users
+
+    completed = 0
+    rejected = 0
+
+    async def pay_worker(count):
+        nonlocal completed, rejected
+        for _ in range(count):
+            sender, recipient = random.sample(user_ids, 2)
+            try:
+                await bank.transfer(sender, recipient, random.randint(1, 300))
+                completed += 1
+            except economy.InsufficientFunds:
+                rejected += 1
+            # Yield so transfers interleave with each other and with XP writes
+            await asyncio.sleep(0)
+
+    async def xp_worker(count):
+        for _ in range(count):
+            async with store.edit(random.choice(user_ids)) as record:
+                record["xp"] += random.randint(5, 15)
+            await asyncio.sleep(0)
+
+    async def airdrop_worker():
+        nonlocal expected
+        for _ in range(5):
+            await bank.airdrop(user_ids, 10, reason="stress airdrop")
+            expected += 10 * users
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    per_worker = transfers // concurrency
+    await asyncio.gather(
+        *[pay_worker(per_worker) for _ in range(concurrency)],
+        *[xp_worker(per_worker) for _ in range(concurrency // 2 or 1)],
+        airdrop_worker()
+    )
+    elapsed = time.perf_counter() - started
+
+    await bank.flush()
+    await store.flush()
+
+    supply = await bank.total_supply()
+    negative = [user_id for user_id, record in (await store.all_users()).items() if record["balance"] < 0]
+
+    # The persisted file must agree with memory
+    reloaded = storage.UserStore(store.path)
+    persisted = sum(record["balance"] for record in (await reloaded.all_users()).values())
+
+    with open(bank.ledger.path, encoding="utf-8") as f:
+        ledger_entries = sum(1 for _ in f)
+
+    print(f"transfers: {completed} applied, {rejected} rejected in {elapsed:.2f}s ({completed / elapsed:.0f}/s)")
+    print(f"ledger entries: {ledger_entries}")
+    print(f"supply: expected {expected}, in memory {supply}, on disk {persisted}")
+
+    ok = supply == expected and persisted == expected and not negative
+    print("OK: total supply conserved" if ok else f"FAIL: supply mismatch or negative balances ({len(negative)})")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--transfers", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.users, args.transfers, args.concurrency, args.seed))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
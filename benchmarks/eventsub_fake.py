@@ -0,0 +1,98 @@
+"""
+StreamNotify+ EventSub Fake Delivery Check
+Posts locally signed EventSub messages to the /eventsub route through Flask's test client:
+challenge handshake, valid notifications, bad signatures, stale timestamps and redeliveries,
+then times signature verification for a burst of notifications.
+
+Usage: python benchmarks/eventsub_fake.py [--burst 2000]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import datetime
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("EVENTSUB_SECRET", "local-test-secret")
+
+import eventsub
+import web
+
+SECRET = os.environ["EVENTSUB_SECRET"]
+
+def online_payload(login, user_id):
+    """Return a stream.online notification body"""
+    return {
+        "subscription": {"id": "sub-online", "type": "stream.online", "version": "1", "status": "enabled",
+                         "condition": {"broadcaster_user_id": user_id}},
+        "event": {"id": "9001", "broadcaster_user_id": user_id, "broadcaster_user_login": login,
+                  "broadcaster_user_name": login, "type": "live", "started_at": "2026-10-19T10:00:00Z"}
+    }
+
+def post(client, message_type, payload, **kwargs):
+    """Post a signed message; return the response"""
+    headers, body = eventsub.signed_request(SECRET, message_type, payload, **kwargs)
+    return client.post("/eventsub", data=body, headers=headers)
+
+def main():
+    parser = argparse.ArgumentParser(description="EventSub fake delivery check")
+    parser.add_argument("--burst", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Stand-in for the bot loop: record the events handed over
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    received = []
+    delivered = threading.Event()
+
+    async def handler(subscription_type, event):
+        received.append((subscription_type, event["broadcaster_user_login"]))
+        delivered.set()
+
+    eventsub.receiver.attach(loop, handler)
+    client = web.app.test_client()
+    checks = []
+
+    def check(name, condition):
+        checks.append(condition)
+        print(f"{'ok  ' if condition else 'FAIL'} {name}")
+
+    response = post(client, "webhook_callback_verification", {"challenge": "pogchamp-kappa-360noscope", "subscription": {"id": "sub-online", "type": "stream.online"}})
+    check("challenge handshake echoes the challenge", response.status_code == 200 and response.get_data(as_text=True) == "pogchamp-kappa-360noscope")
+
+    response = post(client, "notification", online_payload("streamer", "1234"), message_id="msg-1")
+    delivered.wait(2)
+    check("signed notification is accepted and delivered", response.status_code == 204 and received == [("stream.online", "streamer")])
+
+    response = post(client, "notification", online_payload("streamer", "1234"), message_id="msg-1")
+    time.sleep(0.1)
+    check("redelivered message id is acknowledged but not delivered twice", response.status_code == 204 and len(received) == 1)
+
+    headers, body = eventsub.signed_request(SECRET, "notification", online_payload("streamer", "1234"))
+    headers[eventsub.MESSAGE_SIGNATURE] = eventsub.sign("wrong-secret", headers[eventsub.MESSAGE_ID], headers[eventsub.MESSAGE_TIMESTAMP], body)
+    check("bad signature is rejected", client.post("/eventsub", data=body, headers=headers).status_code == 403)
+
+    headers, body = eventsub.signed_request(SECRET, "notification", online_payload("streamer", "1234"))
+    check("tampered body is rejected", client.post("/eventsub", data=body.replace(b"streamer", b"attacker"), headers=headers).status_code == 403)
+
+    stale = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=11)).strftime("%Y-%m-%dT%H:%M:%S.123456789Z")
+    check("message older than 10 minutes is rejected", post(client, "notification", online_payload("streamer", "1234"), timestamp=stale).status_code == 403)
+
+    fresh = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.123456789Z")
+    check("nanosecond timestamps are accepted", post(client, "notification", online_payload("other", "5678"), timestamp=fresh).status_code == 204)
+
+    check("missing headers are rejected", client.post("/eventsub", data=b"{}").status_code == 400)
+
+    started = time.perf_counter()
+    for i in range(args.burst):
+        post(client, "notification", online_payload(f"streamer{i}", str(i)))
+    elapsed = time.perf_counter() - started
+    print(f"{args.burst} signed notifications through /eventsub in {elapsed:.2f} s ({args.burst / elapsed:,.0f}/s)")
+
+    loop.call_soon_threadsafe(loop.stop)
+    sys.exit(0 if all(checks) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+StreamNotify+ Fake Platform Server
+Local aiohttp stand-in for the APIs the pollers call: the Twitch OAuth token endpoint,
+Helix /users, /streams and /channels, YouTube search and playlistItems, and TikTok profile
+pages. Latency, error rate and 429 injection are configurable. Point the bot at it with:
+
+    TWITCH_AUTH_BASE=http://127.0.0.1:8090 TWITCH_API_BASE=http://127.0.0.1:8090
+    YOUTUBE_API_BASE=http://127.0.0.1:8090 TIKTOK_BASE=http://127.0.0.1:8090
+
+Creators whose name starts with "missing" do not exist on any platform.
+
+Usage: python benchmarks/fake_platforms.py [--port 8090] [--latency 0.05] [--error-rate 0] [--rate-limit-rate 0]
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import collections
+from aiohttp import web
+
+class FakePlatforms:
+    """Serves the three platforms from in-memory state that tests can advance between ticks"""
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=30, live_rate=0.2, seed=1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.live_rate = live_rate
+        self.rng = random.Random(seed)
+        # Requests served, keyed by endpoint, and injected failures
+        self.requests = collections.Counter()
+        self.injected = collections.Counter()
+        # login -> live, channel / creator -> latest video number
+        self.live = {}
+        self.videos = collections.defaultdict(int)
+
+    def application(self):
+        """Return the aiohttp application serving every endpoint"""
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_post("/oauth2/token", self.token)
+        app.router.add_get("/helix/users", self.helix_users)
+        app.router.add_get("/helix/streams", self.helix_streams)
+        app.router.add_get("/helix/channels", self.helix_channels)
+        app.router.add_get("/youtube/v3/search", self.youtube_search)
+        app.router.add_get("/youtube/v3/playlistItems", self.youtube_playlist_items)
+        app.router.add_get("/@{creator}", self.tiktok_profile)
+        return app
+
+    def reset_counters(self):
+        """Forget the request counts (e.g. between ticks)"""
+        self.requests.clear()
+        self.injected.clear()
+
+    def advance(self, change_rate, uploads=1):
+        """Change a fraction of the creators: streams start or stop and each posting creator posts uploads videos"""
+        for login in self.live:
+            if self.rng.random() < change_rate:
+                self.live[login] = not self.live[login]
+        for name in self.videos:
+            if self.rng.random() < change_rate:
+                self.videos[name] += uploads
+
+    @web.middleware
+    async def _faults(self, request, handler):
+        """Count the request, wait the configured latency and inject failures"""
+        self.requests[request.path if not request.path.startswith("/@") else "/@creator"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self.injected[429] += 1
+            return web.json_response({"error": "Too Many Requests"}, status=429, headers={"Retry-After": str(self.retry_after)})
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.injected[500] += 1
+            return web.json_response({"error": "Internal Server Error"}, status=500)
+        return await handler(request)
+
+    def _is_live(self, login):
+        if login not in self.live:
+            self.live[login] = self.rng.random() < self.live_rate
+        return self.live[login]
+
+    async def token(self, request):
+        return web.json_response({"access_token": "fake-token", "expires_in": 3600, "token_type": "bearer"})
+
+    async def helix_users(self, request):
+        login = request.query.get("login", "")
+        if not login or login.startswith("missing"):
+            return web.json_response({"data": []})
+        return web.json_response({"data": [{
+            "id": f"user:{login}",
+            "login": login,
+            "display_name": login,
+            "profile_image_url": f"https://static-cdn.example/{login}.png"
+        }]})
+
+    async def helix_streams(self, request):
+        login = request.query.get("user_id", "").partition(":")[2]
+        if not self._is_live(login):
+            return web.json_response({"data": []})
+        return web.json_response({"data": [{
+            "user_login": login,
+            "type": "live",
+            "game_name": "Just Chatting",
+            "title": f"Live de {login}"
+        }]})
+
+    async def helix_channels(self, request):
+        login = request.query.get("broadcaster_id", "").partition(":")[2]
+        return web.json_response({"data": [{"broadcaster_login": login, "game_name": "Just Chatting", "title": f"Live de {login}"}]})
+
+    def _video(self, channel_id, number=None):
+        number = self.videos[channel_id] if number is None else number
+        return f"{channel_id[-6:]}{number:05d}", f"Vidéo {number} de {channel_id}"
+
+    def _recent(self, name, count):
+        """Return the numbers of a creator's latest videos, newest first"""
+        latest = self.videos[name]
+        return range(latest, max(latest - count, -1), -1)
+
+    async def youtube_search(self, request):
+        if request.query.get("type") == "channel":
+            name = request.query.get("q", "")
+            if name.startswith("missing"):
+                return web.json_response({"items": []})
+            return web.json_response({"items": [{"id": {"kind": "youtube#channel", "channelId": f"UC{name}"}}]})
+        channel_id = request.query.get("channelId", "")
+        items = []
+        for number in self._recent(channel_id, int(request.query.get("maxResults", "5"))):
+            video_id, title = self._video(channel_id, number)
+            items.append({
+                "id": {"kind": "youtube#video", "videoId": video_id},
+                "snippet": {
+                    "title": title,
+                    "publishedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(1700000000 + number * 3600)),
+                    "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}}
+                }
+            })
+        return web.json_response({"items": items})
+
+    async def youtube_playlist_items(self, request):
+        # Uploads playlist of a channel: "UU" + the channel ID without its "UC"
+        video_id, title = self._video("UC" + request.query.get("playlistId", "")[2:])
+        return web.json_response({"items": [{"snippet": {"title": title, "resourceId": {"kind": "youtube#video", "videoId": video_id}}}]})
+
+    async def tiktok_profile(self, request):
+        creator = request.match_info["creator"]
+        if creator.startswith("missing"):
+            return web.Response(text="<html><body>Couldn't find this account</body></html>", content_type="text/html")
+        # The profile lists the first video pinned on top, then the latest ones, newest first
+        numbers = [0, *self._recent(creator, 10)] if self.videos[creator] else [0]
+        posts = [{"id": str(7300000000000000000 + number * 1000 + len(creator))} for number in dict.fromkeys(numbers)]
+        # Like the real page, the state also carries the author's and the music's IDs, which are not videos
+        user = {"id": str(6800000000000000000 + len(creator)), "uniqueId": creator}
+        music = {"id": str(7400000000000000000 + len(creator)), "title": "original sound"}
+        state = json.dumps({"UserModule": {"users": {creator: user}}, "MusicModule": {music["id"]: music},
+                            "ItemList": {"user-post": {"list": posts}}}, separators=(",", ":"))
+        return web.Response(text=f'<html><script id="SIGI_STATE">{state}</script></html>', content_type="text/html")
+
+async def start(platforms, host="127.0.0.1", port=0):
+    """Serve the fake platforms; return (runner, base URL)"""
+    runner = web.AppRunner(platforms.application(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Twitch / YouTube / TikTok server")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=30)
+    args = parser.parse_args()
+
+    platforms = FakePlatforms(args.latency, args.error_rate, args.rate_limit_rate, args.retry_after)
+    print(f"Fake platforms on http://127.0.0.1:{args.port}", file=sys.stderr)
+    web.run_app(platforms.application(), host="127.0.0.1", port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
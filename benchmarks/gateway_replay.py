@@ -0,0 +1,349 @@
+"""
+StreamNotify+ Gateway Replay
+Feeds gateway dispatch events (GUILD_CREATE, MESSAGE_CREATE, INTERACTION_CREATE) straight
+into the bot's connection state, without a Discord connection: the real on_message and
+slash command handlers run against a temporary store, and every REST call (channel sends,
+interaction responses, DMs) is answered locally.
+
+Reports end-to-end handler latency per event type and command, event loop lag and stalls,
+and user store flushes. Runs are deterministic for a given event file and seed: the fake
+REST answers instantly, so the delivery scheduler's per-channel send window is lifted and
+nothing waits on real time except the replay pacing (--speed 0 removes that too). The
+write-behind flush timers are not waited for; the final flush is measured on its own.
+
+Events are JSON lines shaped like gateway dispatches, plus the offset they arrived at:
+    {"at": 12.5, "t": "MESSAGE_CREATE", "d": {...}}
+Without a file, a synthetic hour of a busy server is generated (--save keeps it).
+
+Usage: python benchmarks/gateway_replay.py [events.jsonl] [--speed 60] [--duration 3600]
+                                           [--messages-per-minute 1200] [--commands-per-minute 60]
+                                           [--members 2000] [--seed 1] [--save events.jsonl]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import datetime
+import tempfile
+import collections
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.webhook.async_ import async_context
+import storage
+import economy
+import metrics
+import loop_monitor
+import app
+
+GUILD_ID = 900000000000000001
+CHANNEL_ID = 900000000000000002
+BOT_ID = 900000000000000003
+
+# Slash commands replayed, with their share of the command traffic
+COMMAND_MIX = (("rank", 0.4), ("balance", 0.25), ("leaderboard", 0.15), ("daily", 0.1), ("pay", 0.1))
+
+# How often the lag sampler expects to wake up
+LAG_SAMPLE_INTERVAL = 0.01
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(len(values) * fraction + 0.5) - 1))]
+
+# Synthetic traffic
+def user_payload(user_id):
+    return {"id": str(user_id), "username": f"membre{user_id % 100000}", "discriminator": "0", "global_name": None, "avatar": None}
+
+def member_payload(user_id, joined_at):
+    return {"user": user_payload(user_id), "roles": [], "joined_at": joined_at, "deaf": False, "mute": False, "flags": 0}
+
+def guild_payload(members, joined_at):
+    """Return a GUILD_CREATE payload with one text channel and the given number of members"""
+    return {
+        "id": str(GUILD_ID),
+        "name": "Serveur de test",
+        "owner_id": str(GUILD_ID + 10),
+        "member_count": members,
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "104324673", "position": 0,
+                   "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(CHANNEL_ID), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}],
+        "members": [member_payload(GUILD_ID + 10 + i, joined_at) for i in range(members)],
+        "features": [],
+        "emojis": [],
+        "stickers": []
+    }
+
+def synthetic_events(duration, messages_per_minute, commands_per_minute, members, seed):
+    """Yield an hour (or duration seconds) of chat and slash commands; a fifth of the members write most messages"""
+    rng = random.Random(seed)
+    started = datetime.datetime(2026, 1, 1, 20, 0, tzinfo=datetime.timezone.utc)
+    joined_at = (started - datetime.timedelta(days=30)).isoformat()
+    member_ids = [GUILD_ID + 10 + i for i in range(members)]
+    chatty = member_ids[:max(1, members // 5)]
+    names, weights = zip(*COMMAND_MIX)
+    yield {"at": 0.0, "t": "GUILD_CREATE", "d": guild_payload(members, joined_at)}
+
+    # Merge two Poisson processes: messages and commands
+    rates = (messages_per_minute / 60, commands_per_minute / 60)
+    next_at = [rng.expovariate(rate) if rate else float("inf") for rate in rates]
+    sequence = 0
+    while min(next_at) < duration:
+        kind = 0 if next_at[0] <= next_at[1] else 1
+        at = next_at[kind]
+        next_at[kind] += rng.expovariate(rates[kind])
+        sequence += 1
+        moment = started + datetime.timedelta(seconds=at)
+        snowflake = str(discord.utils.time_snowflake(moment) + sequence % 4096)
+        author = rng.choice(chatty) if rng.random() < 0.8 else rng.choice(member_ids)
+        if kind == 0:
+            yield {"at": at, "t": "MESSAGE_CREATE", "d": {
+                "id": snowflake, "channel_id": str(CHANNEL_ID), "guild_id": str(GUILD_ID),
+                "author": user_payload(author), "member": member_payload(author, joined_at),
+                "content": "gg " * rng.randint(1, 20), "timestamp": moment.isoformat(), "edited_timestamp": None,
+                "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+                "embeds": [], "pinned": False, "type": 0
+            }}
+            continue
+        name = rng.choices(names, weights)[0]
+        data = {"id": str(BOT_ID + 1 + names.index(name)), "name": name, "type": 1}
+        if name == "pay":
+            recipient = rng.choice(member_ids)
+            data["options"] = [{"name": "user", "type": 6, "value": str(recipient)},
+                               {"name": "amount", "type": 4, "value": rng.randint(1, 100)}]
+            data["resolved"] = {"users": {str(recipient): user_payload(recipient)},
+                                "members": {str(recipient): {"roles": [], "joined_at": joined_at, "permissions": "0", "flags": 0}}}
+        yield {"at": at, "t": "INTERACTION_CREATE", "d": {
+            "id": snowflake, "application_id": str(BOT_ID), "type": 2, "token": f"token-{snowflake}", "version": 1,
+            "guild_id": str(GUILD_ID), "channel_id": str(CHANNEL_ID), "member": dict(member_payload(author, joined_at), permissions="0"),
+            "app_permissions": "0", "locale": "fr", "guild_locale": "fr", "data": data
+        }}
+
+# Local answers to the bot's REST calls
+class FakeDiscord:
+    """Answers REST requests and interaction callbacks, timing the first response to each interaction"""
+
+    def __init__(self):
+        self.requests = collections.Counter()
+        self.responded_at = {}
+        self._ids = 0
+
+    def _message(self, channel_id, payload):
+        self._ids += 1
+        return {
+            "id": str(BOT_ID + self._ids), "channel_id": str(channel_id), "author": user_payload(BOT_ID),
+            "content": (payload or {}).get("content") or "", "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [], "mention_roles": [],
+            "attachments": [], "embeds": (payload or {}).get("embeds") or [], "pinned": False, "type": 0
+        }
+
+    async def request(self, route, **kwargs):
+        """Stand-in for discord.http.HTTPClient.request"""
+        self.requests[f"{route.method} {route.path}"] += 1
+        if route.method == "POST" and route.path == "/users/@me/channels":
+            recipient = kwargs["json"]["recipient_id"]
+            return {"id": str(int(recipient) + 1), "type": 1, "recipients": [user_payload(int(recipient))]}
+        if route.method == "POST" and route.path == "/channels/{channel_id}/messages":
+            return self._message(route.channel_id, kwargs.get("json"))
+        return {}
+
+    async def create_interaction_response(self, interaction_id, token, **kwargs):
+        self.requests["POST /interactions/{id}/{token}/callback"] += 1
+        self.responded_at.setdefault(int(interaction_id), time.perf_counter())
+
+    def __getattr__(self, name):
+        # Follow-ups and edits of interaction responses
+        async def webhook_call(*args, **kwargs):
+            self.requests[name] += 1
+            return self._message(CHANNEL_ID, None)
+        return webhook_call
+
+async def sample_lag(samples, stop):
+    """Record how late the loop wakes up a sleeper, until stop is set"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - started - LAG_SAMPLE_INTERVAL))
+
+def histogram_totals(histogram):
+    """Return (count, sum) of an unlabelled histogram"""
+    child = histogram._child({})
+    return child.count, child.sum
+
+async def replay(events, speed, seed):
+    """Replay events into the bot and return the measurements"""
+    random.seed(seed)
+    bot = app.bot
+    await bot._async_setup_hook()
+    state = bot._connection
+    state.user = discord.ClientUser(state=state, data=dict(user_payload(BOT_ID), bot=True, mfa_enabled=False, verified=True, flags=0))
+    state.application_id = BOT_ID
+
+    fake = FakeDiscord()
+    bot.http.request = fake.request
+    async_context.set(fake)
+
+    directory = tempfile.mkdtemp(prefix="gateway-replay-")
+    app.user_store = storage.UserStore(os.path.join(directory, "users.json"))
+    app.bank = economy.Economy(app.user_store, os.path.join(directory, "ledger.jsonl"))
+
+    # Time every listener from the moment it was dispatched
+    latencies = collections.defaultdict(list)
+    pending = set()
+    run_event = bot._run_event
+
+    def schedule_event(coro, event_name, *args, **kwargs):
+        queued = time.perf_counter()
+
+        async def timed():
+            await run_event(coro, event_name, *args, **kwargs)
+            latencies[event_name].append(time.perf_counter() - queued)
+        task = bot.loop.create_task(timed(), name=f"replay: {event_name}")
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        return task
+    bot._schedule_event = schedule_event
+
+    loop_monitor.start()
+    # Long-lived workers, started before task tracking so the replay does not wait for them; sends are
+    # answered locally, so holding them to Discord's per-channel window would only measure the window
+    app.delivery.scheduler.route_limit = float("inf")
+    app.delivery.scheduler.start()
+    lag_samples = []
+    stop = asyncio.Event()
+    sampler = asyncio.ensure_future(sample_lag(lag_samples, stop))
+
+    # Slash commands (and store flushes) run in tasks created outside dispatch; wait for those too
+    fed_at = {}
+    commands = {}
+    loop = asyncio.get_running_loop()
+    create_task = loop.create_task
+
+    def tracked_create_task(coro, **kwargs):
+        task = create_task(coro, **kwargs)
+        # Write-behind timers sleep in real time; the final flush below is measured instead
+        if getattr(coro, "__qualname__", "").endswith("._delayed_flush"):
+            return task
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        return task
+    loop.create_task = tracked_create_task
+    flushes_before = histogram_totals(metrics.USER_STORE_FLUSH_SECONDS)
+    bytes_before = histogram_totals(metrics.USER_STORE_FLUSH_BYTES)
+
+    counts = collections.Counter()
+    started = time.perf_counter()
+    for event in events:
+        if speed:
+            delay = started + event["at"] / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        kind, data = event["t"], event["d"]
+        counts[kind] += 1
+        if kind == "GUILD_CREATE":
+            state._add_guild_from_data(data)
+            continue
+        if kind == "INTERACTION_CREATE":
+            fed_at[int(data["id"])] = time.perf_counter()
+            commands[int(data["id"])] = data["data"]["name"]
+        state.parsers[kind](data)
+        # Let handlers run between events, as reading the socket would
+        await asyncio.sleep(0)
+
+    fed = time.perf_counter() - started
+    while pending:
+        await asyncio.gather(*list(pending), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    loop.create_task = create_task
+
+    flush_started = time.perf_counter()
+    await app.user_store.flush()
+    await app.bank.flush()
+    final_flush = time.perf_counter() - flush_started
+
+    for interaction_id, responded in fake.responded_at.items():
+        latencies[f"/{commands[interaction_id]}"].append(responded - fed_at[interaction_id])
+    flushes_after = histogram_totals(metrics.USER_STORE_FLUSH_SECONDS)
+    bytes_after = histogram_totals(metrics.USER_STORE_FLUSH_BYTES)
+    lag_samples.sort()
+    monitor = loop_monitor.snapshot()
+    return {
+        "events": dict(counts),
+        "seconds": elapsed,
+        "fed_seconds": fed,
+        "unanswered_interactions": len(fed_at) - len(fake.responded_at),
+        "latency": {
+            name: {"count": len(values), "p50_ms": percentile(sorted(values), 0.5) * 1000,
+                   "p99_ms": percentile(sorted(values), 0.99) * 1000, "max_ms": max(values) * 1000}
+            for name, values in sorted(latencies.items())
+        },
+        "loop_lag": {"p50_ms": percentile(lag_samples, 0.5) * 1000, "p99_ms": percentile(lag_samples, 0.99) * 1000,
+                     "max_ms": (lag_samples[-1] if lag_samples else 0) * 1000, "stalls": monitor["stalls"],
+                     "offenders": [offender["culprit"] for offender in monitor["offenders"][:3]]},
+        "storage": {"flushes": flushes_after[0] - flushes_before[0], "flush_seconds": flushes_after[1] - flushes_before[1],
+                    "bytes_written": bytes_after[1] - bytes_before[1], "final_flush_seconds": final_flush,
+                    "users": len(await app.user_store.ranked())},
+        "rest_calls": dict(fake.requests),
+        "delivery": app.delivery.scheduler.snapshot()
+    }
+
+def print_report(result, span):
+    events = ", ".join(f"{count:,} {kind}" for kind, count in result["events"].items())
+    print(f"Replayed {events} ({span / 60:.0f} min of traffic) in {result['seconds']:.2f} s "
+          f"(fed in {result['fed_seconds']:.2f} s, handlers drained {result['seconds'] - result['fed_seconds']:.3f} s later)")
+    print(f"\n  {'handler':<26} {'count':>8} {'p50':>10} {'p99':>10} {'max':>10}")
+    for name, stats in result["latency"].items():
+        print(f"  {name:<26} {stats['count']:>8,} {stats['p50_ms']:>8.2f}ms {stats['p99_ms']:>8.2f}ms {stats['max_ms']:>8.2f}ms")
+    if result["unanswered_interactions"]:
+        print(f"  {result['unanswered_interactions']} interaction(s) never answered")
+    lag = result["loop_lag"]
+    print(f"\n  loop lag: p50 {lag['p50_ms']:.2f} ms, p99 {lag['p99_ms']:.2f} ms, max {lag['max_ms']:.1f} ms, {lag['stalls']} stall(s)")
+    for culprit in lag["offenders"]:
+        print(f"    blocked by {culprit}")
+    store = result["storage"]
+    print(f"  user store: {store['flushes']} flush(es), {store['bytes_written'] / 2**20:.1f} MB written in "
+          f"{store['flush_seconds']:.2f} s, final flush {store['final_flush_seconds'] * 1000:.0f} ms, {store['users']:,} users")
+    sends = ", ".join(f"{name} {stats['sent']} sent / {stats['shed']} shed / {stats['queued']} queued"
+                      for name, stats in result["delivery"].items() if any(stats.values()))
+    print(f"  delivery: {sends or 'nothing sent'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("events", nargs="?", help="JSON lines of recorded gateway events (synthetic if omitted)")
+    parser.add_argument("--speed", type=float, default=60, help="replay speed-up; 0 replays as fast as possible")
+    parser.add_argument("--duration", type=float, default=3600, help="seconds of synthetic traffic")
+    parser.add_argument("--messages-per-minute", type=float, default=1200)
+    parser.add_argument("--commands-per-minute", type=float, default=60)
+    parser.add_argument("--members", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the synthetic events to this file")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.events:
+        with open(args.events, encoding="utf-8") as f:
+            events = [json.loads(line) for line in f if line.strip()]
+    else:
+        events = list(synthetic_events(args.duration, args.messages_per_minute, args.commands_per_minute, args.members, args.seed))
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(event) + "\n" for event in events)
+
+    # One log line per level-up would dominate the run
+    logging.getLogger().setLevel(logging.ERROR)
+    result = asyncio.run(replay(events, args.speed, args.seed))
+    print_report(result, events[-1]["at"] if events else 0)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+StreamNotify+ Member Cache Memory Benchmark
+Compares the memory kept by discord.py for a large guild with the default member cache
+and with LIGHT_MEMBER_CACHE (no member cache, small on-demand LRU).
+
+Real discord.Member objects are built from a synthetic GUILD_CREATE payload, the way
+the library does when a guild is chunked at startup.
+
+Usage: python benchmarks/member_cache_memory.py [--members 10000 100000]
+"""
+import os
+import sys
+import gc
+import random
+import asyncio
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+GUILD_ID = 1000000000000000001
+BOT_ID = 1000000000000000002
+
+def member_payload(rng, user_id):
+    """Return a gateway member object shaped like the ones sent by Discord"""
+    return {
+        "user": {
+            "id": str(user_id),
+            "username": f"user{user_id % 100000000}",
+            "global_name": f"User {rng.randint(0, 999999)}",
+            "discriminator": "0",
+            "avatar": f"{rng.getrandbits(128):032x}" if rng.random() < 0.7 else None,
+            "bot": False
+        },
+        "nick": f"nick{rng.randint(0, 9999)}" if rng.random() < 0.2 else None,
+        "roles": [str(2000000000000000000 + rng.randint(0, 20)) for _ in range(rng.randint(0, 3))],
+        "joined_at": "2024-05-01T12:00:00.000000+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0
+    }
+
+def guild_payload(count, seed=1):
+    """Return a GUILD_CREATE payload with count members plus the bot"""
+    rng = random.Random(seed)
+    members = [member_payload(rng, 1100000000000000000 + i) for i in range(count)]
+    members.append(member_payload(rng, BOT_ID))
+    return {
+        "id": str(GUILD_ID),
+        "name": "Benchmark guild",
+        "member_count": count + 1,
+        "roles": [{"id": str(2000000000000000000 + i), "name": f"role{i}", "permissions": "0", "position": i, "color": 0, "hoist": False, "managed": False, "mentionable": False} for i in range(21)],
+        "channels": [],
+        "members": members,
+        "voice_states": [],
+        "presences": [],
+        "emojis": [],
+        "stickers": [],
+        "features": []
+    }
+
+def build_client(light):
+    """Return a client whose connection state uses the requested cache mode"""
+    intents = discord.Intents.default()
+    intents.members = True
+    options = {}
+    if light:
+        options = {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+    client = discord.Client(intents=intents, **options)
+    client._connection.user = discord.ClientUser(state=client._connection, data=member_payload(random.Random(0), BOT_ID)["user"])
+    return client
+
+def measure(payload, light):
+    """Return (retained bytes, cached members) after parsing the guild"""
+    client = build_client(light)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    guild = discord.Guild(data=payload, state=client._connection)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained, len(guild.members)
+
+async def lru_footprint(payload, size):
+    """Return the bytes retained by a full MemberLRU of real members"""
+    import member_cache
+    client = build_client(True)
+    guild = discord.Guild(data=payload, state=client._connection)
+    by_id = {int(data["user"]["id"]): data for data in payload["members"]}
+    state = client._connection
+
+    class FetchingGuild:
+        """Stands in for the guild: nothing cached, fetch_member builds members like the API would"""
+        id = guild.id
+
+        def get_member(self, user_id):
+            return None
+
+        async def fetch_member(self, user_id):
+            return discord.Member(data=by_id[user_id], guild=guild, state=state)
+
+    fetching_guild = FetchingGuild()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cache = member_cache.MemberLRU(maxsize=size)
+    for user_id in list(by_id)[:size]:
+        await cache.get(fetching_guild, user_id)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return retained, len(cache)
+
+def main():
+    parser = argparse.ArgumentParser(description="Member cache memory benchmark")
+    parser.add_argument("--members", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lru-size", type=int, default=512)
+    args = parser.parse_args()
+
+    print(f"{'members':>10} {'full cache':>14} {'light':>14} {'LRU (' + str(args.lru_size) + ')':>14} {'saved':>8}")
+    for count in args.members:
+        payload = guild_payload(count)
+        full, full_cached = measure(payload, light=False)
+        light, light_cached = measure(payload, light=True)
+        lru, lru_cached = asyncio.run(lru_footprint(payload, min(args.lru_size, count)))
+        assert full_cached == count + 1 and light_cached == 1 and lru_cached == min(args.lru_size, count)
+        saved = 1 - (light + lru) / full
+        print(f"{count:>10} {full / 1e6:>11.1f} MB {light / 1e6:>11.1f} MB {lru / 1e6:>11.1f} MB {saved:>7.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+StreamNotify+ Render Cache Burst Benchmark
+Fires a burst of identical leaderboard renders at the render cache, the way a busy
+server spams /leaderboard, and counts how many times the ranking is actually computed.
+
+Usage: python benchmarks/render_cache_burst.py [--users 200000] [--burst 50]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from user_table import UserTable
+from render_cache import RenderCache
+
+def build_table(count, seed=1):
+    """Return a UserTable of synthetic users"""
+    rng = random.Random(seed)
+    table = UserTable()
+    for i in range(count):
+        xp = rng.randint(0, 50000)
+        table.append_row(1100000000000000000 + i, xp, xp // 100 + 1, rng.randint(0, 10000), -1)
+    return table
+
+async def run(table, burst):
+    """Return (seconds uncached, seconds cached, builds) for one burst"""
+    computations = 0
+
+    async def render():
+        nonlocal computations
+        computations += 1
+        embed = discord.Embed(title="Classement du serveur", color=discord.Color.gold())
+        for i, (user_id, xp, level) in enumerate(table.ranked()[:10], 1):
+            embed.add_field(name=f"{i}. {user_id}", value=f"Niveau {level} • {xp} XP", inline=False)
+        # Let the other requests of the burst arrive while this one is being built
+        await asyncio.sleep(0)
+        return embed
+
+    started = time.perf_counter()
+    for _ in range(burst):
+        await render()
+    uncached = time.perf_counter() - started
+
+    computations = 0
+    cache = RenderCache(ttl=30)
+    started = time.perf_counter()
+    embeds = await asyncio.gather(*(cache.embed(("leaderboard", 1), 0, render) for _ in range(burst)))
+    cached = time.perf_counter() - started
+    assert all(embed.to_dict() == embeds[0].to_dict() for embed in embeds)
+    return uncached, cached, computations
+
+def main():
+    parser = argparse.ArgumentParser(description="Render cache burst benchmark")
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--burst", type=int, default=50)
+    args = parser.parse_args()
+
+    table = build_table(args.users)
+    uncached, cached, computations = asyncio.run(run(table, args.burst))
+    print(f"{args.burst} concurrent /leaderboard renders over {args.users} users")
+    print(f"  without cache: {uncached * 1000:9.1f} ms ({args.burst} computations)")
+    print(f"  with cache:    {cached * 1000:9.1f} ms ({computations} computation{'s' if computations != 1 else ''})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+StreamNotify+ Snapshot Startup Benchmark
+Measures cold-start time and peak RSS of loading the user table from users.json
+versus the binary snapshot, each in a fresh interpreter; "store" is the user store's
+own path (snapshot mapped, first lookup served from it).
+
+Usage: python benchmarks/snapshot_startup.py [--users 1000000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import snapshot
+
+# Code run in the child interpreter for each mode
+CHILD = r"""
+import sys, time, json
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+mode, path, probe = sys.argv[1], sys.argv[2], sys.argv[3]
+if mode == "json":
+    from user_table import UserTable
+    with open(path, encoding="utf-8") as f:
+        table = UserTable.from_dict(json.load(f))
+    record = table.get(probe)
+elif mode == "snapshot-load":
+    import snapshot
+    with snapshot.Snapshot(path) as snap:
+        table = snap.to_table()
+    record = table.get(probe)
+elif mode == "store":
+    import asyncio, storage
+    store = storage.UserStore(path + ".json", snapshot_path=path)
+    record = asyncio.run(store.get_user(probe))
+else:
+    import snapshot
+    snap = snapshot.Snapshot(path)
+    record = snap.get(probe)
+elapsed = time.perf_counter() - started
+assert record is not None
+# VmHWM is reset on exec, unlike ru_maxrss which would include the parent's peak
+with open("/proc/self/status") as f:
+    peak = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+print(json.dumps({{"seconds": elapsed, "peak_rss_kb": peak}}))
+"""
+
+def generate(json_path, count, seed=1):
+    """Write a synthetic users.json and return one existing user ID"""
+    rng = random.Random(seed)
+    users = {}
+    for _ in range(count):
+        xp = rng.randint(0, 50000)
+        users[str(rng.randrange(10**17, 13 * 10**17))] = {
+            "xp": xp,
+            "level": xp // 100 + 1,
+            "balance": rng.randint(0, 10000),
+            "daily_last": "2026-10-19" if rng.random() < 0.5 else None
+        }
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=2)
+    return next(iter(users))
+
+def run_child(mode, path, probe):
+    """Run one cold start and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT), mode, path, probe],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="snapshot-bench-")
+    json_path = os.path.join(directory, "users.json")
+    bin_path = os.path.join(directory, "users.bin")
+
+    probe = generate(json_path, args.users)
+    started = time.perf_counter()
+    snapshot.json_to_snapshot(json_path, bin_path)
+    print(f"{args.users} users: users.json {os.path.getsize(json_path) / 2**20:.1f} MB, "
+          f"users.bin {os.path.getsize(bin_path) / 2**20:.1f} MB (converted in {time.perf_counter() - started:.2f}s)")
+
+    print(f"{'mode':<16} {'cold start':>12} {'peak RSS':>12}")
+    for mode, path in (("json", json_path), ("snapshot-load", bin_path), ("snapshot-mmap", bin_path), ("store", bin_path)):
+        result = run_child(mode, path, probe)
+        print(f"{mode:<16} {result['seconds']:>10.3f} s {result['peak_rss_kb'] / 1024:>9.1f} MB")
+
+if __name__ == "__main__":
+    main()
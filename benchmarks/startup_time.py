@@ -0,0 +1,99 @@
+"""
+StreamNotify+ Startup Time
+Times the bot's setup_hook (state loading, command tree sync, HTTP pool warm-up) with a
+simulated global sync and a fake Twitch token endpoint: a first deploy (tree changed),
+a redeploy with the same tree (sync skipped), and the old sequential order for reference.
+
+Usage: python benchmarks/startup_time.py [--users 200000] [--sync-latency 1.5] [--http-latency 0.2]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("TWITCH_CLIENT_ID", "fake-client-id")
+os.environ.setdefault("TWITCH_CLIENT_SECRET", "fake-client-secret")
+
+import fake_platforms
+
+async def run(args):
+    platforms = fake_platforms.FakePlatforms(latency=args.http_latency)
+    runner, base_url = await fake_platforms.start(platforms)
+    os.environ["TWITCH_AUTH_BASE"] = base_url
+
+    import app
+    import storage
+    from user_table import UserTable
+
+    # setup_hook would start the pollers; only the startup work is timed here
+    for loop in (app.check_twitch_streams, app.check_youtube_videos, app.check_tiktok_videos):
+        loop.start = lambda *args, **kwargs: None
+    logging.getLogger().setLevel(logging.WARNING)
+
+    directory = tempfile.mkdtemp(prefix="bench-startup-")
+    users_path = os.path.join(directory, "users.json")
+    rng = random.Random(1)
+    table = UserTable()
+    for i in range(args.users):
+        xp = rng.randint(0, 50000)
+        table.append_row(1100000000000000000 + i, xp, xp // 100 + 1, 1000, -1)
+    storage._write_user_table(users_path, table)
+    sync_path = os.path.join(directory, "command_sync.json")
+
+    syncs = []
+
+    async def fake_sync(guild=None):
+        # A global bulk overwrite takes one slow, rate-limited request
+        await asyncio.sleep(args.sync_latency)
+        syncs.append(time.perf_counter())
+        return app.bot.tree.get_commands()
+    app.bot.tree.sync = fake_sync
+    app.bot._connection.application_id = 900000000000000003
+
+    def fresh_state():
+        """Cold process: nothing loaded, no token, no session"""
+        tenant = app.tenants.current()
+        tenant.config_store = storage.ConfigStore(os.path.join(directory, "config.json"), app.DEFAULT_CONFIG)
+        tenant.user_store = storage.UserStore(users_path)
+        app.command_sync_store = storage.ConfigStore(sync_path, {})
+        app.twitch_auth.update(token=None, expires_at=0)
+        app.http["session"] = None
+
+    async def sequential():
+        """The former on_ready order: one step after the other"""
+        await app.config_store.load()
+        await app.user_store.load()
+        await app.bot.tree.sync()
+        async with app.http_session() as session:
+            await app.get_twitch_headers(session)
+
+    print(f"{args.users:,} users, {args.sync_latency:.1f} s command sync, {args.http_latency * 1000:.0f} ms token request")
+    for name, startup in (("sequential, always syncing", sequential),
+                          ("setup_hook, tree changed", app.setup_hook),
+                          ("setup_hook, same tree", app.setup_hook)):
+        fresh_state()
+        before = len(syncs)
+        started = time.perf_counter()
+        await startup()
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<28} {elapsed:>6.2f} s  ({len(syncs) - before} sync)")
+        await app.close_http_session()
+
+    await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time")
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--sync-latency", type=float, default=1.5, help="seconds a global command sync takes")
+    parser.add_argument("--http-latency", type=float, default=0.2, help="seconds the token request takes")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
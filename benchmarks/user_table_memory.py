@@ -0,0 +1,68 @@
+"""
+StreamNotify+ User Table Memory Benchmark
+Compares the resident size of the dict-of-dicts user layout with the compact UserTable.
+
+Usage: python benchmarks/user_table_memory.py [--sizes 100000 1000000]
+"""
+import os
+import sys
+import gc
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_table import UserTable
+
+def synthetic_users(count, seed=1):
+    """Yield (user_id, record) pairs shaped like data/users.json"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        user_id = str(rng.randrange(100000000000000000, 1300000000000000000))
+        xp = rng.randint(0, 50000)
+        yield user_id, {
+            "xp": xp,
+            "level": xp // 100 + 1,
+            "balance": rng.randint(0, 10000),
+            "daily_last": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.6 else None
+        }
+
+def measure(build):
+    """Return the bytes still allocated by the object build() returns"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del data
+    return after - before
+
+def build_dicts(count):
+    """Baseline: what json.load returns"""
+    # Fresh string keys and values, as the JSON parser would produce
+    return {user_id: dict(record) for user_id, record in synthetic_users(count)}
+
+def build_table(count):
+    """Compact table"""
+    table = UserTable()
+    for user_id, record in synthetic_users(count):
+        table.set(user_id, record)
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'dict-of-dicts':>16} {'UserTable':>14} {'ratio':>7} {'bytes/user (dict → table)':>28}")
+    for count in args.sizes:
+        baseline = measure(lambda: build_dicts(count))
+        compact = measure(lambda: build_table(count))
+        print(f"{count:>10} {baseline / 2**20:>13.1f} MB {compact / 2**20:>11.1f} MB {baseline / compact:>6.1f}x "
+              f"{baseline / count:>15.0f} → {compact / count:.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+StreamNotify+ User Data Tool Benchmark
+Generates a large users.json and times each streaming conversion of usertool.py,
+reporting throughput and peak RSS (each step runs in a fresh interpreter).
+
+Usage: python benchmarks/usertool_bench.py [--users 5000000] [--workdir /tmp/usertool-bench]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs usertool in-process, then reports the peak RSS of that process
+CHILD = r"""
+import sys, runpy
+sys.argv = ["usertool.py", "--quiet"] + sys.argv[1:]
+sys.path.insert(0, {root!r})
+runpy.run_path({tool!r}, run_name="__main__")
+with open("/proc/self/status") as f:
+    peak = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+sys.stderr.write("PEAK %d\n" % peak)
+"""
+
+def run_tool(*args):
+    """Run one usertool command; return (seconds, peak RSS in MB, stdout)"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT, tool=os.path.join(ROOT, "usertool.py")), *args],
+        check=True, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    peak = next(int(line.split()[1]) for line in result.stderr.splitlines() if line.startswith("PEAK"))
+    return elapsed, peak / 1024, result.stdout.strip()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000000)
+    parser.add_argument("--workdir", default="/tmp/usertool-bench")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    source = os.path.join(args.workdir, f"users-{args.users}.json")
+    results = []
+
+    def step(name, *tool_args, path=None):
+        elapsed, peak, output = run_tool(*tool_args)
+        size = os.path.getsize(path) / 2**20 if path else None
+        results.append({"step": name, "seconds": elapsed, "records_per_second": args.users / elapsed,
+                        "peak_rss_mb": peak, "output_mb": size})
+        size_text = f"{size:>9.1f} MB" if size is not None else " " * 12
+        print(f"{name:<22} {elapsed:>8.1f} s {args.users / elapsed:>12,.0f} rec/s {peak:>9.1f} MB {size_text}  {output}")
+
+    print(f"{'step':<22} {'time':>10} {'throughput':>18} {'peak RSS':>12} {'output':>12}")
+    if not os.path.exists(source):
+        step("generate json", "generate", source, "--users", str(args.users), path=source)
+
+    for fmt in ("ndjson", "csv", "sql", "bin"):
+        target = os.path.join(args.workdir, f"users.{fmt}")
+        step(f"json -> {fmt}", "convert", source, target, path=target)
+    for fmt in ("ndjson", "csv", "sql", "bin"):
+        target = os.path.join(args.workdir, f"back-{fmt}.json")
+        step(f"{fmt} -> json", "convert", os.path.join(args.workdir, f"users.{fmt}"), target, path=target)
+    step("checksum json", "checksum", source)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"users": args.users, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
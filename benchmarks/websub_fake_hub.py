@@ -0,0 +1,192 @@
+"""
+StreamNotify+ WebSub Fake Hub Check
+Runs the Flask app and a local fake WebSub hub, then goes through the whole flow:
+subscription request, hub verification, signed Atom pushes (new, repeated, edited old,
+badly signed), lease renewal and unsubscription. Reports push-to-handler latency.
+
+Usage: python benchmarks/websub_fake_hub.py [--pushes 200]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import secrets
+import argparse
+import datetime
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def free_port():
+    """Return a free local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+WEB_PORT = free_port()
+HUB_PORT = free_port()
+os.environ["WEBSUB_CALLBACK_URL"] = f"http://127.0.0.1:{WEB_PORT}/websub"
+os.environ["WEBSUB_HUB_URL"] = f"http://127.0.0.1:{HUB_PORT}/subscribe"
+os.environ["WEBSUB_SECRET"] = "local-hub-secret"
+
+import aiohttp
+from aiohttp import web as aiohttp_web
+from werkzeug.serving import make_server
+import websub
+import web
+
+CHANNEL_ID = "UC" + "x" * 22
+
+def atom_feed(channel_id, video_id, title, published):
+    """Return an Atom notification like the YouTube hub sends"""
+    stamp = published.isoformat()
+    return f"""<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <title>YouTube video feed</title>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>{title}</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+    <author><name>Channel</name><uri>https://www.youtube.com/channel/{channel_id}</uri></author>
+    <published>{stamp}</published>
+    <updated>{stamp}</updated>
+  </entry>
+</feed>""".encode()
+
+class FakeHub:
+    """Minimal WebSub hub: verifies subscribers asynchronously and pushes signed feeds"""
+
+    def __init__(self):
+        # topic -> (callback, secret)
+        self.subscriptions = {}
+        self.verifications = []
+
+    async def subscribe(self, request):
+        form = await request.post()
+        asyncio.get_running_loop().create_task(self._verify(dict(form)))
+        return aiohttp_web.Response(status=202)
+
+    async def _verify(self, form):
+        challenge = secrets.token_hex(8)
+        params = {
+            "hub.mode": form["hub.mode"],
+            "hub.topic": form["hub.topic"],
+            "hub.challenge": challenge,
+            "hub.lease_seconds": form.get("hub.lease_seconds", "432000")
+        }
+        async with aiohttp.ClientSession() as session:
+            async with session.get(form["hub.callback"], params=params) as resp:
+                confirmed = resp.status == 200 and await resp.text() == challenge
+        self.verifications.append((form["hub.mode"], form["hub.topic"], confirmed))
+        if confirmed and form["hub.mode"] == "subscribe":
+            self.subscriptions[form["hub.topic"]] = (form["hub.callback"], form.get("hub.secret"))
+        elif confirmed:
+            self.subscriptions.pop(form["hub.topic"], None)
+
+    async def publish(self, session, channel_id, body, secret_override=None):
+        """Deliver a feed to the subscriber of a channel; return the HTTP status"""
+        callback, secret = self.subscriptions[websub.topic_url(channel_id)]
+        headers = {"Content-Type": "application/atom+xml"}
+        if secret:
+            headers["X-Hub-Signature"] = websub.sign(secret_override or secret, body)
+        async with session.post(callback, data=body, headers=headers) as resp:
+            return resp.status
+
+async def wait_for(condition, timeout=5):
+    """Poll until condition() is true"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+async def run(pushes):
+    hub = FakeHub()
+    hub_app = aiohttp_web.Application()
+    hub_app.router.add_post("/subscribe", hub.subscribe)
+    runner = aiohttp_web.AppRunner(hub_app)
+    await runner.setup()
+    await aiohttp_web.TCPSite(runner, "127.0.0.1", HUB_PORT).start()
+
+    server = make_server("127.0.0.1", WEB_PORT, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Stand-in for the bot: record what would be announced
+    received = []
+
+    async def handler(entry):
+        received.append((entry["video_id"], entry["title"], time.perf_counter()))
+
+    websub.receiver.attach(asyncio.get_running_loop(), handler)
+    checks = []
+
+    def check(name, condition):
+        checks.append(condition)
+        print(f"{'ok  ' if condition else 'FAIL'} {name}")
+
+    topic = websub.topic_url(CHANNEL_ID)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    async with aiohttp.ClientSession() as session:
+        await websub.renew_leases(session, [CHANNEL_ID])
+        await wait_for(lambda: topic in websub.receiver.leases)
+        check("subscription verified and lease recorded", hub.verifications == [("subscribe", topic, True)] and topic in websub.receiver.leases)
+        check("lease not renewed while fresh", await websub.renew_leases(session, [CHANNEL_ID]) == (0, 0))
+
+        sent = time.perf_counter()
+        status = await hub.publish(session, CHANNEL_ID, atom_feed(CHANNEL_ID, "vid00000001", "Nouvelle vidéo", now))
+        await wait_for(lambda: received)
+        check("new upload delivered to the handler", status == 204 and [item[:2] for item in received] == [("vid00000001", "Nouvelle vidéo")])
+        if received:
+            print(f"     push-to-handler latency: {(received[0][2] - sent) * 1000:.1f} ms")
+
+        await hub.publish(session, CHANNEL_ID, atom_feed(CHANNEL_ID, "vid00000001", "Titre modifié", now))
+        await asyncio.sleep(0.1)
+        check("repeated video ID is not delivered again", len(received) == 1)
+
+        await hub.publish(session, CHANNEL_ID, atom_feed(CHANNEL_ID, "vidold00001", "Vieille vidéo", now - datetime.timedelta(days=30)))
+        await asyncio.sleep(0.1)
+        check("edit of an old video is ignored", len(received) == 1)
+
+        status = await hub.publish(session, CHANNEL_ID, atom_feed(CHANNEL_ID, "vidforged01", "Forgée", now), secret_override="wrong")
+        await asyncio.sleep(0.1)
+        check("badly signed delivery is acknowledged and ignored", status == 202 and len(received) == 1)
+
+        async with session.get(os.environ["WEBSUB_CALLBACK_URL"], params={"hub.mode": "subscribe", "hub.topic": websub.topic_url("UC" + "y" * 22), "hub.challenge": "x"}) as resp:
+            check("verification for a topic nobody requested is refused", resp.status == 404)
+
+        websub.receiver.leases[topic] = time.time() + 60
+        await websub.renew_leases(session, [CHANNEL_ID])
+        await wait_for(lambda: len(hub.verifications) == 2)
+        check("expiring lease is renewed", len(hub.verifications) == 2 and websub.receiver.leases[topic] > time.time() + websub.RENEW_MARGIN)
+
+        latencies = []
+        for i in range(pushes):
+            count = len(received)
+            sent = time.perf_counter()
+            await hub.publish(session, CHANNEL_ID, atom_feed(CHANNEL_ID, f"vidburst{i:04d}", f"Vidéo {i}", now))
+            await wait_for(lambda: len(received) > count)
+            latencies.append(received[-1][2] - sent)
+        latencies.sort()
+        print(f"     {pushes} pushes: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms push-to-handler")
+
+        await websub.renew_leases(session, [])
+        await wait_for(lambda: topic not in websub.receiver.leases)
+        check("removed channel is unsubscribed", topic not in websub.receiver.leases and topic not in hub.subscriptions)
+
+    server.shutdown()
+    await runner.cleanup()
+    return all(checks)
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSub fake hub check")
+    parser.add_argument("--pushes", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.pushes)) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+StreamNotify+ Breaker Module
+Circuit breakers per platform host and per creator: failing hosts and missing creators are
+backed off exponentially (up to a cap) instead of being requested on every tick.
+"""
+import time
+import threading
+import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Consecutive failures before a breaker opens
+FAILURE_THRESHOLD = 3
+
+# First open period and its cap, doubled on each consecutive opening
+BASE_BACKOFF = 60
+MAX_BACKOFF = 3600
+
+# Consecutive "not found" answers before a creator is quarantined, and how long it lasts
+QUARANTINE_AFTER = 5
+QUARANTINE_SECONDS = 86400
+
+# Statuses blaming the host (rate limits, blocks, outages) rather than one creator
+HOST_FAILURE_STATUSES = {401, 403, 408, 429}
+
+_breakers = {}
+_lock = threading.Lock()
+
+# Bumped on every state change, so rendered panels showing breaker state can be invalidated
+version = 0
+
+class HTTPStatusError(RuntimeError):
+    """Raised by platform helpers when a request gets an unexpected HTTP status"""
+
+    def __init__(self, message, status, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def retry_after(headers):
+    """Return the Retry-After delay of a response in seconds, or None"""
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+class Breaker:
+    """Closed / open / half-open state machine for one host or creator"""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = CLOSED
+        self.failures = 0
+        self.not_found = 0
+        self.opens = 0
+        self.quarantined = False
+        self.retry_at = 0
+        self.last_error = None
+        self.skipped = 0
+
+    def _change(self, state):
+        """Switch state and publish it"""
+        global version
+        self.state = state
+        version += 1
+        metrics.CIRCUIT_OPEN.set(0 if state == CLOSED else 1, breaker=self.name)
+
+    def allow(self, now=None):
+        """Return True if a request may be sent now; an expired open breaker lets one probe through"""
+        now = time.time() if now is None else now
+        with _lock:
+            if self.state == CLOSED:
+                return True
+            # A probe that never reported back does not keep the breaker half-open forever
+            if (self.state == OPEN and now >= self.retry_at) or (self.state == HALF_OPEN and now >= self.retry_at + BASE_BACKOFF):
+                self._change(HALF_OPEN)
+                return True
+            self.skipped += 1
+        metrics.CIRCUIT_SKIPPED_REQUESTS.inc(breaker=self.name)
+        return False
+
+    def success(self):
+        """Record a successful request and close the breaker"""
+        with _lock:
+            self.failures = 0
+            self.not_found = 0
+            self.opens = 0
+            self.quarantined = False
+            self.last_error = None
+            if self.state != CLOSED:
+                self._change(CLOSED)
+
+    def failure(self, error, delay=None, now=None):
+        """Record a failed request; open the breaker after repeated failures or a failed probe"""
+        now = time.time() if now is None else now
+        with _lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self.failures >= FAILURE_THRESHOLD or delay:
+                self._open(now, delay)
+
+    def missing(self, error, now=None):
+        """Record a "not found" answer; quarantine after repeated ones"""
+        now = time.time() if now is None else now
+        with _lock:
+            self.not_found += 1
+            self.last_error = error
+            if self.not_found >= QUARANTINE_AFTER:
+                self.quarantined = True
+                self.retry_at = now + QUARANTINE_SECONDS
+                self._change(OPEN)
+            elif self.state == HALF_OPEN:
+                self._open(now)
+
+    def _open(self, now, delay=None):
+        """Open the breaker with exponential backoff (called with the lock held)"""
+        backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** self.opens)
+        self.opens += 1
+        # Honour a server-provided Retry-After when it is longer than our own backoff
+        self.retry_at = now + max(backoff, delay or 0)
+        self._change(OPEN)
+
+    def reset(self):
+        """Forget failures and quarantine (e.g. after the creator was reconfigured)"""
+        with _lock:
+            self.failures = 0
+            self.not_found = 0
+            self.opens = 0
+            self.quarantined = False
+            self.last_error = None
+            if self.state != CLOSED:
+                self._change(CLOSED)
+
+    def status(self, now=None):
+        """Return a JSON-friendly view of the breaker"""
+        now = time.time() if now is None else now
+        return {
+            "state": "quarantined" if self.quarantined else self.state,
+            "failures": self.failures,
+            "not_found": self.not_found,
+            "retry_in": max(0, self.retry_at - now) if self.state == OPEN else 0,
+            "last_error": self.last_error,
+            "skipped": self.skipped
+        }
+
+def _get(name):
+    """Return the breaker with this name, creating it closed"""
+    with _lock:
+        if name not in _breakers:
+            _breakers[name] = Breaker(name)
+        return _breakers[name]
+
+def for_host(host):
+    """Return the breaker of a platform host"""
+    return _get(f"host:{host}")
+
+def for_creator(platform, creator):
+    """Return the breaker of one configured creator"""
+    return _get(f"{platform}:{creator}")
+
+def peek_creator(platform, creator):
+    """Return a creator's breaker status without creating it, or None"""
+    with _lock:
+        breaker = _breakers.get(f"{platform}:{creator}")
+    return breaker.status() if breaker else None
+
+def record_status(host, creator, status, delay=None, now=None):
+    """Blame an unexpected HTTP status on the host or the creator; return True if the host is now open"""
+    error = f"HTTP {status}"
+    if status == 404:
+        host.success()
+        creator.missing(error, now)
+    elif status in HOST_FAILURE_STATUSES or status >= 500:
+        host.failure(error, delay, now)
+    else:
+        creator.failure(error, now=now)
+    return host.state == OPEN
+
+def snapshot():
+    """Return the status of every breaker that is not closed, keyed by name"""
+    now = time.time()
+    with _lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.status(now) for breaker in breakers if breaker.state != CLOSED or breaker.failures}
@@ -0,0 +1,128 @@
+"""
+StreamNotify+ Command Statistics Module
+Rolling latency, time-to-first-response and error tracing for slash commands.
+"""
+import math
+import time
+import threading
+import collections
+import discord
+from discord import app_commands
+import metrics
+
+# Number of recent invocations kept per command for percentiles
+WINDOW_SIZE = 500
+
+# Discord drops interactions that are not answered within 3 seconds
+INTERACTION_DEADLINE = 3.0
+
+_lock = threading.Lock()
+_stats = {}
+_hooks_installed = False
+
+class CommandStats:
+    """Rolling statistics for a single slash command"""
+    __slots__ = ("wall", "ttfr", "calls", "errors", "late", "last_error")
+
+    def __init__(self):
+        self.wall = collections.deque(maxlen=WINDOW_SIZE)
+        self.ttfr = collections.deque(maxlen=WINDOW_SIZE)
+        self.calls = 0
+        self.errors = collections.Counter()
+        self.late = 0
+        self.last_error = None
+
+def percentile(values, pct):
+    """Return the pct-th percentile (nearest rank) of a sequence"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def mark_started(interaction):
+    """Stamp the start of a slash command dispatch"""
+    interaction.extras["started_at"] = time.perf_counter()
+
+def _error_name(error):
+    """Return the name of the exception that actually caused a command failure"""
+    if isinstance(error, app_commands.CommandInvokeError):
+        error = error.original
+    return type(error).__name__
+
+def record(interaction, error=None):
+    """Record the outcome of a slash command"""
+    started_at = interaction.extras.get("started_at")
+    if started_at is None or interaction.command is None:
+        return
+
+    now = time.perf_counter()
+    wall = now - started_at
+    first_response_at = interaction.extras.get("first_response_at")
+    ttfr = first_response_at - started_at if first_response_at is not None else None
+    name = interaction.command.qualified_name
+
+    metrics.SLASH_COMMAND_SECONDS.observe(wall, command=name, status="error" if error else "ok")
+
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = CommandStats()
+        stats.calls += 1
+        stats.wall.append(wall)
+        if ttfr is not None:
+            stats.ttfr.append(ttfr)
+            if ttfr > INTERACTION_DEADLINE:
+                stats.late += 1
+        if error is not None:
+            error_name = _error_name(error)
+            stats.errors[error_name] += 1
+            stats.last_error = error_name
+
+def summary():
+    """Return per-command statistics, slowest p95 first"""
+    with _lock:
+        items = [(name, list(stats.wall), list(stats.ttfr), stats.calls, dict(stats.errors), stats.late, stats.last_error)
+                 for name, stats in _stats.items()]
+
+    rows = []
+    for name, wall, ttfr, calls, errors, late, last_error in items:
+        rows.append({
+            "command": name,
+            "calls": calls,
+            "p50_ms": _ms(percentile(wall, 50)),
+            "p95_ms": _ms(percentile(wall, 95)),
+            "p99_ms": _ms(percentile(wall, 99)),
+            "ttfr_p95_ms": _ms(percentile(ttfr, 95)),
+            "ttfr_max_ms": _ms(max(ttfr) if ttfr else None),
+            "late": late,
+            "errors": sum(errors.values()),
+            "error_types": errors,
+            "last_error": last_error
+        })
+    rows.sort(key=lambda row: row["p95_ms"] or 0, reverse=True)
+    return rows
+
+def _ms(seconds):
+    """Convert seconds to rounded milliseconds"""
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+def install_response_hooks():
+    """Stamp the time of the first response sent for every interaction"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    def wrap(method):
+        async def wrapper(self, *args, **kwargs):
+            extras = self._parent.extras
+            if "started_at" in extras and "first_response_at" not in extras:
+                extras["first_response_at"] = time.perf_counter()
+            return await method(self, *args, **kwargs)
+        wrapper.__name__ = method.__name__
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    for name in ("defer", "send_message", "edit_message", "send_modal"):
+        setattr(discord.InteractionResponse, name, wrap(getattr(discord.InteractionResponse, name)))
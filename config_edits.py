@@ -0,0 +1,102 @@
+"""
+StreamNotify+ Config Edits Module
+Editing sessions for the /config panels: changes go to a draft of one creator's settings and
+are written once, with a compare-and-swap on the config version, so admins editing at the
+same time never silently overwrite each other.
+"""
+import copy
+
+# Conflict markers besides setting names
+EXISTS = "exists"
+DELETED = "deleted"
+
+class EditSession:
+    """Draft of one creator's settings, taken at a config version and committed in one write"""
+
+    def __init__(self, store, platform, creator, base, version):
+        self.store = store
+        self.platform = platform
+        self.creator = creator
+        # Settings when the session was opened or last committed (None for a creator being added)
+        self.base = base
+        self.draft = copy.deepcopy(base)
+        self.version = version
+        self.deleted = False
+        # Settings another admin changed differently since the draft was taken, set by a failed commit
+        self.conflicts = []
+
+    @classmethod
+    async def open(cls, store, platform, creator):
+        """Start a session on the current settings of a creator (draft is None if it does not exist)"""
+        config, version = await store.load_versioned()
+        return cls(store, platform, creator, config.get(platform, {}).get(creator), version)
+
+    def set(self, setting, value):
+        """Change a setting in the draft"""
+        self.draft[setting] = value
+
+    def changes(self):
+        """Return the settings changed in the draft"""
+        if self.draft is None:
+            return {}
+        if self.base is None:
+            return dict(self.draft)
+        return {setting: value for setting, value in self.draft.items() if self.base.get(setting) != value}
+
+    @property
+    def dirty(self):
+        return self.deleted or bool(self.changes())
+
+    def _find_conflicts(self, latest):
+        """Return what another admin changed since the draft was taken that this session changes too"""
+        if self.base is None:
+            return [EXISTS] if latest is not None else []
+        if latest is None:
+            return [] if self.deleted else [DELETED]
+        if self.deleted:
+            return [setting for setting, value in latest.items() if self.base.get(setting) != value]
+        return [
+            setting for setting, value in self.changes().items()
+            if latest.get(setting) != self.base.get(setting) and latest.get(setting) != value
+        ]
+
+    async def commit(self, force=False):
+        """Write the draft onto the latest configuration; return the conflicting settings (empty once saved)
+
+        Changes by other admins to other settings or creators are kept; force overwrites conflicting ones.
+        """
+        if not self.dirty:
+            return []
+        while True:
+            config, version = await self.store.load_versioned()
+            creators = config.setdefault(self.platform, {})
+            latest = creators.get(self.creator)
+            conflicts = [] if force else self._find_conflicts(latest)
+            if conflicts:
+                self.conflicts = conflicts
+                return conflicts
+
+            if self.deleted:
+                creators.pop(self.creator, None)
+                merged = None
+            else:
+                # Added, or forced back after another admin deleted it: every setting must be written
+                merged = copy.deepcopy(self.draft) if latest is None else {**latest, **self.changes()}
+                creators[self.creator] = merged
+
+            # Another save slipping in between load and save only costs a retry
+            if await self.store.save_if_version(config, version):
+                self.base = merged
+                self.draft = copy.deepcopy(merged)
+                self.version = version + 1
+                self.conflicts = []
+                return []
+
+    async def reload(self):
+        """Drop the draft and start again from the current settings"""
+        config, version = await self.store.load_versioned()
+        self.base = config.get(self.platform, {}).get(self.creator)
+        self.draft = copy.deepcopy(self.base)
+        self.version = version
+        self.deleted = False
+        self.conflicts = []
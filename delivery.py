@@ -0,0 +1,219 @@
+"""
+StreamNotify+ Delivery Module
+Priority scheduler for the messages the bot posts on its own: live alerts go before upload
+announcements, which go before level-up congratulations and economy DMs. Each destination
+(channel or user) has its own send window, so a busy channel only holds back its own messages,
+and low-priority messages are shed when they pile up or get too old to matter.
+"""
+import os
+import time
+import asyncio
+import logging
+import collections
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+LIVE = 0
+UPLOAD = 1
+LOW = 2
+
+CLASS_NAMES = {LIVE: "live", UPLOAD: "upload", LOW: "low"}
+
+# Messages sent at once (Discord's own limits still apply underneath)
+DELIVERY_WORKERS = 4
+
+# Messages per destination and window: Discord allows about 5 per 5 s in a channel
+ROUTE_LIMIT = 5
+ROUTE_PERIOD = 5.0
+
+# Low-priority messages queued at most, and the age after which they are dropped unsent
+LOW_PRIORITY_MAX_QUEUE = int(os.getenv("LOW_PRIORITY_MAX_QUEUE", "200"))
+LOW_PRIORITY_MAX_AGE = float(os.getenv("LOW_PRIORITY_MAX_AGE", "60"))
+
+# Idle destinations are forgotten once more than this many are tracked
+MAX_ROUTES = 1024
+
+QUEUE_DEPTH = metrics.Gauge(
+    "streamnotify_delivery_queue_depth",
+    "Messages waiting to be sent, by priority class",
+    ("priority",)
+)
+QUEUE_WAIT_SECONDS = metrics.Histogram(
+    "streamnotify_delivery_wait_seconds",
+    "Time a message waited in the delivery queue",
+    ("priority",)
+)
+SHED_MESSAGES = metrics.Counter(
+    "streamnotify_delivery_shed_total",
+    "Messages dropped unsent because their queue was full or they got too old",
+    ("priority",)
+)
+
+class _Job:
+    """One message waiting to be sent"""
+    __slots__ = ("priority", "destination", "kwargs", "future", "queued_at")
+
+    def __init__(self, priority, destination, kwargs, future):
+        self.priority = priority
+        self.destination = destination
+        self.kwargs = kwargs
+        self.future = future
+        self.queued_at = time.monotonic()
+
+class RouteWindow:
+    """Send times of one destination over the last period"""
+
+    def __init__(self, limit=ROUTE_LIMIT, period=ROUTE_PERIOD):
+        self.limit = limit
+        self.period = period
+        self._sent = collections.deque()
+
+    def _expire(self, now):
+        while self._sent and self._sent[0] <= now - self.period:
+            self._sent.popleft()
+
+    def available(self, now):
+        """Return True if a message can go out now"""
+        self._expire(now)
+        return len(self._sent) < self.limit
+
+    def free_at(self, now):
+        """Return when the next message can go out"""
+        self._expire(now)
+        return now if len(self._sent) < self.limit else self._sent[0] + self.period
+
+    def record(self, now):
+        self._sent.append(now)
+
+    def idle(self, now):
+        self._expire(now)
+        return not self._sent
+
+class Scheduler:
+    """Priority queues drained by a few workers, respecting a send window per destination"""
+
+    def __init__(self, workers=DELIVERY_WORKERS, route_limit=ROUTE_LIMIT, route_period=ROUTE_PERIOD):
+        self.workers = workers
+        self.route_limit = route_limit
+        self.route_period = route_period
+        self._queues = {priority: collections.deque() for priority in CLASS_NAMES}
+        self._routes = {}
+        self._wakeup = None
+        self._tasks = []
+        self._loop = None
+        self.sent = collections.Counter()
+        self.shed = collections.Counter()
+
+    def start(self):
+        """Start the workers on the running loop (again if a previous loop was closed); queuing starts them too"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _enqueue(self, priority, destination, kwargs, future):
+        if priority not in CLASS_NAMES:
+            raise ValueError(f"Unknown delivery priority {priority!r}")
+        self.start()
+        queue = self._queues[priority]
+        if priority == LOW and len(queue) >= LOW_PRIORITY_MAX_QUEUE:
+            self._drop(priority, future, "queue full")
+            return
+        queue.append(_Job(priority, destination, kwargs, future))
+        QUEUE_DEPTH.inc(priority=CLASS_NAMES[priority])
+        self._wakeup.set()
+
+    async def send(self, priority, destination, **kwargs):
+        """Queue destination.send(**kwargs) and wait for it; return the message, or None if it was shed"""
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(priority, destination, kwargs, future)
+        return await future
+
+    def post(self, priority, destination, **kwargs):
+        """Queue destination.send(**kwargs) without waiting; failures are logged"""
+        self._enqueue(priority, destination, kwargs, None)
+
+    def _drop(self, priority, future, reason):
+        self.shed[priority] += 1
+        SHED_MESSAGES.inc(priority=CLASS_NAMES[priority])
+        logger.debug(f"Shed a {CLASS_NAMES[priority]} message ({reason})")
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def _route(self, destination):
+        key = destination.id
+        window = self._routes.get(key)
+        if window is None:
+            if len(self._routes) >= MAX_ROUTES:
+                now = time.monotonic()
+                for idle in [route for route, route_window in self._routes.items() if route_window.idle(now)]:
+                    del self._routes[idle]
+            window = self._routes[key] = RouteWindow(self.route_limit, self.route_period)
+        return window
+
+    def _next_job(self):
+        """Pop the most urgent job whose destination can take a message; else return the time to wait"""
+        now = time.monotonic()
+        wait = None
+        for priority, queue in self._queues.items():
+            if priority == LOW:
+                while queue and now - queue[0].queued_at > LOW_PRIORITY_MAX_AGE:
+                    job = queue.popleft()
+                    QUEUE_DEPTH.dec(priority=CLASS_NAMES[priority])
+                    self._drop(priority, job.future, "too old")
+            for index, job in enumerate(queue):
+                window = self._route(job.destination)
+                if window.available(now):
+                    del queue[index]
+                    QUEUE_DEPTH.dec(priority=CLASS_NAMES[priority])
+                    window.record(now)
+                    return job, None
+                free_in = window.free_at(now) - now
+                wait = free_in if wait is None else min(wait, free_in)
+        return None, wait
+
+    async def _worker(self):
+        while True:
+            job, wait = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            QUEUE_WAIT_SECONDS.observe(time.monotonic() - job.queued_at, priority=CLASS_NAMES[job.priority])
+            try:
+                message = await job.destination.send(**job.kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if job.future is None:
+                    logger.error(f"Failed to send a {CLASS_NAMES[job.priority]} message: {str(e)}")
+                elif not job.future.done():
+                    job.future.set_exception(e)
+                continue
+            self.sent[job.priority] += 1
+            if job.future is not None and not job.future.done():
+                job.future.set_result(message)
+
+    def depths(self):
+        """Return the number of queued messages per priority class"""
+        return {name: len(self._queues[priority]) for priority, name in CLASS_NAMES.items()}
+
+    def snapshot(self):
+        """Return queue depths and sent / shed counts per priority class"""
+        return {
+            name: {"queued": len(self._queues[priority]), "sent": self.sent[priority], "shed": self.shed[priority]}
+            for priority, name in CLASS_NAMES.items()
+        }
+
+scheduler = Scheduler()
+
+send = scheduler.send
+post = scheduler.post
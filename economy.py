@@ -0,0 +1,132 @@
+"""
+StreamNotify+ Economy Module
+Atomic balance changes on top of the user store, recorded in an append-only transaction ledger.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import storage
+
+logger = logging.getLogger(__name__)
+
+# Delay before pending ledger entries are appended to disk
+LEDGER_FLUSH_DELAY = float(os.getenv("LEDGER_FLUSH_DELAY", "1"))
+
+# Number of accounts locked and committed together during bulk operations
+BULK_BATCH_SIZE = 500
+
+class InsufficientFunds(Exception):
+    """Raised when an account cannot cover a debit"""
+
+def _append_lines(path, lines):
+    """Append lines to the ledger file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("".join(lines))
+
+class Ledger:
+    """Append-only JSON lines journal of every balance change"""
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = []
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, kind, amount, source=None, target=None, **extra):
+        """Queue a ledger entry and return its id"""
+        entry = {
+            "id": uuid.uuid4().hex,
+            "ts": time.time(),
+            "type": kind,
+            "amount": amount,
+            "from": source,
+            "to": target
+        }
+        entry.update(extra)
+        self._pending.append(json.dumps(entry) + "\n")
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+        return entry["id"]
+
+    async def _delayed_flush(self):
+        """Wait for the flush delay, then append pending entries"""
+        await asyncio.sleep(LEDGER_FLUSH_DELAY)
+        await self.flush()
+
+    async def flush(self):
+        """Append pending entries to disk now"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            try:
+                await storage.run_blocking(_append_lines, self.path, lines)
+            except Exception as e:
+                # Keep the entries so the next flush retries them in order
+                self._pending[:0] = lines
+                logger.error(f"Error writing ledger: {str(e)}")
+
+class Economy:
+    """Balance operations applied under per-account locks in a single storage commit"""
+
+    def __init__(self, store, ledger_path):
+        self.store = store
+        self.ledger = Ledger(ledger_path)
+
+    async def transfer(self, sender_id, recipient_id, amount, kind="pay"):
+        """Move coins between two accounts atomically and return both updated records"""
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        sender_id, recipient_id = str(sender_id), str(recipient_id)
+        if sender_id == recipient_id:
+            raise ValueError("sender and recipient must differ")
+
+        async with self.store.edit(sender_id, recipient_id) as records:
+            sender, recipient = records[sender_id], records[recipient_id]
+            if sender["balance"] < amount:
+                raise InsufficientFunds(sender_id)
+            sender["balance"] -= amount
+            recipient["balance"] += amount
+            self.ledger.record(kind, amount, sender_id, recipient_id)
+        return dict(sender), dict(recipient)
+
+    async def claim_daily(self, user_id, day, amount):
+        """Credit the daily reward once per day; return (claimed, record)"""
+        async with self.store.edit(user_id) as user_data:
+            if user_data.get("daily_last") == day:
+                return False, dict(user_data)
+            user_data["balance"] += amount
+            user_data["daily_last"] = day
+            self.ledger.record("daily", amount, None, str(user_id), day=day)
+        return True, dict(user_data)
+
+    async def airdrop(self, user_ids, amount, reason=None):
+        """Credit the same amount to many accounts, one commit and one ledger entry per batch"""
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        user_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        for start in range(0, len(user_ids), BULK_BATCH_SIZE):
+            batch = user_ids[start:start + BULK_BATCH_SIZE]
+            async with self.store.edit(*batch) as records:
+                if len(batch) == 1:
+                    records = {batch[0]: records}
+                for record in records.values():
+                    record["balance"] += amount
+                self.ledger.record("airdrop", amount, None, batch, reason=reason)
+            # Let gateway events run between batches
+            await asyncio.sleep(0)
+        return len(user_ids)
+
+    async def total_supply(self):
+        """Return the sum of every balance"""
+        return await self.store.total_balance()
+
+    async def flush(self):
+        """Write pending ledger entries"""
+        await self.ledger.flush()
@@ -0,0 +1,243 @@
+"""
+StreamNotify+ EventSub Module
+Twitch EventSub webhook receiver (signature check, challenge handshake, replay protection)
+and management of the stream.online / stream.offline subscriptions.
+"""
+import os
+import hmac
+import json
+import uuid
+import time
+import asyncio
+import hashlib
+import logging
+import datetime
+import threading
+import collections
+
+logger = logging.getLogger(__name__)
+
+# Public HTTPS URL of the /eventsub route and the secret shared with Twitch; EventSub is off without them
+EVENTSUB_CALLBACK_URL = os.getenv("EVENTSUB_CALLBACK_URL")
+EVENTSUB_SECRET = os.getenv("EVENTSUB_SECRET")
+
+# Overridable like the pollers' base URLs (see benchmarks/fake_platforms.py)
+HELIX_URL = os.getenv("TWITCH_API_BASE", "https://api.twitch.tv") + "/helix"
+
+# Subscription types kept for every configured streamer
+SUBSCRIPTION_TYPES = ("stream.online", "stream.offline")
+
+# Messages older than this are rejected as possible replays
+MAX_MESSAGE_AGE = 600
+
+# Message IDs remembered to drop redeliveries
+SEEN_MESSAGE_LIMIT = 10000
+
+# Subscription states that will never deliver again and must be recreated
+FAILED_STATUSES = {
+    "webhook_callback_verification_failed",
+    "notification_failures_exceeded",
+    "authorization_revoked",
+    "user_removed",
+    "version_removed"
+}
+
+MESSAGE_ID = "Twitch-Eventsub-Message-Id"
+MESSAGE_TIMESTAMP = "Twitch-Eventsub-Message-Timestamp"
+MESSAGE_SIGNATURE = "Twitch-Eventsub-Message-Signature"
+MESSAGE_TYPE = "Twitch-Eventsub-Message-Type"
+
+def enabled():
+    """Return True when EventSub is configured"""
+    return bool(EVENTSUB_CALLBACK_URL and EVENTSUB_SECRET)
+
+def sign(secret, message_id, timestamp, body):
+    """Return the Twitch-Eventsub-Message-Signature value for a message"""
+    digest = hmac.new(secret.encode(), message_id.encode() + timestamp.encode() + body, hashlib.sha256)
+    return "sha256=" + digest.hexdigest()
+
+def parse_timestamp(value):
+    """Parse an RFC 3339 timestamp (Twitch sends nanoseconds) to epoch seconds"""
+    value = value.strip().replace("Z", "+00:00")
+    if "." in value:
+        # Python only parses microseconds
+        head, rest = value.split(".", 1)
+        digits = len(rest) - len(rest.lstrip("0123456789"))
+        value = f"{head}.{rest[:digits][:6].ljust(6, '0')}{rest[digits:]}"
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+def signed_request(secret, message_type, payload, message_id=None, timestamp=None):
+    """Build (headers, body) for a message signed like Twitch does, to exercise the receiver locally"""
+    body = json.dumps(payload).encode()
+    message_id = message_id or str(uuid.uuid4())
+    timestamp = timestamp or datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+    headers = {
+        MESSAGE_ID: message_id,
+        MESSAGE_TIMESTAMP: timestamp,
+        MESSAGE_SIGNATURE: sign(secret, message_id, timestamp, body),
+        MESSAGE_TYPE: message_type,
+        "Content-Type": "application/json"
+    }
+    return headers, body
+
+class Receiver:
+    """Validates webhook deliveries and hands notifications to the bot's event loop"""
+
+    def __init__(self, secret):
+        self.secret = secret
+        self._loop = None
+        self._handler = None
+        self._seen = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.received = collections.Counter()
+
+    def attach(self, loop, handler):
+        """Deliver notifications to handler(subscription_type, event), a coroutine function run on loop"""
+        self._loop = loop
+        self._handler = handler
+
+    def _remember(self, message_id):
+        """Record a message ID; return False if it was already handled"""
+        with self._lock:
+            if message_id in self._seen:
+                return False
+            self._seen[message_id] = True
+            while len(self._seen) > SEEN_MESSAGE_LIMIT:
+                self._seen.popitem(last=False)
+            return True
+
+    def _forget(self, message_id):
+        """Drop a message ID so a redelivery is processed"""
+        with self._lock:
+            self._seen.pop(message_id, None)
+
+    def handle(self, headers, body):
+        """Process one webhook request; return (status, body, content type)"""
+        if not self.secret:
+            return 404, "EventSub is not configured", "text/plain"
+
+        message_id = headers.get(MESSAGE_ID)
+        timestamp = headers.get(MESSAGE_TIMESTAMP)
+        signature = headers.get(MESSAGE_SIGNATURE)
+        message_type = headers.get(MESSAGE_TYPE)
+        if not (message_id and timestamp and signature and message_type):
+            self.received["rejected"] += 1
+            return 400, "Missing EventSub headers", "text/plain"
+
+        if not hmac.compare_digest(sign(self.secret, message_id, timestamp, body), signature):
+            self.received["rejected"] += 1
+            logger.warning(f"Rejected EventSub message {message_id}: bad signature")
+            return 403, "Invalid signature", "text/plain"
+
+        try:
+            age = time.time() - parse_timestamp(timestamp)
+        except ValueError:
+            age = None
+        if age is None or abs(age) > MAX_MESSAGE_AGE:
+            self.received["rejected"] += 1
+            logger.warning(f"Rejected EventSub message {message_id}: timestamp {timestamp} outside the accepted window")
+            return 403, "Stale message", "text/plain"
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.received["rejected"] += 1
+            return 400, "Invalid JSON", "text/plain"
+
+        if not self._remember(message_id):
+            # Already handled: acknowledge so Twitch stops retrying
+            self.received["duplicate"] += 1
+            return 204, "", "text/plain"
+
+        subscription = payload.get("subscription", {})
+        if message_type == "webhook_callback_verification":
+            self.received["verification"] += 1
+            logger.info(f"Verified EventSub subscription {subscription.get('type')} ({subscription.get('id')})")
+            return 200, payload.get("challenge", ""), "text/plain"
+
+        if message_type == "revocation":
+            self.received["revocation"] += 1
+            logger.warning(f"EventSub subscription {subscription.get('type')} revoked: {subscription.get('status')}")
+            return 204, "", "text/plain"
+
+        if message_type != "notification":
+            self.received["rejected"] += 1
+            return 400, "Unknown message type", "text/plain"
+
+        if self._handler is None or self._loop is None or self._loop.is_closed():
+            # Not processed: let Twitch redeliver once the bot is up
+            self._forget(message_id)
+            return 503, "Bot not ready", "text/plain"
+
+        self.received["notification"] += 1
+        future = asyncio.run_coroutine_threadsafe(self._handler(subscription.get("type"), payload.get("event", {})), self._loop)
+        future.add_done_callback(_log_handler_error)
+        return 204, "", "text/plain"
+
+def _log_handler_error(future):
+    """Log failures of notification handlers"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error handling EventSub notification: {future.exception()}")
+
+receiver = Receiver(EVENTSUB_SECRET)
+
+async def list_subscriptions(session, headers):
+    """Return every EventSub subscription of the application"""
+    subscriptions = []
+    params = {}
+    while True:
+        async with session.get(f"{HELIX_URL}/eventsub/subscriptions", headers=headers, params=params) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"Failed to list EventSub subscriptions: {resp.status}")
+            data = await resp.json()
+        subscriptions.extend(data.get("data", []))
+        cursor = data.get("pagination", {}).get("cursor")
+        if not cursor:
+            return subscriptions
+        params = {"after": cursor}
+
+async def sync_subscriptions(session, headers, broadcaster_ids, prune=True):
+    """Make the webhook subscriptions match the configured broadcasters; return (created, deleted)
+
+    Without prune, subscriptions of broadcasters missing from the list are kept: pass it only
+    when the list is known to hold every configured broadcaster.
+    """
+    wanted = {(kind, broadcaster_id) for broadcaster_id in broadcaster_ids for kind in SUBSCRIPTION_TYPES}
+    existing = set()
+    created = deleted = 0
+
+    for subscription in await list_subscriptions(session, headers):
+        transport = subscription.get("transport", {})
+        if transport.get("method") != "webhook" or transport.get("callback") != EVENTSUB_CALLBACK_URL:
+            continue
+        key = (subscription.get("type"), subscription.get("condition", {}).get("broadcaster_user_id"))
+        if key in wanted and subscription.get("status") not in FAILED_STATUSES and key not in existing:
+            existing.add(key)
+            continue
+        if key not in wanted and not prune:
+            continue
+        async with session.delete(f"{HELIX_URL}/eventsub/subscriptions", headers=headers, params={"id": subscription["id"]}) as resp:
+            if resp.status == 204:
+                deleted += 1
+            else:
+                logger.error(f"Failed to delete EventSub subscription {subscription['id']}: {resp.status}")
+
+    for kind, broadcaster_id in sorted(wanted - existing):
+        body = {
+            "type": kind,
+            "version": "1",
+            "condition": {"broadcaster_user_id": broadcaster_id},
+            "transport": {"method": "webhook", "callback": EVENTSUB_CALLBACK_URL, "secret": EVENTSUB_SECRET}
+        }
+        async with session.post(f"{HELIX_URL}/eventsub/subscriptions", headers=headers, json=body) as resp:
+            if resp.status == 202:
+                created += 1
+            elif resp.status == 409:
+                # Created concurrently
+                pass
+            else:
+                logger.error(f"Failed to subscribe to {kind} for {broadcaster_id}: {resp.status}")
+
+    if created or deleted:
+        logger.info(f"EventSub subscriptions synced: {created} created, {deleted} deleted")
+    return created, deleted
@@ -0,0 +1,178 @@
+"""
+StreamNotify+ Event Loop Monitor
+Measures event loop lag continuously and captures the stack of callbacks that block the loop.
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# How often the loop is expected to wake up the monitor
+SAMPLE_INTERVAL = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "250")) / 1000
+
+# A callback running longer than this is reported as a stall
+STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100")) / 1000
+
+# Number of distinct offenders kept for the dashboard
+MAX_OFFENDERS = 20
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_lock = threading.Lock()
+_offenders = {}
+_state = {
+    "running": False,
+    "lag": 0.0,
+    "max_lag": 0.0,
+    "stalls": 0
+}
+
+class _Stall:
+    """A blocking episode being observed by the watchdog"""
+    __slots__ = ("beat", "started_at", "stack", "culprit")
+
+    def __init__(self, beat, started_at, stack, culprit):
+        self.beat = beat
+        self.started_at = started_at
+        self.stack = stack
+        self.culprit = culprit
+
+def _find_culprit(stack):
+    """Return the innermost frame that belongs to this project"""
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(PROJECT_DIR) and filename != os.path.abspath(__file__):
+            return f"{os.path.relpath(filename, PROJECT_DIR)}:{frame.lineno} in {frame.name}"
+    if stack:
+        frame = stack[-1]
+        return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown"
+
+def _record_stall(stall, duration):
+    """Aggregate a finished stall by culprit and log it"""
+    with _lock:
+        _state["stalls"] += 1
+        offender = _offenders.get(stall.culprit)
+        if offender is None:
+            if len(_offenders) >= MAX_OFFENDERS:
+                # Evict the least significant offender
+                weakest = min(_offenders, key=lambda key: _offenders[key]["total"])
+                if _offenders[weakest]["total"] > duration:
+                    return
+                del _offenders[weakest]
+            offender = _offenders[stall.culprit] = {
+                "culprit": stall.culprit,
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "stack": stall.stack
+            }
+        offender["count"] += 1
+        offender["total"] += duration
+        if duration >= offender["max"]:
+            offender["max"] = duration
+            offender["stack"] = stall.stack
+
+    logger.warning(
+        f"Event loop blocked for at least {duration * 1000:.0f} ms by {stall.culprit}\n"
+        + "".join(traceback.format_list(stall.stack))
+    )
+
+class LoopMonitor:
+    """Heartbeat task on the event loop plus a watchdog thread sampling its stack"""
+
+    def __init__(self, loop, interval=SAMPLE_INTERVAL, threshold=STALL_THRESHOLD):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.loop_thread_id = None
+        self._beat = time.perf_counter()
+        self._stall = None
+        self._stopped = threading.Event()
+        self._task = None
+        self._thread = None
+
+    async def _heartbeat(self):
+        """Sleep for a fixed interval and measure how late the loop wakes us up"""
+        self.loop_thread_id = threading.get_ident()
+        while True:
+            started = time.perf_counter()
+            self._beat = started
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - started - self.interval)
+            self._beat = now
+
+            metrics.EVENT_LOOP_LAG_SECONDS.observe(lag)
+            with _lock:
+                _state["lag"] = lag
+                _state["max_lag"] = max(_state["max_lag"], lag)
+
+            stall, self._stall = self._stall, None
+            # Ignore a capture that raced with the previous wake-up
+            if stall is not None and stall.beat == started:
+                _record_stall(stall, now - stall.started_at)
+
+    def _watchdog(self):
+        """Capture the loop thread's stack while it is blocked"""
+        while not self._stopped.wait(self.threshold / 4):
+            if self.loop_thread_id is None or self._stall is not None:
+                continue
+            beat = self._beat
+            if time.perf_counter() - beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            # The heartbeat was due at beat + interval: that is when the blocking started at the latest
+            self._stall = _Stall(beat, beat + self.interval, stack, _find_culprit(stack))
+
+    def start(self):
+        """Start the heartbeat task and the watchdog thread"""
+        self._task = self.loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True)
+        self._thread.start()
+        with _lock:
+            _state["running"] = True
+
+    def stop(self):
+        """Stop monitoring"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+        with _lock:
+            _state["running"] = False
+
+_monitor = None
+
+def start(loop=None):
+    """Start monitoring the running event loop (idempotent)"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor(loop or asyncio.get_running_loop())
+        _monitor.start()
+        logger.info(f"Event loop monitor started (threshold {STALL_THRESHOLD * 1000:.0f} ms)")
+    return _monitor
+
+def loop_thread_id():
+    """Return the ident of the thread running the monitored loop, or None before it started"""
+    return _monitor.loop_thread_id if _monitor is not None else None
+
+def snapshot():
+    """Return the current lag and the worst offenders, by total blocked time"""
+    with _lock:
+        state = dict(_state)
+        offenders = sorted((dict(offender) for offender in _offenders.values()),
+                           key=lambda offender: offender["total"], reverse=True)
+    for offender in offenders:
+        offender["stack"] = "".join(traceback.format_list(offender["stack"][-8:]))
+    state["offenders"] = offenders
+    return state
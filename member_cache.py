@@ -0,0 +1,180 @@
+"""
+StreamNotify+ Member Cache Module
+Small LRU of guild members fetched on demand, so the bot can run without caching every member.
+"""
+import os
+import time
+import asyncio
+import logging
+import collections
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Disable discord.py's full member cache and guild chunking
+LIGHT_MEMBER_CACHE = os.getenv("LIGHT_MEMBER_CACHE", "0") == "1"
+
+# Members kept by the on-demand cache
+MEMBER_LRU_SIZE = int(os.getenv("MEMBER_LRU_SIZE", "512"))
+
+# Seconds before a cached member (or a "not in this guild" answer) is fetched again
+MEMBER_TTL = 600
+
+# Members fetched in parallel when resolving a ranking
+FETCH_BATCH = 10
+
+# Seconds before a guild's member ID list is paged in again (join and remove events keep it current meanwhile)
+MEMBER_IDS_TTL = 3600
+
+def client_options():
+    """Return the extra commands.Bot options for the configured cache mode"""
+    if not LIGHT_MEMBER_CACHE:
+        return {}
+    return {
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False
+    }
+
+class MemberLRU:
+    """(guild_id, user_id) -> Member, including negative answers, with LRU eviction and a TTL"""
+
+    def __init__(self, maxsize=MEMBER_LRU_SIZE, ttl=MEMBER_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, member):
+        """Insert an entry and evict the least recently used ones"""
+        self._entries[key] = (member, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get(self, guild, user_id):
+        """Return the member of guild with this ID, or None if they are not in it"""
+        user_id = int(user_id)
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        key = (guild.id, user_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None
+        except discord.HTTPException as e:
+            # Transient failure: do not remember it
+            logger.warning(f"Failed to fetch member {user_id} of guild {guild.id}: {e}")
+            return None
+        self._store(key, member)
+        return member
+
+    def invalidate(self, guild_id, user_id):
+        """Forget a member (e.g. after they left or were updated)"""
+        self._entries.pop((guild_id, int(user_id)), None)
+
+members = MemberLRU()
+
+class GuildMemberIds:
+    """guild_id -> IDs of its members, paged in over HTTP and kept current by join and remove events"""
+
+    def __init__(self, ttl=MEMBER_IDS_TTL):
+        self.ttl = ttl
+        self._ids = {}
+        # Sets being paged in, so events arriving meanwhile are not lost
+        self._loading = {}
+        self._locks = collections.defaultdict(asyncio.Lock)
+
+    def __len__(self):
+        return sum(len(ids) for ids, _ in self._ids.values())
+
+    async def get(self, guild):
+        """Return the set of member IDs of a guild (empty if the list cannot be fetched)"""
+        entry = self._ids.get(guild.id)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        async with self._locks[guild.id]:
+            entry = self._ids.get(guild.id)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+            ids = self._loading[guild.id] = set()
+            try:
+                async for member in guild.fetch_members(limit=None):
+                    ids.add(member.id)
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to list the members of guild {guild.id}: {e}")
+                return entry[0] if entry is not None else set()
+            finally:
+                del self._loading[guild.id]
+            self._ids[guild.id] = (ids, time.monotonic() + self.ttl)
+            return ids
+
+    def _sets(self, guild_id):
+        """Return the guild's ID sets an event must update: the current one and one being paged in"""
+        entry = self._ids.get(guild_id)
+        return [ids for ids in (entry and entry[0], self._loading.get(guild_id)) if ids is not None]
+
+    def add(self, guild_id, user_id):
+        """Record a member who joined"""
+        for ids in self._sets(guild_id):
+            ids.add(int(user_id))
+
+    def discard(self, guild_id, user_id):
+        """Forget a member who left"""
+        for ids in self._sets(guild_id):
+            ids.discard(int(user_id))
+
+member_ids = GuildMemberIds()
+
+async def resolve_ranked_members(guild, ranked_users, limit):
+    """Return up to limit (member, user_id, xp, level) for the highest ranked users present in guild"""
+    if not LIGHT_MEMBER_CACHE:
+        server_members = {str(member.id): member for member in guild.members}
+        found = []
+        for user_id, xp, level in ranked_users:
+            member = server_members.get(user_id)
+            if member is not None:
+                found.append((member, user_id, xp, level))
+                if len(found) == limit:
+                    break
+        return found
+
+    # Rank within the guild from its member IDs, then fetch only the members shown
+    guild_ids = await member_ids.get(guild)
+    ranked_members = [entry for entry in ranked_users if int(entry[0]) in guild_ids]
+    found = []
+    start = 0
+    while len(found) < limit and start < len(ranked_members):
+        batch = ranked_members[start:start + min(FETCH_BATCH, limit - len(found))]
+        start += len(batch)
+        resolved = await asyncio.gather(*(members.get(guild, user_id) for user_id, _, _ in batch))
+        # A member who left since the list was paged in resolves to None; the next one takes their place
+        found.extend((member, user_id, xp, level) for member, (user_id, xp, level) in zip(resolved, batch) if member is not None)
+    return found
+
+async def iter_member_ids(guild, role=None):
+    """Yield the IDs of the non-bot members of a guild (or of a role)"""
+    if not LIGHT_MEMBER_CACHE:
+        for member in (role.members if role else guild.members):
+            if not member.bot:
+                yield member.id
+        return
+
+    # Without a member cache, page through the member list over HTTP
+    async for member in guild.fetch_members(limit=None):
+        if member.bot:
+            continue
+        if role is None or member.get_role(role.id) is not None:
+            yield member.id
@@ -0,0 +1,89 @@
+"""
+StreamNotify+ Message Templates Module
+Notification messages compiled once into literal/placeholder parts and rendered in a single pass.
+"""
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Placeholders each platform can fill in
+PLATFORM_PLACEHOLDERS = {
+    "twitch": ("user", "game", "title", "link", "ping"),
+    "youtube": ("user", "title", "link", "ping"),
+    "tiktok": ("user", "link", "ping")
+}
+PLACEHOLDERS = frozenset(name for names in PLATFORM_PLACEHOLDERS.values() for name in names)
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+def _escape(text):
+    """Escape literal text for str.format"""
+    return text.replace("{", "{{").replace("}", "}}")
+
+class _Values(dict):
+    """Placeholder values; missing ones render as the placeholder itself"""
+
+    def __missing__(self, name):
+        return f"{{{name}}}"
+
+class MessageTemplate:
+    """A notification message compiled to a format string over its known placeholders"""
+
+    __slots__ = ("source", "_format", "_fields", "unknown")
+
+    def __init__(self, source):
+        self.source = source
+        parts, fields, unknown = [], [], []
+        position = 0
+        for match in _PLACEHOLDER.finditer(source):
+            name = match.group(1)
+            if name not in PLACEHOLDERS:
+                # Kept as literal text, like before templates were compiled
+                unknown.append(name)
+                continue
+            parts.append(_escape(source[position:match.start()]))
+            parts.append(f"{{{name}}}")
+            fields.append(name)
+            position = match.end()
+        parts.append(_escape(source[position:]))
+        self._format = "".join(parts)
+        self._fields = frozenset(fields)
+        self.unknown = tuple(unknown)
+
+    def uses(self, name):
+        """Return True if the template contains the placeholder"""
+        return name in self._fields
+
+    def render(self, **values):
+        """Fill in every placeholder in one pass; those without a value are left as written"""
+        try:
+            return self._format.format_map(values)
+        except KeyError:
+            return self._format.format_map(_Values(values))
+
+    def render_notification(self, ping="", **values):
+        """Return (message, content): content also carries the ping, prepended unless {ping} places it"""
+        message = self.render(ping=ping, **values)
+        if ping and not self.uses("ping"):
+            return message, f"{ping} {message}"
+        return message, message
+
+def invalid_placeholders(platform, source):
+    """Return the placeholders of source that the platform cannot fill in"""
+    allowed = PLATFORM_PLACEHOLDERS.get(platform, ())
+    return [name for name in dict.fromkeys(_PLACEHOLDER.findall(source)) if name not in allowed]
+
+def compile_config(config):
+    """Compile every creator message of a configuration; return {(platform, creator): MessageTemplate}"""
+    templates = {}
+    for platform in PLATFORM_PLACEHOLDERS:
+        for creator, settings in config.get(platform, {}).items():
+            message = settings.get("message")
+            if message is None:
+                continue
+            templates[(platform, creator)] = MessageTemplate(message)
+            invalid = invalid_placeholders(platform, message)
+            if invalid:
+                logger.warning(f"Unsupported placeholders in the {platform} message of {creator}: {', '.join(invalid)}")
+    return templates
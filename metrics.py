@@ -0,0 +1,266 @@
+"""
+StreamNotify+ Metrics Module
+In-process counters, gauges and histograms rendered in the Prometheus text format.
+"""
+import time
+import bisect
+import threading
+import contextlib
+from urllib.parse import urlsplit
+
+# Default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets for payload sizes, in bytes
+SIZE_BUCKETS = (1024, 16384, 131072, 1048576, 8388608, 67108864, 536870912)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+def _escape(value):
+    """Escape a label value for the exposition format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    """Render a {name="value",...} label set"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """Base class holding one child per label combination"""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        # Only taken to create a child or to copy the children when rendering
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels):
+        """Return the label values tuple in declaration order"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _child(self, labels):
+        """Return (creating if needed) the state for a label combination"""
+        key = self._key(labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _items(self):
+        """Return a stable copy of the children for rendering"""
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self):
+        """Render the metric in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in self._items():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+class _Value:
+    """Single float protected by its own lock"""
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1, **labels):
+        """Increase the counter"""
+        child = self._child(labels)
+        with child.lock:
+            child.value += amount
+
+    def value(self, **labels):
+        """Return the current value"""
+        return self._child(labels).value
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        """Set the gauge to a value"""
+        child = self._child(labels)
+        with child.lock:
+            child.value = value
+
+    def dec(self, amount=1, **labels):
+        """Decrease the gauge"""
+        self.inc(-amount, **labels)
+
+class _HistogramState:
+    """Bucket counts, sum and count for one label combination"""
+    __slots__ = ("buckets", "sum", "count", "lock")
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramState(len(self.bounds) + 1)
+
+    def observe(self, value, **labels):
+        """Record one observation"""
+        child = self._child(labels)
+        index = bisect.bisect_left(self.bounds, value)
+        with child.lock:
+            child.buckets[index] += 1
+            child.sum += value
+            child.count += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the wall time spent in a with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_child(self, key, child):
+        with child.lock:
+            buckets = list(child.buckets)
+            total, count = child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, hits in zip(self.bounds + (float("inf"),), buckets):
+            cumulative += hits
+            labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+def render_all():
+    """Render every registered metric"""
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+def aiohttp_trace_config():
+    """Return an aiohttp TraceConfig feeding HTTP_REQUEST_SECONDS"""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.started_at = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - context.started_at,
+            host=urlsplit(str(params.url)).hostname or "",
+            status=str(params.response.status)
+        )
+
+    async def on_request_exception(session, context, params):
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - context.started_at,
+            host=urlsplit(str(params.url)).hostname or "",
+            status="error"
+        )
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+# Bot metrics
+ON_MESSAGE_SECONDS = Histogram(
+    "streamnotify_on_message_seconds",
+    "Time spent handling a MESSAGE_CREATE event"
+)
+XP_WRITES = Counter(
+    "streamnotify_xp_writes_total",
+    "Number of XP updates written to the user store"
+)
+USER_STORE_FLUSH_SECONDS = Histogram(
+    "streamnotify_user_store_flush_seconds",
+    "Time spent writing the user store to disk"
+)
+USER_STORE_FLUSH_BYTES = Histogram(
+    "streamnotify_user_store_flush_bytes",
+    "Size of each user store write",
+    buckets=SIZE_BUCKETS
+)
+POLL_TICK_SECONDS = Histogram(
+    "streamnotify_poll_tick_seconds",
+    "Duration of one poller iteration",
+    ("platform",)
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "streamnotify_http_request_seconds",
+    "Outgoing HTTP request latency",
+    ("host", "status")
+)
+NOTIFICATION_SEND_SECONDS = Histogram(
+    "streamnotify_notification_send_seconds",
+    "Time taken to deliver a creator notification to Discord",
+    ("platform",)
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "streamnotify_event_loop_lag_seconds",
+    "Delay between a scheduled event loop wake-up and the actual one"
+)
+SLASH_COMMAND_SECONDS = Histogram(
+    "streamnotify_slash_command_seconds",
+    "Slash command handling time",
+    ("command", "status")
+)
+CIRCUIT_OPEN = Gauge(
+    "streamnotify_circuit_open",
+    "1 while a host or creator circuit breaker is open or half-open",
+    ("breaker",)
+)
+CIRCUIT_SKIPPED_REQUESTS = Counter(
+    "streamnotify_circuit_skipped_requests_total",
+    "Requests not sent because their circuit breaker was open",
+    ("breaker",)
+)
@@ -0,0 +1,164 @@
+"""
+StreamNotify+ Moderation Log Module
+Append-only journal of moderation cases (warns, timeouts, kicks, bans), indexed in memory by
+guild, user and time for paged history and windowed counts, with escalation rules checked in
+constant time from rolling windows instead of scanning the history.
+"""
+import os
+import json
+import time
+import bisect
+import asyncio
+import logging
+import collections
+import storage
+
+logger = logging.getLogger(__name__)
+
+# Delay before pending cases are appended to disk
+CASE_FLUSH_DELAY = float(os.getenv("CASE_FLUSH_DELAY", "1"))
+
+# Cases per /cases page
+CASES_PER_PAGE = 10
+
+class Escalation(collections.namedtuple("Escalation", "action count window then duration")):
+    """count actions within window seconds lead to then (for duration seconds, for a timeout)"""
+
+# Checked in order; the last rule reached wins
+ESCALATIONS = (
+    Escalation("warn", 3, 24 * 3600, "timeout", 3600),
+    Escalation("warn", 5, 7 * 24 * 3600, "kick", None),
+)
+
+def _read_cases(path):
+    """Read every case of the journal (an interrupted last line is skipped)"""
+    if not os.path.exists(path):
+        return []
+    cases = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                cases.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping a damaged line in {path}")
+    return cases
+
+def _append_lines(path, lines):
+    """Append lines to the journal"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("".join(lines))
+
+class CaseLog:
+    """Moderation cases of every guild, journaled to JSON lines and indexed in memory"""
+
+    def __init__(self, path, escalations=ESCALATIONS):
+        self.path = path
+        self.escalations = escalations
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._pending = []
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        # (guild, user) -> cases in time order; (guild, user, action or None) -> their timestamps
+        self._cases = collections.defaultdict(list)
+        self._times = collections.defaultdict(list)
+        # guild -> last case number
+        self._numbers = collections.defaultdict(int)
+        # (guild, user, rule index) -> timestamps of the rule's last `count` actions
+        self._windows = {}
+
+    def __len__(self):
+        return sum(self._numbers.values())
+
+    async def load(self):
+        """Read the journal and build the indexes (once)"""
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                cases = await storage.run_blocking(_read_cases, self.path)
+            except Exception as e:
+                logger.error(f"Error loading moderation cases: {str(e)}")
+                cases = []
+            for case in cases:
+                self._index(case)
+            self._loaded = True
+
+    def _index(self, case):
+        """Add a case to the indexes; return the escalation it reaches, if any"""
+        guild_id, user_id, action, ts = case["guild"], case["user"], case["action"], case["ts"]
+        self._numbers[guild_id] = max(self._numbers[guild_id], case["case"])
+        self._cases[(guild_id, user_id)].append(case)
+        self._times[(guild_id, user_id, None)].append(ts)
+        self._times[(guild_id, user_id, action)].append(ts)
+
+        reached = None
+        for index, rule in enumerate(self.escalations):
+            if rule.action != action:
+                continue
+            window = self._windows.get((guild_id, user_id, index))
+            if window is None:
+                window = self._windows[(guild_id, user_id, index)] = collections.deque(maxlen=rule.count)
+            window.append(ts)
+            # The oldest of the last `count` actions is inside the window: the threshold is reached
+            if len(window) == rule.count and ts - window[0] <= rule.window:
+                window.clear()
+                reached = rule
+        return reached
+
+    async def record(self, guild_id, user_id, action, moderator_id, reason, duration=None):
+        """Journal a case; return (case, escalation reached or None)"""
+        await self.load()
+        guild_id, user_id = str(guild_id), str(user_id)
+        case = {
+            "case": self._numbers[guild_id] + 1,
+            "ts": time.time(),
+            "guild": guild_id,
+            "user": user_id,
+            "action": action,
+            "moderator": str(moderator_id),
+            "reason": reason,
+            "duration": duration
+        }
+        reached = self._index(case)
+        self._pending.append(json.dumps(case) + "\n")
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+        return case, reached
+
+    async def history(self, guild_id, user_id, page=0, per_page=CASES_PER_PAGE):
+        """Return (cases of the page, newest first, and the number of pages)"""
+        await self.load()
+        cases = self._cases.get((str(guild_id), str(user_id)), [])
+        pages = max(1, -(-len(cases) // per_page))
+        end = len(cases) - page * per_page
+        return cases[max(0, end - per_page):max(0, end)][::-1], pages
+
+    async def count(self, guild_id, user_id, action=None, since=None):
+        """Return the number of cases of a user (of one action), since a timestamp if given"""
+        await self.load()
+        times = self._times.get((str(guild_id), str(user_id), action), [])
+        return len(times) - bisect.bisect_left(times, since) if since is not None else len(times)
+
+    async def _delayed_flush(self):
+        """Wait for the flush delay, then append pending cases"""
+        await asyncio.sleep(CASE_FLUSH_DELAY)
+        await self.flush()
+
+    async def flush(self):
+        """Append pending cases to disk now"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            lines, self._pending = self._pending, []
+            try:
+                await storage.run_blocking(_append_lines, self.path, lines)
+            except Exception as e:
+                # Keep the cases so the next flush retries them in order
+                self._pending[:0] = lines
+                logger.error(f"Error writing moderation cases: {str(e)}")
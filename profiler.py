@@ -0,0 +1,203 @@
+"""
+StreamNotify+ Profiler Module
+On-demand sampling CPU profiles of the live process (every thread: event loop, storage
+workers, web server) and tracemalloc snapshots with diffs, for the /debug commands and
+the token-protected /debug web routes.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import tracemalloc
+import collections
+import loop_monitor
+
+logger = logging.getLogger(__name__)
+
+# Bearer token protecting the /debug web routes; they answer 404 without it
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+
+# Longest profile accepted, and the time between two stack samples
+MAX_PROFILE_SECONDS = 60
+SAMPLE_INTERVAL = 0.005
+
+# Frames kept per allocation traceback once tracemalloc is started
+TRACEMALLOC_FRAMES = 10
+
+# Rows in the top-N reports
+TOP_N = 15
+
+# Leaf frames of threads that are waiting, not working
+IDLE_FRAMES = {"selectors.py:select", "threading.py:wait", "queue.py:get", "socketserver.py:serve_forever"}
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_profile_lock = threading.Lock()
+
+# Baseline of the last snapshot: (tracemalloc snapshot, watched sizes, taken at)
+_baseline = None
+
+# name -> callable returning the number of entries of a cache
+_watched = {}
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+def _short_path(filename):
+    """Return a source path relative to the project or to site-packages, else its file name"""
+    if filename.startswith(PROJECT_DIR):
+        return os.path.relpath(filename, PROJECT_DIR)
+    _, separator, package_path = filename.partition("site-packages" + os.sep)
+    return package_path if separator else os.path.basename(filename)
+
+def _label(code):
+    """Return "path:function" for a code object"""
+    return f"{_short_path(code.co_filename)}:{code.co_name}"
+
+class Profile:
+    """Stack samples collected over a period, keyed by (thread, outermost frame, ..., leaf frame)"""
+
+    def __init__(self, seconds, samples, stacks):
+        self.seconds = seconds
+        self.samples = samples
+        self.stacks = stacks
+
+    def collapsed(self):
+        """Return the stacks in the collapsed format read by flame graph tools"""
+        return "\n".join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: item[1], reverse=True)
+        ) + "\n"
+
+    def top(self, n=TOP_N):
+        """Return the busiest functions as dicts, by samples where they were running (self) and on the stack (total)"""
+        own = collections.Counter()
+        total = collections.Counter()
+        busy = 0
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if not frames or frames[-1] in IDLE_FRAMES:
+                continue
+            busy += count
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [
+            {"function": function, "self": count, "total": total[function],
+             "self_percent": 100 * count / busy, "total_percent": 100 * total[function] / busy}
+            for function, count in own.most_common(n)
+        ]
+
+    def format_top(self, n=TOP_N):
+        """Return the top-N report as fixed-width text"""
+        rows = self.top(n)
+        lines = [f"{self.samples} samples over {self.seconds:.1f} s ({len(self.stacks)} distinct stacks)",
+                 f"{'self %':>7} {'total %':>8}  function"]
+        lines.extend(f"{row['self_percent']:>6.1f}% {row['total_percent']:>7.1f}%  {row['function']}" for row in rows)
+        if not rows:
+            lines.append("(every thread was idle)")
+        return "\n".join(lines)
+
+def sample(seconds, interval=SAMPLE_INTERVAL):
+    """Sample the stacks of every other thread for a number of seconds (blocking: run it in a thread)"""
+    seconds = min(max(float(seconds), 0.1), MAX_PROFILE_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        me = threading.get_ident()
+        loop_thread = loop_monitor.loop_thread_id()
+        stacks = collections.Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                thread = "event-loop" if ident == loop_thread else names.get(ident, str(ident))
+                stacks[(thread, *reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    logger.info(f"Profiled the process for {seconds:.1f} s ({samples} samples)")
+    return Profile(seconds, samples, stacks)
+
+def watch(name, size):
+    """Report the entry count of a cache, size() being called at each snapshot and diff"""
+    _watched[name] = size
+
+def watched_sizes():
+    """Return the current entry count of every watched cache"""
+    sizes = {}
+    for name, size in _watched.items():
+        try:
+            sizes[name] = size()
+        except Exception:
+            sizes[name] = None
+    return sizes
+
+def take_snapshot():
+    """Start tracemalloc if needed and record the baseline for diff(); return the traced memory and cache sizes"""
+    global _baseline
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        logger.info(f"tracemalloc started ({TRACEMALLOC_FRAMES} frames)")
+    sizes = watched_sizes()
+    _baseline = (tracemalloc.take_snapshot(), sizes, time.time())
+    current, peak = tracemalloc.get_traced_memory()
+    return {"traced_bytes": current, "peak_bytes": peak, "caches": sizes}
+
+def diff(n=TOP_N):
+    """Compare the heap and the watched caches with the last snapshot; return None without one"""
+    if _baseline is None or not tracemalloc.is_tracing():
+        return None
+    baseline, sizes_before, taken_at = _baseline
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+    ))
+    top = []
+    for stat in snapshot.compare_to(baseline, "lineno")[:n]:
+        frame = stat.traceback[0]
+        top.append({"where": f"{_short_path(frame.filename)}:{frame.lineno}", "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff, "size": stat.size})
+    sizes = watched_sizes()
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "seconds": time.time() - taken_at,
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": top,
+        "caches": {name: {"before": sizes_before.get(name), "now": size} for name, size in sizes.items()}
+    }
+
+def format_diff(result):
+    """Return a diff() result as fixed-width text"""
+    lines = [f"Since the snapshot ({result['seconds'] / 60:.0f} min ago): traced {format_bytes(result['traced_bytes'])}, "
+             f"peak {format_bytes(result['peak_bytes'])}",
+             f"{'size':>11} {'blocks':>8}  allocated at"]
+    lines.extend(f"{format_bytes(row['size_diff']):>11} {row['count_diff']:>+8}  {row['where']}" for row in result["top"])
+    lines.append("")
+    lines.extend(f"{name}: {sizes['before']} -> {sizes['now']}" for name, sizes in result["caches"].items())
+    return "\n".join(lines)
+
+def stop_tracing():
+    """Stop tracemalloc and drop the baseline (tracing slows allocations down)"""
+    global _baseline
+    _baseline = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def format_bytes(size):
+    """Render a byte count (negative for shrinking) with a binary unit"""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
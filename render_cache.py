@@ -0,0 +1,80 @@
+"""
+StreamNotify+ Render Cache Module
+Short-lived cache of prebuilt embed payloads, keyed by what they show and the version of the data they were built from.
+"""
+import os
+import time
+import asyncio
+import collections
+import discord
+
+# Seconds a rendered payload is reused while its data version is unchanged
+RENDER_CACHE_TTL = float(os.getenv("RENDER_CACHE_TTL", "30"))
+
+# Payloads kept at most (per-user panels are small but numerous)
+RENDER_CACHE_SIZE = 1024
+
+class RenderCache:
+    """LRU of embed payloads; concurrent misses for the same key share one build"""
+
+    def __init__(self, ttl=RENDER_CACHE_TTL, maxsize=RENDER_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # key -> (version, expires, payload)
+        self._entries = collections.OrderedDict()
+        # (key, version) -> task building the payload
+        self._building = {}
+        self.hits = 0
+        self.builds = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, key, version, build):
+        """Return the payload for key at version, awaiting build() only when it is missing or stale"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version and entry[1] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+        task = self._building.get((key, version))
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._build(key, version, build))
+            self._building[(key, version)] = task
+        else:
+            self.hits += 1
+        # Shielded so a cancelled interaction does not cancel the build shared with others
+        return await asyncio.shield(task)
+
+    async def _build(self, key, version, build):
+        """Run build() and store its payload"""
+        try:
+            self.builds += 1
+            payload = await build()
+            self._entries[key] = (version, time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return payload
+        finally:
+            del self._building[(key, version)]
+
+    async def embed(self, key, version, build):
+        """Like get() for builders returning a discord.Embed (or None); return a fresh Embed each call"""
+        async def build_payload():
+            embed = await build()
+            return embed.to_dict() if embed is not None else None
+
+        payload = await self.get(key, version, build_payload)
+        return discord.Embed.from_dict(payload) if payload is not None else None
+
+    def invalidate(self, predicate=None):
+        """Drop every payload, or those whose key matches predicate(key)"""
+        if predicate is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+renders = RenderCache()
@@ -0,0 +1,70 @@
+"""
+StreamNotify+ Seen Items Module
+Remembers the last item IDs (videos) seen per creator, so a poll fetching several items
+announces every genuinely new one, oldest first, and never one that was only reordered or pinned.
+"""
+import os
+import logging
+import collections
+
+logger = logging.getLogger(__name__)
+
+# Items fetched per creator and poll (a YouTube search costs the same quota for 1 or 50)
+POLL_ITEMS = int(os.getenv("POLL_ITEMS", "5"))
+
+# Most new items announced per creator and poll, so catching up after an outage does not flood channels
+CATCH_UP_LIMIT = max(1, int(os.getenv("CATCH_UP_LIMIT", "3")))
+
+# Item IDs remembered per creator; well above POLL_ITEMS so a pinned item stays known
+SEEN_SIZE = 50
+
+class SeenIds:
+    """Ring buffer of the latest item IDs of one creator, with set lookups"""
+
+    def __init__(self, maxlen=SEEN_SIZE):
+        self._order = collections.deque(maxlen=maxlen)
+        self._ids = set()
+        # False until a poll recorded the creator's current items (a pushed item alone is not a baseline)
+        self.primed = False
+
+    def __contains__(self, item_id):
+        return item_id in self._ids
+
+    def __len__(self):
+        return len(self._order)
+
+    def add(self, item_id):
+        """Remember an item, forgetting the oldest one when full; return False if it was already known"""
+        if item_id in self._ids:
+            return False
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(item_id)
+        self._ids.add(item_id)
+        return True
+
+class SeenCache(dict):
+    """creator -> SeenIds"""
+
+    def unseen(self, creator, item_ids, limit=CATCH_UP_LIMIT):
+        """Record the item IDs of a poll (oldest first) and return the new ones to announce, oldest first
+
+        The first poll of a creator only announces its newest item; beyond limit new items, the older ones are skipped.
+        """
+        seen = self.setdefault(creator, SeenIds())
+        if seen.primed:
+            new = [item_id for item_id in item_ids if item_id not in seen]
+        else:
+            new = [item_id for item_id in item_ids[-1:] if item_id not in seen]
+            seen.primed = True
+        for item_id in item_ids:
+            seen.add(item_id)
+
+        if len(new) > limit:
+            logger.warning(f"{len(new)} new items for {creator}, announcing the latest {limit}")
+            new = new[-limit:]
+        return new
+
+    def mark(self, creator, item_id):
+        """Record one pushed item; return True if it is new"""
+        return self.setdefault(creator, SeenIds()).add(item_id)
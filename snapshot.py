@@ -0,0 +1,285 @@
+"""
+StreamNotify+ Snapshot Module
+Binary user snapshot: a small header followed by fixed-width records sorted by user ID,
+opened through mmap so single lookups are binary searches. Fields without a column follow
+the records as a JSON trailer, which readers of the records alone can ignore.
+"""
+import os
+import mmap
+import json
+import heapq
+import struct
+import operator
+from user_table import UserTable, FIELDS, day_to_epoch, epoch_to_day
+
+MAGIC = b"SNUS"
+VERSION = 1
+
+# magic, version, record size, record count
+HEADER = struct.Struct("<4sHHQ")
+
+# user_id, xp, balance, level, daily_last (epoch day, -1 when never claimed)
+RECORD = struct.Struct("<Qqqii")
+USER_ID = struct.Struct("<Q")
+
+# Records copied out of the mapping at a time by whole-table scans
+SCAN_CHUNK = 65536
+
+class SnapshotError(Exception):
+    """Raised when a file is not a valid user snapshot"""
+
+def pack_record(user_id, record):
+    """Encode one user record"""
+    return RECORD.pack(
+        int(user_id),
+        record.get("xp", 0),
+        record.get("balance", 0),
+        record.get("level", 1),
+        day_to_epoch(record.get("daily_last"))
+    )
+
+def unpack_record(values):
+    """Decode one RECORD tuple into (user_id, record)"""
+    user_id, xp, balance, level, daily = values
+    return str(user_id), {
+        "xp": xp,
+        "level": level,
+        "balance": balance,
+        "daily_last": epoch_to_day(daily)
+    }
+
+def _extras_trailer(extras):
+    """Encode {"user_id": {field: value}} for the fields without a column"""
+    return json.dumps(extras, separators=(",", ":")).encode("utf-8") if extras else b""
+
+def write_snapshot(path, records):
+    """Write (user_id, record) pairs to a snapshot file atomically; return the number of records"""
+    records = sorted(records, key=lambda item: int(item[0]))
+    packed = [pack_record(user_id, record) for user_id, record in records]
+    extras = {}
+    for user_id, record in records:
+        extra = {key: value for key, value in record.items() if key not in FIELDS}
+        if extra:
+            extras[str(user_id)] = extra
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(packed)))
+        f.writelines(packed)
+        f.write(_extras_trailer(extras))
+    os.replace(tmp_path, path)
+    return len(packed)
+
+def _write_rows(path, rows, extras):
+    """Write (user_id, xp, balance, level, daily) tuples in user ID order and the extras trailer; return the size"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        count = 0
+        for row in rows:
+            f.write(RECORD.pack(*row))
+            count += 1
+        f.write(_extras_trailer(extras))
+        size = f.tell()
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count))
+    os.replace(tmp_path, path)
+    return size
+
+def write_table(path, table):
+    """Write a UserTable or SnapshotTable (or a snapshot of one) without materializing record dicts"""
+    if isinstance(table, SnapshotTable):
+        return _write_rows(path, table.rows(), table.extras_by_id())
+    rows = sorted(range(len(table.ids)), key=table.ids.__getitem__)
+    return _write_rows(
+        path,
+        ((table.ids[row], table.xp[row], table.balance[row], table.level[row], table.daily[row]) for row in rows),
+        {str(table.ids[row]): extra for row, extra in table.extras.items()}
+    )
+
+class Snapshot:
+    """Read-only mmap view of a snapshot file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER.size:
+                raise SnapshotError(f"{path} is too small to be a snapshot")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        magic, version, record_size, count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise SnapshotError(f"{path} is not a version {VERSION} user snapshot")
+        if HEADER.size + count * RECORD.size > size:
+            self.close()
+            raise SnapshotError(f"{path} is truncated")
+        self.count = count
+        trailer = self._map[HEADER.size + count * RECORD.size:]
+        try:
+            # "user_id" -> fields without a column
+            self.extras = json.loads(trailer) if trailer else {}
+        except ValueError:
+            self.close()
+            raise SnapshotError(f"{path} has a damaged extras trailer")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the mapping"""
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _user_id_at(self, index):
+        """Return the user ID of the index-th record"""
+        return USER_ID.unpack_from(self._map, HEADER.size + index * RECORD.size)[0]
+
+    def get(self, user_id):
+        """Binary search a user's record, or None"""
+        user_id = int(user_id)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._user_id_at(middle) < user_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._user_id_at(low) == user_id:
+            user_id, record = unpack_record(RECORD.unpack_from(self._map, HEADER.size + low * RECORD.size))
+            record.update(self.extras.get(user_id, {}))
+            return record
+        return None
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def items(self):
+        """Yield (user_id, record) pairs in user ID order"""
+        # unpack_from keeps no buffer export alive, so the map can be closed mid-iteration
+        for offset in range(HEADER.size, HEADER.size + self.count * RECORD.size, RECORD.size):
+            user_id, record = unpack_record(RECORD.unpack_from(self._map, offset))
+            record.update(self.extras.get(user_id, {}))
+            yield user_id, record
+
+    def rows(self):
+        """Yield raw (user_id, xp, balance, level, daily) tuples in user ID order"""
+        end = HEADER.size + self.count * RECORD.size
+        # Chunks are copied out, so no buffer export keeps the map from being closed
+        for start in range(HEADER.size, end, SCAN_CHUNK * RECORD.size):
+            yield from RECORD.iter_unpack(self._map[start:min(start + SCAN_CHUNK * RECORD.size, end)])
+
+    def to_table(self):
+        """Load every record into a UserTable, straight from the packed columns"""
+        table = UserTable()
+        view = memoryview(self._map)[HEADER.size:HEADER.size + self.count * RECORD.size]
+        try:
+            for user_id, xp, balance, level, daily in RECORD.iter_unpack(view):
+                table.append_row(user_id, xp, level, balance, daily)
+        finally:
+            view.release()
+        for user_id, extra in self.extras.items():
+            table.set(user_id, {**table.get(user_id), **extra})
+        return table
+
+class SnapshotTable:
+    """User records read in place from a snapshot, with the records written since kept in an overlay table
+
+    Same interface as UserTable for the user store: lookups are binary searches of the mapping,
+    and only whole-table operations (ranking, totals, flushes) scan it.
+    """
+
+    def __init__(self, base, overlay=None, added=0):
+        self.base = base
+        self.overlay = overlay if overlay is not None else UserTable()
+        # Users in the overlay that the snapshot does not have
+        self._added = added
+
+    def __len__(self):
+        return self.base.count + self._added
+
+    def __contains__(self, user_id):
+        return user_id in self.overlay or self.base.get(user_id) is not None
+
+    def get(self, user_id):
+        """Return a user's record as a new dict, or None"""
+        user_id = int(user_id)
+        record = self.overlay.get(user_id)
+        return record if record is not None else self.base.get(user_id)
+
+    def set(self, user_id, record):
+        """Insert or replace a user's record (in the overlay)"""
+        is_new = user_id not in self
+        self.overlay.set(user_id, record)
+        if is_new:
+            self._added += 1
+
+    def rows(self):
+        """Yield raw (user_id, xp, balance, level, daily) tuples of every user in user ID order"""
+        overlay = self.overlay
+        order = sorted(range(len(overlay.ids)), key=overlay.ids.__getitem__)
+        replaced = set(overlay.ids)
+        return heapq.merge(
+            (row for row in self.base.rows() if row[0] not in replaced),
+            ((overlay.ids[row], overlay.xp[row], overlay.balance[row], overlay.level[row], overlay.daily[row]) for row in order)
+        )
+
+    def extras_by_id(self):
+        """Return {"user_id": extra fields} of every user"""
+        replaced = {str(user_id) for user_id in self.overlay.ids}
+        extras = {user_id: extra for user_id, extra in self.base.extras.items() if user_id not in replaced}
+        extras.update((str(self.overlay.ids[row]), extra) for row, extra in self.overlay.extras.items())
+        return extras
+
+    def items(self):
+        """Yield (user_id, record) pairs, user IDs as strings like the JSON layout"""
+        extras = self.extras_by_id()
+        for user_id, xp, balance, level, daily in self.rows():
+            user_id = str(user_id)
+            record = {"xp": xp, "level": level, "balance": balance, "daily_last": epoch_to_day(daily)}
+            record.update(extras.get(user_id, {}))
+            yield user_id, record
+
+    def to_dict(self):
+        """Return the {"user_id": {...}} JSON layout"""
+        return dict(self.items())
+
+    def total_balance(self):
+        """Return the sum of every balance"""
+        return sum(row[2] for row in self.rows())
+
+    def ranked(self):
+        """Return (user_id, xp, level) tuples sorted by XP, highest first"""
+        rows = list(self.rows())
+        rows.sort(key=operator.itemgetter(1), reverse=True)
+        return [(str(row[0]), row[1], row[3]) for row in rows]
+
+    def snapshot(self):
+        """Return an independent copy for a flush; the mapping is shared, it is never written"""
+        overlay = self.overlay.snapshot()
+        return SnapshotTable(self.base, overlay, self._added)
+
+def json_to_snapshot(json_path, snapshot_path):
+    """Convert a users.json file to a snapshot; return the number of records"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        users = json.load(f)
+    return write_snapshot(snapshot_path, users.items())
+
+def snapshot_to_json(snapshot_path, json_path):
+    """Convert a snapshot back to the users.json layout; return the number of records"""
+    with Snapshot(snapshot_path) as snapshot:
+        users = dict(snapshot.items())
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=2)
+    return len(users)
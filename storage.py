@@ -0,0 +1,292 @@
+"""
+StreamNotify+ Storage Module
+Async facade over the user and config files. Serialization and disk writes run in a bounded thread pool.
+"""
+import os
+import copy
+import json
+import time
+import asyncio
+import logging
+import contextlib
+import concurrent.futures
+import metrics
+from user_table import UserTable
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+# Threads available for blocking storage work
+STORAGE_WORKERS = int(os.getenv("STORAGE_WORKERS", "2"))
+
+# Delay before dirty user data is written back, so bursts of XP updates share one write
+USER_FLUSH_DELAY = float(os.getenv("USER_FLUSH_DELAY", "2"))
+
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=STORAGE_WORKERS, thread_name_prefix="storage")
+
+def default_user():
+    """Return the record of a user who never interacted with the bot"""
+    return {
+        "xp": 0,
+        "level": 1,
+        "balance": 0,
+        "daily_last": None
+    }
+
+async def run_blocking(func, *args):
+    """Run a blocking function in the storage thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+def _read_json(path, default):
+    """Read a JSON file, creating it with the default content if missing"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    _write_json(path, default)
+    return copy.deepcopy(default)
+
+def _read_user_table(path, default):
+    """Read the user file into a compact table"""
+    return UserTable.from_dict(_read_json(path, default))
+
+def _write_user_table(path, table):
+    """Write a table snapshot in the users.json layout"""
+    return _write_json(path, table.to_dict())
+
+def _read_user_snapshot(path, json_path, default):
+    """Map the binary user snapshot, migrating from users.json on first use
+
+    Records are not loaded: lookups binary-search the mapping and written records go to an overlay.
+    """
+    if not os.path.exists(path):
+        table = _read_user_table(json_path, default)
+        snapshot.write_table(path, table)
+        logger.info(f"Migrated {json_path} to binary snapshot {path}")
+    return snapshot.SnapshotTable(snapshot.Snapshot(path))
+
+def _write_json(path, data):
+    """Write a JSON file atomically and return the number of bytes written"""
+    payload = json.dumps(data, indent=2).encode('utf-8')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return len(payload)
+
+class KeyedLocks:
+    """One asyncio.Lock per key, dropped once nobody holds or waits for it"""
+
+    def __init__(self):
+        self._locks = {}
+        self._users = {}
+
+    @contextlib.asynccontextmanager
+    async def hold(self, *keys):
+        """Acquire the locks of several keys, always in the same order to avoid deadlocks"""
+        keys = sorted(set(keys))
+        for key in keys:
+            self._users[key] = self._users.get(key, 0) + 1
+            if key not in self._locks:
+                self._locks[key] = asyncio.Lock()
+        acquired = []
+        try:
+            for key in keys:
+                await self._locks[key].acquire()
+                acquired.append(key)
+            yield
+        finally:
+            for key in reversed(acquired):
+                self._locks[key].release()
+            for key in keys:
+                self._users[key] -= 1
+                if not self._users[key]:
+                    del self._users[key]
+                    del self._locks[key]
+
+class UserStore:
+    """Compact in-memory user table persisted to JSON (or a mapped binary snapshot) with write-behind flushes"""
+
+    def __init__(self, path, default=None, snapshot_path=None):
+        self.path = path
+        self.default = default or {}
+        # When set, the table is persisted as a binary snapshot instead of JSON
+        self.snapshot_path = snapshot_path
+        self.locks = KeyedLocks()
+        # Data version, bumped on every committed change
+        self.version = 0
+        # Data version contained in the last file written
+        self.flushed_version = 0
+        self._users = None
+        self._load_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._dirty = False
+        # Set when the file could not be read: the default table in memory must never replace it
+        self.read_only = False
+
+    async def load(self):
+        """Load the user file once, in the thread pool"""
+        if self._users is not None:
+            return
+        async with self._load_lock:
+            if self._users is None:
+                try:
+                    if self.snapshot_path:
+                        self._users = await run_blocking(_read_user_snapshot, self.snapshot_path, self.path, self.default)
+                    else:
+                        self._users = await run_blocking(_read_user_table, self.path, self.default)
+                except Exception as e:
+                    logger.error(f"Error loading users, changes will not be saved until restart: {str(e)}")
+                    self._users = UserTable.from_dict(self.default)
+                    self.read_only = True
+
+    async def get_user(self, user_id):
+        """Return a copy of a user's record, creating it if needed"""
+        await self.load()
+        user_id = str(user_id)
+        record = self._users.get(user_id)
+        if record is None:
+            async with self.locks.hold(user_id):
+                record = self._users.get(user_id)
+                if record is None:
+                    record = default_user()
+                    self._commit({user_id: record})
+        return record
+
+    async def all_users(self):
+        """Return every record in the {"user_id": {...}} layout (materializes the whole table)"""
+        await self.load()
+        return self._users.to_dict()
+
+    async def ranked(self):
+        """Return (user_id, xp, level) tuples sorted by XP, highest first"""
+        await self.load()
+        return self._users.ranked()
+
+    async def total_balance(self):
+        """Return the sum of every balance"""
+        await self.load()
+        return self._users.total_balance()
+
+    @contextlib.asynccontextmanager
+    async def edit(self, *user_ids):
+        """Lock users and yield editable copies of their records, committed together on success"""
+        await self.load()
+        user_ids = [str(user_id) for user_id in user_ids]
+        async with self.locks.hold(*user_ids):
+            originals = {user_id: self._users.get(user_id) for user_id in user_ids}
+            drafts = {user_id: dict(record) if record is not None else default_user()
+                      for user_id, record in originals.items()}
+            yield drafts[user_ids[0]] if len(user_ids) == 1 else drafts
+            changed = {user_id: draft for user_id, draft in drafts.items() if draft != originals[user_id]}
+            if changed:
+                self._commit(changed)
+
+    async def update(self, user_id, mutator):
+        """Apply mutator(record) to a user's record under its lock and return the new record"""
+        async with self.edit(user_id) as record:
+            mutator(record)
+        return dict(record)
+
+    async def set_user(self, user_id, data):
+        """Replace a user's record"""
+        async with self.edit(user_id) as record:
+            record.clear()
+            record.update(data)
+
+    def _commit(self, records):
+        """Store changed records and schedule a write-behind flush"""
+        for user_id, record in records.items():
+            self._users.set(user_id, record)
+        self.version += 1
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        """Wait for the flush delay, then write the table"""
+        await asyncio.sleep(USER_FLUSH_DELAY)
+        await self.flush()
+
+    async def flush(self):
+        """Write the user table to disk now if it changed"""
+        async with self._flush_lock:
+            if not self._dirty or self.read_only:
+                return
+            self._dirty = False
+            # Copying the columns is a few memcpy calls; serialization happens in the pool
+            table_snapshot = self._users.snapshot()
+            version = self.version
+            started = time.perf_counter()
+            try:
+                if self.snapshot_path:
+                    size = await run_blocking(snapshot.write_table, self.snapshot_path, table_snapshot)
+                else:
+                    size = await run_blocking(_write_user_table, self.path, table_snapshot)
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Error saving users: {str(e)}")
+                return
+            self.flushed_version = version
+            metrics.USER_STORE_FLUSH_SECONDS.observe(time.perf_counter() - started)
+            metrics.USER_STORE_FLUSH_BYTES.observe(size)
+
+class ConfigStore:
+    """Notification configuration cached in memory and saved in the thread pool"""
+
+    def __init__(self, path, default, compile=None):
+        self.path = path
+        self.default = default
+        # Config version, bumped on every save
+        self.version = 0
+        # Optional compile(config) run whenever the configuration is loaded or saved; result kept in .compiled
+        self._compile = compile
+        self.compiled = None
+        self._config = None
+        self._load_lock = asyncio.Lock()
+        self._save_lock = asyncio.Lock()
+
+    async def load(self):
+        """Return a private copy of the configuration"""
+        if self._config is None:
+            async with self._load_lock:
+                if self._config is None:
+                    try:
+                        self._config = await run_blocking(_read_json, self.path, self.default)
+                    except Exception as e:
+                        logger.error(f"Error loading config: {str(e)}")
+                        return copy.deepcopy(self.default)
+                    self._recompile()
+        return copy.deepcopy(self._config)
+
+    async def load_versioned(self):
+        """Return a private copy of the configuration and the version it was taken at"""
+        config = await self.load()
+        return config, self.version
+
+    async def save_if_version(self, config, version):
+        """Save only if no other save happened since version (compare-and-swap); return whether it was saved"""
+        if version != self.version:
+            return False
+        await self.save(config)
+        return True
+
+    async def save(self, config):
+        """Replace the configuration and write it to disk"""
+        self._config = copy.deepcopy(config)
+        self.version += 1
+        self._recompile()
+        snapshot = self._config
+        async with self._save_lock:
+            try:
+                await run_blocking(_write_json, self.path, snapshot)
+            except Exception as e:
+                logger.error(f"Error saving config: {str(e)}")
+
+    def _recompile(self):
+        """Recompile the cached configuration"""
+        if self._compile is not None:
+            self.compiled = self._compile(self._config)
@@ -0,0 +1,175 @@
+"""
+StreamNotify+ Telemetry Module
+Live state of the Discord gateway and of the background pollers, shared between the bot and the web server.
+"""
+import time
+import threading
+import functools
+import contextvars
+import metrics
+
+# A loop is considered stale once it has not run for this many intervals (plus a grace period);
+# errors inside its ticks are reported but do not make it stale
+STALE_INTERVALS = 2
+STALE_GRACE_SECONDS = 60
+
+_lock = threading.Lock()
+
+_gateway = {
+    "connected": False,
+    "latency": None,
+    "connected_since": None,
+    "last_ready": None,
+    "last_disconnect": None,
+    "disconnects": 0
+}
+
+_loops = {}
+
+_latency_provider = None
+
+_current_tick = contextvars.ContextVar("current_tick", default=None)
+
+class LoopTick:
+    """Counters collected during a single poller iteration"""
+    __slots__ = ("items_checked", "errors")
+
+    def __init__(self):
+        self.items_checked = 0
+        self.errors = 0
+
+def set_latency_provider(provider):
+    """Register a callable returning the current gateway latency in seconds"""
+    global _latency_provider
+    _latency_provider = provider
+
+def register_loop(name, interval_seconds):
+    """Declare a poller so it can be reported before its first tick"""
+    with _lock:
+        if name not in _loops:
+            _loops[name] = {
+                "interval": interval_seconds,
+                "registered_at": time.time(),
+                "last_run": None,
+                "last_success": None,
+                "last_duration": None,
+                "items_checked": 0,
+                "items_total": 0,
+                "ticks": 0,
+                "errors": 0,
+                "last_errors": 0,
+                "consecutive_errors": 0
+            }
+        else:
+            _loops[name]["interval"] = interval_seconds
+
+def record_gateway_connected(latency=None):
+    """Record that the gateway session is up (on_ready / on_resumed)"""
+    now = time.time()
+    with _lock:
+        if not _gateway["connected"]:
+            _gateway["connected_since"] = now
+        _gateway["connected"] = True
+        _gateway["last_ready"] = now
+        if latency is not None:
+            _gateway["latency"] = latency
+
+def record_gateway_disconnected():
+    """Record that the gateway session dropped"""
+    with _lock:
+        if _gateway["connected"]:
+            _gateway["disconnects"] += 1
+        _gateway["connected"] = False
+        _gateway["connected_since"] = None
+        _gateway["last_disconnect"] = time.time()
+
+def record_loop_tick(name, duration, items_checked, errors):
+    """Record the outcome of one poller iteration"""
+    now = time.time()
+    with _lock:
+        stats = _loops.get(name)
+        if stats is None:
+            return
+        stats["last_run"] = now
+        stats["last_duration"] = duration
+        stats["items_checked"] = items_checked
+        stats["items_total"] += items_checked
+        stats["ticks"] += 1
+        stats["last_errors"] = errors
+        if errors:
+            stats["errors"] += errors
+            stats["consecutive_errors"] += 1
+        else:
+            stats["last_success"] = now
+            stats["consecutive_errors"] = 0
+
+def current_tick():
+    """Return the counters of the poller iteration running in this task"""
+    tick = _current_tick.get()
+    if tick is None:
+        # Called outside a tracked loop: hand out a throwaway tick
+        tick = LoopTick()
+    return tick
+
+def tracked_loop(name):
+    """Decorator recording duration, items checked and errors for a poller coroutine"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            tick = LoopTick()
+            token = _current_tick.set(tick)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                tick.errors += 1
+                raise
+            finally:
+                _current_tick.reset(token)
+                duration = time.perf_counter() - started
+                metrics.POLL_TICK_SECONDS.observe(duration, platform=name)
+                record_loop_tick(name, duration, tick.items_checked, tick.errors)
+        return wrapper
+    return decorator
+
+def _is_stale(stats, now):
+    """Check whether a poller missed too many of its scheduled runs (whatever their errors)"""
+    reference = stats["last_run"] or stats["registered_at"]
+    return now - reference > stats["interval"] * STALE_INTERVALS + STALE_GRACE_SECONDS
+
+def snapshot():
+    """Return a consistent copy of the gateway and poller state"""
+    now = time.time()
+    latency = None
+    if _latency_provider is not None:
+        try:
+            latency = _latency_provider()
+        except Exception:
+            latency = None
+
+    with _lock:
+        gateway = dict(_gateway)
+        loops = {name: dict(stats) for name, stats in _loops.items()}
+
+    # discord.py reports inf before the first heartbeat ack
+    if latency is not None and latency == latency and latency != float("inf"):
+        gateway["latency"] = latency
+
+    for stats in loops.values():
+        stats["stale"] = gateway["connected"] and _is_stale(stats, now)
+        stats["age"] = now - stats["last_run"] if stats["last_run"] else None
+        stats["success_age"] = now - stats["last_success"] if stats["last_success"] else None
+        # Share of checks that failed since startup; a tick failing before checking anything counts as one
+        stats["error_rate"] = stats["errors"] / max(stats["items_total"], stats["errors"], 1)
+
+    return {
+        "gateway": gateway,
+        "loops": loops
+    }
+
+def is_degraded(state=None):
+    """Return True when the gateway is down or a poller is stale"""
+    state = state or snapshot()
+    if not state["gateway"]["connected"]:
+        return True
+    return any(stats["stale"] for stats in state["loops"].values())
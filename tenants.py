@@ -0,0 +1,81 @@
+"""
+StreamNotify+ Tenants Module
+Several bot identities hosted in one process. Each tenant has its own Discord client,
+notification config, user store, ledger and moderation cases; the pollers, the HTTP pool, the storage
+thread pool and the platform lookup caches are shared by all of them.
+"""
+import os
+import re
+import contextlib
+import contextvars
+
+# Extra bot identities: "name=token,name=token"; each keeps its data in data/tenants/<name>/
+DISCORD_TOKENS = os.getenv("DISCORD_TOKENS", "")
+
+TENANTS_DIR = "data/tenants"
+
+TENANT_NAME = re.compile(r"^[\w-]+$")
+
+class Tenant:
+    """One bot identity and the state that belongs to its community"""
+
+    def __init__(self, name, bot, config_store, user_store, bank, case_log):
+        self.name = name
+        self.bot = bot
+        self.config_store = config_store
+        self.user_store = user_store
+        self.bank = bank
+        self.case_log = case_log
+
+    @contextlib.contextmanager
+    def active(self):
+        """Make this tenant the current one in a block (and in the tasks started inside it)"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+# All tenants, the primary (DISCORD_TOKEN, data/) first
+registry = []
+
+# Set while a tenant's client runs, so every event and command task it spawns inherits it
+_current = contextvars.ContextVar("tenant", default=None)
+
+def add(tenant):
+    """Register a tenant; the first one registered is the primary"""
+    registry.append(tenant)
+    return tenant
+
+def current():
+    """Return the tenant whose event is being handled (the primary outside of any)"""
+    return _current.get() or registry[0]
+
+def parse_tokens(value=DISCORD_TOKENS):
+    """Parse DISCORD_TOKENS into [(name, token)], rejecting names unusable as directory names"""
+    tokens = []
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, separator, token = item.partition("=")
+        if not separator or not token.strip() or not TENANT_NAME.match(name.strip()):
+            raise ValueError(f"Invalid DISCORD_TOKENS entry for tenant {name.strip()!r}: expected name=token")
+        tokens.append((name.strip(), token.strip()))
+    names = [name for name, _ in tokens]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate tenant name in DISCORD_TOKENS")
+    return tokens
+
+def data_path(name, filename):
+    """Return the path of a tenant's data file"""
+    return os.path.join(TENANTS_DIR, name, filename)
+
+class TenantBound:
+    """Module-level handle forwarding to the current tenant's object, the way flask.request does"""
+
+    def __init__(self, attribute):
+        self._attribute = attribute
+
+    def __getattr__(self, name):
+        return getattr(getattr(current(), self._attribute), name)
+
+    def __len__(self):
+        return len(getattr(current(), self._attribute))
@@ -0,0 +1,145 @@
+"""
+StreamNotify+ User Table Module
+Compact resident representation of the user records: integer keys and array-backed columns.
+"""
+import array
+import logging
+import datetime
+
+logger = logging.getLogger(__name__)
+
+# Columns stored natively; anything else a record carries goes to the per-row extras
+FIELDS = ("xp", "level", "balance", "daily_last")
+
+# daily_last is kept as days since 1970-01-01, NO_DAY meaning "never claimed"
+NO_DAY = -1
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def day_to_epoch(day):
+    """Convert a YYYY-MM-DD string to an epoch-day integer"""
+    if not day:
+        return NO_DAY
+    return datetime.date.fromisoformat(day).toordinal() - _EPOCH_ORDINAL
+
+def epoch_to_day(value):
+    """Convert an epoch-day integer back to a YYYY-MM-DD string"""
+    if value == NO_DAY:
+        return None
+    return datetime.date.fromordinal(value + _EPOCH_ORDINAL).isoformat()
+
+class UserTable:
+    """User records stored as parallel arrays indexed by row, with a snowflake -> row index"""
+
+    def __init__(self):
+        self._index = {}
+        self.ids = array.array('Q')
+        self.xp = array.array('q')
+        self.level = array.array('i')
+        self.balance = array.array('q')
+        self.daily = array.array('i')
+        # row -> dict of fields that have no column, for forward compatibility
+        self.extras = {}
+
+    @classmethod
+    def from_dict(cls, users):
+        """Build a table from the {"user_id": {...}} JSON layout, skipping entries that cannot be stored"""
+        table = cls()
+        for user_id, record in users.items():
+            try:
+                table.set(user_id, record)
+            except (TypeError, ValueError, AttributeError, OverflowError) as e:
+                logger.error(f"Skipping user entry {user_id!r}: {str(e)}")
+        return table
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, user_id):
+        return int(user_id) in self._index
+
+    def get(self, user_id):
+        """Return a user's record as a new dict, or None"""
+        row = self._index.get(int(user_id))
+        if row is None:
+            return None
+        return self.record(row)
+
+    def record(self, row):
+        """Return the record stored at a row"""
+        record = {
+            "xp": self.xp[row],
+            "level": self.level[row],
+            "balance": self.balance[row],
+            "daily_last": epoch_to_day(self.daily[row])
+        }
+        extra = self.extras.get(row)
+        if extra:
+            record.update(extra)
+        return record
+
+    def set(self, user_id, record):
+        """Insert or replace a user's record"""
+        user_id = int(user_id)
+        values = (
+            int(record.get("xp", 0)),
+            int(record.get("level", 1)),
+            int(record.get("balance", 0)),
+            day_to_epoch(record.get("daily_last"))
+        )
+        if not 0 <= user_id < 2 ** 64:
+            raise ValueError(f"user ID out of range: {user_id}")
+        row = self._index.get(user_id)
+        if row is None:
+            row = len(self.ids)
+            self._index[user_id] = row
+            self.ids.append(user_id)
+            self.xp.append(0)
+            self.level.append(1)
+            self.balance.append(0)
+            self.daily.append(NO_DAY)
+        self.xp[row], self.level[row], self.balance[row], self.daily[row] = values
+        extra = {key: value for key, value in record.items() if key not in FIELDS}
+        if extra:
+            self.extras[row] = extra
+        else:
+            self.extras.pop(row, None)
+
+    def append_row(self, user_id, xp, level, balance, daily):
+        """Append a new user from raw column values (daily as an epoch day)"""
+        self._index[user_id] = len(self.ids)
+        self.ids.append(user_id)
+        self.xp.append(xp)
+        self.level.append(level)
+        self.balance.append(balance)
+        self.daily.append(daily)
+
+    def items(self):
+        """Yield (user_id, record) pairs, user IDs as strings like the JSON layout"""
+        for row in range(len(self.ids)):
+            yield str(self.ids[row]), self.record(row)
+
+    def to_dict(self):
+        """Return the {"user_id": {...}} JSON layout"""
+        return dict(self.items())
+
+    def total_balance(self):
+        """Return the sum of every balance"""
+        return sum(self.balance)
+
+    def ranked(self):
+        """Return (user_id, xp, level) tuples sorted by XP, highest first"""
+        rows = sorted(range(len(self.ids)), key=self.xp.__getitem__, reverse=True)
+        return [(str(self.ids[row]), self.xp[row], self.level[row]) for row in rows]
+
+    def snapshot(self):
+        """Return an independent copy, cheap enough to take on the event loop"""
+        # Column slices are plain memory copies; the index is not needed to serialize
+        copy = UserTable.__new__(UserTable)
+        copy._index = None
+        copy.ids = self.ids[:]
+        copy.xp = self.xp[:]
+        copy.level = self.level[:]
+        copy.balance = self.balance[:]
+        copy.daily = self.daily[:]
+        copy.extras = {row: dict(extra) for row, extra in self.extras.items()}
+        return copy
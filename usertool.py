@@ -0,0 +1,433 @@
+"""
+StreamNotify+ User Data Tool
+Streams user records between users.json, NDJSON, CSV, SQL and the binary snapshot with constant memory.
+
+Usage:
+    python usertool.py convert data/users.json backup.ndjson --verify
+    python usertool.py convert backup.csv data/users.json
+    python usertool.py checksum data/users.bin
+    python usertool.py generate big.json --users 5000000
+"""
+import os
+import re
+import sys
+import csv
+import json
+import time
+import heapq
+import random
+import hashlib
+import argparse
+import tempfile
+import snapshot
+
+# Records sorted in memory at once when building a binary snapshot
+SORT_CHUNK = 1000000
+
+# Rows per INSERT statement in SQL dumps
+SQL_BATCH = 1000
+
+READ_CHUNK = 1 << 16
+
+FORMATS = {
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".csv": "csv",
+    ".sql": "sql",
+    ".bin": "bin"
+}
+
+CSV_FIELDS = ("id", "xp", "level", "balance", "daily_last")
+
+class Progress:
+    """Periodic progress line on stderr"""
+
+    def __init__(self, label, total_bytes=None, enabled=True, interval=1.0):
+        self.label = label
+        self.total_bytes = total_bytes
+        self.enabled = enabled
+        self.interval = interval
+        self.count = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def update(self, position=None):
+        """Count one record and print a line at most once per interval"""
+        self.count += 1
+        if not self.enabled or self.count & 0x3ff:
+            return
+        now = time.perf_counter()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        rate = self.count / (now - self.started)
+        line = f"\r{self.label}: {self.count:,} records ({rate:,.0f}/s)"
+        if position is not None and self.total_bytes:
+            line += f" {100 * position / self.total_bytes:5.1f}%"
+        sys.stderr.write(line)
+        sys.stderr.flush()
+
+    def done(self):
+        """Print the final line"""
+        if self.enabled:
+            elapsed = time.perf_counter() - self.started
+            sys.stderr.write(f"\r{self.label}: {self.count:,} records in {elapsed:.1f}s\n")
+
+class Checksum:
+    """Order-independent checksum of a record set (count + sum of record hashes)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+
+    def add(self, user_id, record):
+        """Fold one record in"""
+        digest = hashlib.blake2b(snapshot.pack_record(user_id, record), digest_size=8).digest()
+        self.total = (self.total + int.from_bytes(digest, "little")) & 0xFFFFFFFFFFFFFFFF
+        self.count += 1
+
+    def hexdigest(self):
+        """Return the checksum as text"""
+        return f"{self.count}:{self.total:016x}"
+
+def detect_format(path, explicit=None):
+    """Return the format name for a path"""
+    if explicit:
+        return explicit
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise SystemExit(f"Cannot guess the format of {path}; use --from/--to")
+    return fmt
+
+def _normalize(record):
+    """Return the record with every field present"""
+    return {
+        "xp": int(record.get("xp", 0)),
+        "level": int(record.get("level", 1)),
+        "balance": int(record.get("balance", 0)),
+        "daily_last": record.get("daily_last") or None
+    }
+
+# Readers: each yields (user_id, record) and reports progress with the file position
+
+def read_json(f, progress):
+    """Incrementally parse the {"user_id": {...}, ...} layout"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    consumed = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, consumed, eof
+        chunk = f.read(READ_CHUNK)
+        if not chunk:
+            eof = True
+        consumed += len(chunk)
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    def expect(chars):
+        nonlocal position
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] not in chars:
+            found = buffer[position:position + 20] or "end of file"
+            raise ValueError(f"Expected one of {chars!r}, found {found!r}")
+        position += 1
+        return buffer[position - 1]
+
+    def decode():
+        nonlocal position
+        while True:
+            skip_whitespace()
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A value ending exactly at the buffer edge may continue in the next chunk
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            position = end
+            return value
+
+    expect("{")
+    skip_whitespace()
+    if position < len(buffer) and buffer[position] == "}":
+        return
+    while True:
+        user_id = decode()
+        expect(":")
+        record = decode()
+        progress.update(consumed)
+        yield str(user_id), _normalize(record)
+        if expect(",}") == "}":
+            return
+
+def read_ndjson(f, progress):
+    """One {"id": ..., ...} object per line"""
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        progress.update()
+        yield str(record.pop("id")), _normalize(record)
+
+def read_csv(f, progress):
+    """CSV with an id,xp,level,balance,daily_last header"""
+    for row in csv.DictReader(f):
+        progress.update()
+        yield row["id"], _normalize(row)
+
+_SQL_ROW = re.compile(r"^\((\d+), (-?\d+), (-?\d+), (-?\d+), (NULL|'(\d{4}-\d{2}-\d{2})')\)[,;]$")
+
+def read_sql(f, progress):
+    """Rows of a dump produced by write_sql"""
+    for line in f:
+        match = _SQL_ROW.match(line.strip())
+        if not match:
+            continue
+        progress.update()
+        user_id, xp, level, balance, _, day = match.groups()
+        yield user_id, {"xp": int(xp), "level": int(level), "balance": int(balance), "daily_last": day}
+
+def read_bin(path, progress):
+    """Records of a binary snapshot, in user ID order"""
+    with snapshot.Snapshot(path) as snap:
+        for user_id, record in snap.items():
+            progress.update()
+            yield user_id, record
+
+def open_reader(path, fmt, progress):
+    """Return a record iterator for a file"""
+    if fmt == "bin":
+        return read_bin(path, progress)
+
+    def records():
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = {"json": read_json, "ndjson": read_ndjson, "csv": read_csv, "sql": read_sql}[fmt]
+            yield from reader(f, progress)
+    return records()
+
+# Writers: each consumes (user_id, record) pairs and returns the number written
+
+def write_json(path, records):
+    """users.json layout, identical to json.dump(users, indent=2)"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for user_id, record in records:
+            f.write(",\n" if count else "\n")
+            # Dumping a one-key object yields exactly the indented "key": {...} block
+            f.write(json.dumps({user_id: record}, indent=2)[2:-2])
+            count += 1
+        f.write("\n}" if count else "}")
+    return count
+
+def write_ndjson(path, records):
+    """One object per line"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for user_id, record in records:
+            f.write(json.dumps({"id": user_id, **record}) + "\n")
+            count += 1
+    return count
+
+def write_csv(path, records):
+    """CSV with a header row"""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDS)
+        for user_id, record in records:
+            writer.writerow((user_id, record["xp"], record["level"], record["balance"], record["daily_last"] or ""))
+            count += 1
+    return count
+
+def write_sql(path, records):
+    """Portable SQL dump (CREATE TABLE + batched INSERTs in a transaction)"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("CREATE TABLE IF NOT EXISTS users (\n"
+                "  id BIGINT PRIMARY KEY,\n"
+                "  xp BIGINT NOT NULL,\n"
+                "  level INTEGER NOT NULL,\n"
+                "  balance BIGINT NOT NULL,\n"
+                "  daily_last DATE\n"
+                ");\nBEGIN;\n")
+        pending = None
+        for user_id, record in records:
+            if pending is not None:
+                f.write(pending + ("," if count % SQL_BATCH else ";") + "\n")
+            if count % SQL_BATCH == 0:
+                f.write("INSERT INTO users (id, xp, level, balance, daily_last) VALUES\n")
+            day = f"'{record['daily_last']}'" if record["daily_last"] else "NULL"
+            pending = f"({int(user_id)}, {record['xp']}, {record['level']}, {record['balance']}, {day})"
+            count += 1
+        if pending is not None:
+            f.write(pending + ";\n")
+        f.write("COMMIT;\n")
+    return count
+
+def write_bin(path, records):
+    """Binary snapshot, sorted with an external merge sort so memory stays bounded"""
+    runs = []
+    directory = tempfile.mkdtemp(prefix="usertool-", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        chunk = []
+        for user_id, record in records:
+            chunk.append(snapshot.pack_record(user_id, record))
+            if len(chunk) >= SORT_CHUNK:
+                runs.append(_write_run(directory, len(runs), chunk))
+                chunk = []
+        if chunk or not runs:
+            runs.append(_write_run(directory, len(runs), chunk))
+
+        count = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(snapshot.HEADER.pack(snapshot.MAGIC, snapshot.VERSION, snapshot.RECORD.size, 0))
+            for data in heapq.merge(*(_iter_run(run) for run in runs), key=_record_key):
+                out.write(data)
+                count += 1
+            out.seek(0)
+            out.write(snapshot.HEADER.pack(snapshot.MAGIC, snapshot.VERSION, snapshot.RECORD.size, count))
+        os.replace(tmp_path, path)
+        return count
+    finally:
+        for run in runs:
+            os.remove(run)
+        os.rmdir(directory)
+
+def _record_key(data):
+    """Sort key of a packed record (its user ID)"""
+    return int.from_bytes(data[:8], "little")
+
+def _write_run(directory, index, chunk):
+    """Write a sorted run of packed records"""
+    chunk.sort(key=_record_key)
+    run = os.path.join(directory, f"run-{index}.bin")
+    with open(run, "wb") as f:
+        f.writelines(chunk)
+    return run
+
+def _iter_run(run):
+    """Read packed records back from a run file"""
+    with open(run, "rb") as f:
+        while True:
+            data = f.read(snapshot.RECORD.size)
+            if not data:
+                return
+            yield data
+
+WRITERS = {
+    "json": write_json,
+    "ndjson": write_ndjson,
+    "csv": write_csv,
+    "sql": write_sql,
+    "bin": write_bin
+}
+
+def checksum_file(path, fmt, show_progress=True):
+    """Compute the checksum of a file"""
+    size = os.path.getsize(path)
+    progress = Progress(f"checksum {os.path.basename(path)}", size, show_progress)
+    checksum = Checksum()
+    for user_id, record in open_reader(path, fmt, progress):
+        checksum.add(user_id, record)
+    progress.done()
+    return checksum
+
+def convert(source, target, source_fmt, target_fmt, verify=False, show_progress=True):
+    """Stream records from source to target; return the source checksum"""
+    progress = Progress(f"{source_fmt} -> {target_fmt}", os.path.getsize(source), show_progress)
+    checksum = Checksum()
+
+    def records():
+        for user_id, record in open_reader(source, source_fmt, progress):
+            checksum.add(user_id, record)
+            yield user_id, record
+
+    WRITERS[target_fmt](target, records())
+    progress.done()
+
+    if verify:
+        written = checksum_file(target, target_fmt, show_progress)
+        if written.hexdigest() != checksum.hexdigest():
+            raise SystemExit(f"Checksum mismatch: source {checksum.hexdigest()}, target {written.hexdigest()}")
+    return checksum
+
+def generate(path, users, seed=1, show_progress=True):
+    """Write a synthetic users.json of the given size, streaming"""
+    rng = random.Random(seed)
+    progress = Progress("generate", enabled=show_progress)
+
+    def records():
+        for _ in range(users):
+            xp = rng.randint(0, 50000)
+            progress.update()
+            yield str(rng.randrange(10**17, 13 * 10**17)), {
+                "xp": xp,
+                "level": xp // 100 + 1,
+                "balance": rng.randint(0, 10000),
+                "daily_last": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if rng.random() < 0.6 else None
+            }
+
+    count = write_json(path, records())
+    progress.done()
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream StreamNotify+ user data between formats.")
+    parser.add_argument("--quiet", action="store_true", help="do not print progress")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="convert a user file to another format")
+    convert_parser.add_argument("source")
+    convert_parser.add_argument("target")
+    convert_parser.add_argument("--from", dest="source_format", choices=sorted(WRITERS))
+    convert_parser.add_argument("--to", dest="target_format", choices=sorted(WRITERS))
+    convert_parser.add_argument("--verify", action="store_true", help="re-read the output and compare checksums")
+
+    checksum_parser = subparsers.add_parser("checksum", help="print the order-independent checksum of a user file")
+    checksum_parser.add_argument("path")
+    checksum_parser.add_argument("--format", choices=sorted(WRITERS))
+
+    generate_parser = subparsers.add_parser("generate", help="write a synthetic users.json")
+    generate_parser.add_argument("path")
+    generate_parser.add_argument("--users", type=int, default=1000000)
+    generate_parser.add_argument("--seed", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    show_progress = not args.quiet
+
+    if args.command == "convert":
+        checksum = convert(
+            args.source, args.target,
+            detect_format(args.source, args.source_format),
+            detect_format(args.target, args.target_format),
+            verify=args.verify,
+            show_progress=show_progress
+        )
+        print(f"{checksum.count} records, checksum {checksum.hexdigest()}" + (" (verified)" if args.verify else ""))
+    elif args.command == "checksum":
+        print(checksum_file(args.path, detect_format(args.path, args.format), show_progress).hexdigest())
+    elif args.command == "generate":
+        print(f"{generate(args.path, args.users, args.seed, show_progress)} records written to {args.path}")
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,21 @@ StreamNotify+ Web Server
 This is a Flask web server for the bot with a dashboard interface.
 """
 import os
+import hmac
 import logging
 import threading
 import datetime
-from flask import Flask, jsonify, render_template, redirect, url_for
+from flask import Flask, Response, jsonify, render_template, redirect, request, url_for
 import app as bot_app
+import telemetry
+import metrics
+import command_stats
+import loop_monitor
+import eventsub
+import websub
+import breaker
+import profiler
+import delivery
 
 # Set up logging
 logging.basicConfig(
@@ -26,7 +36,12 @@ start_time = datetime.datetime.now()
 def get_uptime():
     """Calculate uptime since server start"""
     now = datetime.datetime.now()
-    delta = now - start_time
+    return format_duration(now - start_time)
+
+def format_duration(delta):
+    """Format a timedelta (or a number of seconds) for display"""
+    if not isinstance(delta, datetime.timedelta):
+        delta = datetime.timedelta(seconds=delta)
     days = delta.days
     hours, remainder = divmod(delta.seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
@@ -48,12 +63,77 @@ def check_api_status():
         "tiktok": bool(os.getenv("TIKTOK_API_KEY"))
     }
 
+def get_runtime_status():
+    """Build the live gateway and poller status from the telemetry registry"""
+    state = telemetry.snapshot()
+    gateway = state["gateway"]
+    pollers = {}
+    for name, stats in state["loops"].items():
+        pollers[name] = {
+            "stale": stats["stale"],
+            "ticks": stats["ticks"],
+            "last_run": stats["last_run"],
+            "last_run_ago": format_duration(stats["age"]) if stats["age"] is not None else None,
+            "last_success": stats["last_success"],
+            "last_success_ago": format_duration(stats["success_age"]) if stats["success_age"] is not None else None,
+            "last_duration_ms": round(stats["last_duration"] * 1000, 1) if stats["last_duration"] is not None else None,
+            "items_checked": stats["items_checked"],
+            # Reported for diagnosis only: liveness ("stale") depends on the loop running on schedule
+            "errors": {
+                "total": stats["errors"],
+                "last_tick": stats["last_errors"],
+                "consecutive": stats["consecutive_errors"],
+                "rate": round(stats["error_rate"], 3)
+            }
+        }
+    loop_state = loop_monitor.snapshot()
+    return {
+        "degraded": telemetry.is_degraded(state),
+        "discord": {
+            "connected": gateway["connected"],
+            "latency_ms": round(gateway["latency"] * 1000, 1) if gateway["latency"] is not None else None,
+            "last_ready": gateway["last_ready"],
+            "last_disconnect": gateway["last_disconnect"],
+            "disconnects": gateway["disconnects"]
+        },
+        "pollers": pollers,
+        "breakers": [
+            {
+                "name": name,
+                "state": status["state"],
+                "retry_in": format_duration(status["retry_in"]) if status["retry_in"] else None,
+                "failures": status["failures"] + status["not_found"],
+                "last_error": status["last_error"],
+                "skipped": status["skipped"]
+            }
+            for name, status in sorted(breaker.snapshot().items())
+        ],
+        "event_loop": {
+            "monitored": loop_state["running"],
+            "lag_ms": round(loop_state["lag"] * 1000, 1),
+            "max_lag_ms": round(loop_state["max_lag"] * 1000, 1),
+            "stalls": loop_state["stalls"],
+            "offenders": [
+                {
+                    "culprit": offender["culprit"],
+                    "count": offender["count"],
+                    "total_ms": round(offender["total"] * 1000, 1),
+                    "max_ms": round(offender["max"] * 1000, 1),
+                    "stack": offender["stack"]
+                }
+                for offender in loop_state["offenders"]
+            ]
+        }
+    }
+
 @app.route('/')
 def index():
     """Render the dashboard homepage"""
     api_status = check_api_status()
+    runtime = get_runtime_status()
     return render_template('index.html', 
                            uptime=get_uptime(),
+                           runtime=runtime,
                            twitch_enabled=api_status["twitch"],
                            youtube_enabled=api_status["youtube"],
                            tiktok_enabled=api_status["tiktok"])
@@ -69,8 +149,11 @@ def api():
 def status():
     """Display status page"""
     api_status = check_api_status()
+    runtime = get_runtime_status()
     return render_template('status.html',
                           uptime=get_uptime(),
+                          runtime=runtime,
+                          command_stats=command_stats.summary(),
                           discord_enabled=bool(os.getenv("DISCORD_TOKEN")),
                           twitch_enabled=api_status["twitch"],
                           youtube_enabled=api_status["youtube"],
@@ -80,18 +163,75 @@ def status():
 def health():
     """Health check endpoint for monitoring services"""
     api_status = check_api_status()
+    runtime = get_runtime_status()
     return jsonify({
-        "status": "online",
+        "status": "degraded" if runtime["degraded"] else "online",
         "uptime": get_uptime(),
         "version": "1.0.0",
         "services": {
             "web": True,
-            "discord": bool(os.getenv("DISCORD_TOKEN")),
-            "twitch": api_status["twitch"],
-            "youtube": api_status["youtube"],
-            "tiktok": api_status["tiktok"]
-        }
-    })
+            "discord": runtime["discord"]["connected"],
+            "twitch": api_status["twitch"] and not runtime["pollers"].get("twitch", {}).get("stale", False),
+            "youtube": api_status["youtube"] and not runtime["pollers"].get("youtube", {}).get("stale", False),
+            "tiktok": api_status["tiktok"] and not runtime["pollers"].get("tiktok", {}).get("stale", False)
+        },
+        "discord": runtime["discord"],
+        "pollers": runtime["pollers"],
+        "event_loop": {key: value for key, value in runtime["event_loop"].items() if key != "offenders"},
+        "delivery": delivery.scheduler.snapshot()
+    }), 503 if runtime["degraded"] else 200
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose the in-process metrics in the Prometheus text format"""
+    return Response(metrics.render_all(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route('/eventsub', methods=['POST'])
+def eventsub_callback():
+    """Receive Twitch EventSub webhook deliveries"""
+    status_code, body, content_type = eventsub.receiver.handle(request.headers, request.get_data())
+    return Response(body, status=status_code, content_type=content_type)
+
+@app.route('/websub', methods=['GET', 'POST'])
+def websub_callback():
+    """Answer WebSub hub verifications and receive YouTube upload notifications"""
+    if request.method == 'GET':
+        status_code, body = websub.receiver.verify(request.args)
+    else:
+        status_code, body = websub.receiver.handle(request.headers, request.get_data())
+    return Response(body, status=status_code, content_type="text/plain")
+
+def debug_authorized():
+    """Check the DEBUG_TOKEN bearer token of a /debug request"""
+    authorization = request.headers.get("Authorization", "")
+    return hmac.compare_digest(authorization.encode(), f"Bearer {profiler.DEBUG_TOKEN}".encode())
+
+@app.route('/debug/<action>', methods=['GET', 'POST'])
+def debug_endpoint(action):
+    """Profile the live process or snapshot / diff its memory (requires DEBUG_TOKEN)"""
+    if not profiler.DEBUG_TOKEN or action not in ("profile", "snapshot", "diff"):
+        return Response("Not found", status=404, content_type="text/plain")
+    if not debug_authorized():
+        return Response("Unauthorized", status=401, content_type="text/plain", headers={"WWW-Authenticate": "Bearer"})
+    
+    if action == "profile":
+        try:
+            profile = profiler.sample(request.args.get("seconds", 10, type=float))
+        except profiler.ProfilerBusy as e:
+            return Response(str(e), status=409, content_type="text/plain")
+        # ?format=collapsed feeds flame graph tools directly
+        body = profile.collapsed() if request.args.get("format") == "collapsed" else profile.format_top(request.args.get("top", profiler.TOP_N, type=int))
+        return Response(body, content_type="text/plain; charset=utf-8")
+    
+    if action == "snapshot":
+        return jsonify(profiler.take_snapshot())
+    
+    result = profiler.diff(request.args.get("top", profiler.TOP_N, type=int))
+    if result is None:
+        return jsonify({"error": "No snapshot: call /debug/snapshot first"}), 409
+    if request.args.get("stop") == "1":
+        profiler.stop_tracing()
+    return jsonify(result)
 
 def run_flask_app():
     """Run the Flask app directly (for development)"""
@@ -0,0 +1,230 @@
+"""
+StreamNotify+ WebSub Module
+YouTube upload notifications pushed through WebSub (PubSubHubbub): hub verification,
+Atom feed parsing, signature check and lease renewal.
+"""
+import os
+import hmac
+import time
+import asyncio
+import logging
+import datetime
+import threading
+import collections
+import xml.etree.ElementTree as ElementTree
+
+logger = logging.getLogger(__name__)
+
+# Public URL of the /websub route; WebSub is off without it
+WEBSUB_CALLBACK_URL = os.getenv("WEBSUB_CALLBACK_URL")
+
+# Secret the hub signs every delivery with (X-Hub-Signature); WebSub is off without it too,
+# since unsigned deliveries could announce forged uploads
+WEBSUB_SECRET = os.getenv("WEBSUB_SECRET")
+
+WEBSUB_HUB_URL = os.getenv("WEBSUB_HUB_URL", "https://pubsubhubbub.appspot.com/subscribe")
+
+# Lease requested from the hub, and how long before expiry it is renewed
+LEASE_SECONDS = 5 * 86400
+RENEW_MARGIN = 86400
+
+# Entries published longer ago than this are edits of old videos, not uploads
+MAX_ENTRY_AGE = 86400
+
+# Seconds to wait for the hub's verification before asking again
+PENDING_TIMEOUT = 3600
+
+# Video IDs remembered to drop repeated deliveries
+SEEN_VIDEO_LIMIT = 5000
+
+_NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015"
+}
+
+def enabled():
+    """Return True when WebSub is configured"""
+    return bool(WEBSUB_CALLBACK_URL and WEBSUB_SECRET)
+
+def topic_url(channel_id):
+    """Return the feed URL a channel's uploads are published on"""
+    return f"https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+
+def sign(secret, body, algorithm="sha1"):
+    """Return the X-Hub-Signature value for a body"""
+    return f"{algorithm}=" + hmac.new(secret.encode(), body, algorithm).hexdigest()
+
+def _parse_time(value):
+    """Parse an Atom timestamp to epoch seconds, or None"""
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+def parse_feed(body):
+    """Return the video entries of an Atom notification as dicts"""
+    root = ElementTree.fromstring(body)
+    entries = []
+    for entry in root.findall("atom:entry", _NAMESPACES):
+        video_id = entry.findtext("yt:videoId", namespaces=_NAMESPACES)
+        channel_id = entry.findtext("yt:channelId", namespaces=_NAMESPACES)
+        if not video_id or not channel_id:
+            continue
+        link = entry.find("atom:link[@rel='alternate']", _NAMESPACES)
+        entries.append({
+            "video_id": video_id,
+            "channel_id": channel_id,
+            "title": entry.findtext("atom:title", default="", namespaces=_NAMESPACES),
+            "link": link.get("href") if link is not None else f"https://www.youtube.com/watch?v={video_id}",
+            "published": _parse_time(entry.findtext("atom:published", namespaces=_NAMESPACES)),
+            "updated": _parse_time(entry.findtext("atom:updated", namespaces=_NAMESPACES))
+        })
+    return entries
+
+class Receiver:
+    """Answers hub verifications, tracks leases and hands new uploads to the bot's event loop"""
+
+    def __init__(self, secret):
+        self.secret = secret
+        self._loop = None
+        self._handler = None
+        self._lock = threading.Lock()
+        # topic -> ("subscribe" / "unsubscribe", requested at) not verified yet
+        self._pending = {}
+        # topic -> lease expiry (epoch seconds)
+        self.leases = {}
+        self._seen = collections.OrderedDict()
+        self.received = collections.Counter()
+
+    def attach(self, loop, handler):
+        """Deliver new uploads to handler(entry), a coroutine function run on loop"""
+        self._loop = loop
+        self._handler = handler
+
+    def expect(self, topic, mode):
+        """Record a subscription request so the hub's verification is accepted"""
+        with self._lock:
+            self._pending[topic] = (mode, time.time())
+
+    def verify(self, args):
+        """Answer a hub verification GET; return (status, body)"""
+        mode = args.get("hub.mode")
+        topic = args.get("hub.topic")
+        challenge = args.get("hub.challenge")
+        if mode == "denied":
+            logger.warning(f"WebSub subscription to {topic} denied: {args.get('hub.reason')}")
+            with self._lock:
+                self._pending.pop(topic, None)
+            return 200, ""
+        with self._lock:
+            if not challenge or self._pending.get(topic, (None,))[0] != mode:
+                # Nobody asked for this: refuse so forged subscriptions fail
+                return 404, "Unknown subscription"
+            del self._pending[topic]
+            if mode == "subscribe":
+                lease = int(args.get("hub.lease_seconds") or LEASE_SECONDS)
+                self.leases[topic] = time.time() + lease
+            else:
+                self.leases.pop(topic, None)
+        self.received["verification"] += 1
+        logger.info(f"WebSub {mode} verified for {topic}")
+        return 200, challenge
+
+    def _is_new(self, video_id):
+        """Record a video ID; return False if it was already delivered"""
+        with self._lock:
+            if video_id in self._seen:
+                return False
+            self._seen[video_id] = True
+            while len(self._seen) > SEEN_VIDEO_LIMIT:
+                self._seen.popitem(last=False)
+            return True
+
+    def handle(self, headers, body):
+        """Process a content delivery; return (status, body)"""
+        # Without a secret nothing can be authenticated, so nothing is accepted
+        signature = headers.get("X-Hub-Signature", "")
+        algorithm = signature.partition("=")[0]
+        valid = bool(self.secret) and algorithm in ("sha1", "sha256", "sha384", "sha512") and hmac.compare_digest(
+            sign(self.secret, body, algorithm), signature
+        )
+        if not valid:
+            # The spec asks for a 2xx even when the signature does not match
+            self.received["rejected"] += 1
+            logger.warning("Ignored WebSub delivery with an invalid signature")
+            return 202, ""
+
+        try:
+            entries = parse_feed(body)
+        except ElementTree.ParseError:
+            self.received["rejected"] += 1
+            return 400, "Invalid feed"
+
+        if entries and (self._handler is None or self._loop is None or self._loop.is_closed()):
+            # Let the hub retry once the bot is up
+            return 503, "Bot not ready"
+
+        now = time.time()
+        for entry in entries:
+            if entry["published"] is not None and now - entry["published"] > MAX_ENTRY_AGE:
+                self.received["old"] += 1
+                continue
+            if not self._is_new(entry["video_id"]):
+                self.received["duplicate"] += 1
+                continue
+            self.received["notification"] += 1
+            future = asyncio.run_coroutine_threadsafe(self._handler(entry), self._loop)
+            future.add_done_callback(_log_handler_error)
+        return 204, ""
+
+    def due_for_renewal(self, topic, now=None):
+        """Return True if the topic has no lease or it expires within the renewal margin"""
+        now = now or time.time()
+        with self._lock:
+            pending = self._pending.get(topic)
+            if pending is not None and now - pending[1] < PENDING_TIMEOUT:
+                return False
+            return self.leases.get(topic, 0) - now < RENEW_MARGIN
+
+def _log_handler_error(future):
+    """Log failures of upload handlers"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error handling WebSub notification: {future.exception()}")
+
+receiver = Receiver(WEBSUB_SECRET)
+
+async def request_subscription(session, channel_id, mode="subscribe"):
+    """Ask the hub to (un)subscribe the callback to a channel; return True if accepted"""
+    topic = topic_url(channel_id)
+    data = {
+        "hub.callback": WEBSUB_CALLBACK_URL,
+        "hub.topic": topic,
+        "hub.mode": mode,
+        "hub.verify": "async",
+        "hub.lease_seconds": str(LEASE_SECONDS),
+        "hub.secret": WEBSUB_SECRET
+    }
+    receiver.expect(topic, mode)
+    async with session.post(WEBSUB_HUB_URL, data=data) as resp:
+        if resp.status in (202, 204):
+            return True
+        logger.error(f"WebSub hub refused to {mode} {channel_id}: {resp.status}")
+        return False
+
+async def renew_leases(session, channel_ids, prune=True):
+    """Subscribe channels whose lease is missing or expiring and drop leases of removed ones; return (renewed, dropped)
+
+    Without prune, leases of channels missing from the list are kept: pass it only when the list
+    is known to hold every configured channel.
+    """
+    renewed = dropped = 0
+    wanted = {topic_url(channel_id): channel_id for channel_id in channel_ids}
+    for topic, channel_id in wanted.items():
+        if receiver.due_for_renewal(topic) and await request_subscription(session, channel_id):
+            renewed += 1
+    for topic in [topic for topic in list(receiver.leases) if prune and topic not in wanted]:
+        if await request_subscription(session, topic.rsplit("=", 1)[1], mode="unsubscribe"):
+            dropped += 1
+    if renewed or dropped:
+        logger.info(f"WebSub leases: {renewed} requested, {dropped} dropped")
+    return renewed, dropped